@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+from calculators.investment_calculator.portfolio import Portfolio
+from calculators.mortgage_calculator.mortgage_batch import MortgageBatch
+from calculators.mortgage_calculator.mortgage_calculator import (
+    MortgageCalculator,
+    amortize,
+    periodic_interest_factor,
+)
+from calculators.smith_calculator.batch import SmithBatch
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import sweep
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# name -> function doing the setup and returning the callable to time
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("mortgage_payment_date")
+def mortgage_payment_date():
+    mortgage = make_smith_calculator().mortgage
+    dates = list(pd.date_range("2021-08-10", periods=1000, freq="9D"))
+
+    def run():
+        for date in dates:
+            mortgage.mortgage_payment_date(date)
+
+    return run
+
+
+@benchmark("next_dividend_date")
+def next_dividend_date():
+    investment = make_smith_calculator().investment
+    dates = list(pd.date_range("2021-08-10", periods=1000, freq="9D"))
+
+    def run():
+        for date in dates:
+            investment.next_dividend_date(date)
+
+    return run
+
+
+def simulate(payment_frequency, engine="event"):
+    def setup():
+        def run():
+            make_smith_calculator(payment_frequency=payment_frequency).simulate(
+                engine=engine
+            )
+
+        return run
+
+    return setup
+
+
+for frequency in MortgageCalculator.payment_periods:
+    benchmark(f"simulate[{frequency}]")(simulate(frequency))
+benchmark("simulate[bi-weekly, daily]")(simulate("bi-weekly", engine="daily"))
+
+
+@benchmark("amortization_schedule")
+def amortization_schedule():
+    mortgage = make_smith_calculator().mortgage
+
+    def run():
+        for frequency in MortgageCalculator.payment_periods:
+            mortgage.amortization_schedule(frequency)
+
+    return run
+
+
+@benchmark("amortize[1000 mortgages]")
+def amortize_mortgages():
+    rng = np.random.default_rng(0)
+    n = 1000
+    principle = rng.integers(100000, 1000000, n).astype(float)
+    pif = periodic_interest_factor(rng.integers(100, 800, n) / 100, "monthly")
+    # 25 year payments
+    payment_amount = np.ceil(principle * pif / (1 - (1 + pif) ** -300) * 100) / 100
+
+    def run():
+        amortize(principle, payment_amount, pif)
+
+    return run
+
+
+@benchmark("mortgage_batch_quote[10000]")
+def mortgage_batch_quote():
+    rng = np.random.default_rng(0)
+    n = 10000
+    batch = MortgageBatch(
+        principle=rng.integers(100000, 1000000, n).astype(float),
+        equity_available=rng.integers(200000, 2000000, n).astype(float),
+        amortization_months=rng.choice([240, 300, 360], n),
+        interest_rate=rng.integers(100, 800, n) / 100,
+        payment_frequency=rng.choice(list(MortgageCalculator.payment_periods), n),
+    )
+
+    def run():
+        batch.quote()
+
+    return run
+
+
+@benchmark("simulate[portfolio of 36]")
+def simulate_portfolio():
+    rng = np.random.default_rng(0)
+    n = 36
+    holdings = dict(
+        names=[f"ETF{i}" for i in range(n)],
+        dividend_yield=rng.integers(200, 800, n) / 100,
+        frequency=rng.choice(["monthly", "quarterly"], n),
+        dividend_issue_date=np.datetime64("2021-01-01") + rng.integers(0, 365, n),
+    )
+
+    def run():
+        smith = make_smith_calculator(initial_draw=0)
+        smith.investment = Portfolio(**holdings)
+        smith.mortgage.draw_from_heloc(140000)
+        smith.investment.buy(140000)
+        smith.simulate(engine="event")
+
+    return run
+
+
+GRID = {
+    "interest_rate": [2.0, 3.0, 4.0, 5.0],
+    "dividend_yield": [3.0, 4.0, 5.0, 6.0],
+}
+
+
+@benchmark("sweep[16 scenarios]")
+def sweep_scenarios():
+    def run():
+        sweep(GRID, workers=1)
+
+    return run
+
+
+@benchmark("batch[16 scenarios]")
+def batch_scenarios():
+    def run():
+        SmithBatch.from_grid(GRID).simulate()
+
+    return run
+
+
+def measure(setup, repeat=5):
+    """
+    Best time in seconds of `repeat` runs
+    """
+    run = setup()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmarks(names=None, repeat=5):
+    return {
+        name: measure(BENCHMARKS[name], repeat)
+        for name in BENCHMARKS
+        if names is None or any(pattern in name for pattern in names)
+    }
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Rows of (name, seconds, baseline seconds, ratio, regressed). A
+    benchmark regresses when it is more than `threshold` times slower than
+    its baseline.
+    """
+    rows = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        ratio = seconds / base if base else np.nan
+        rows.append((name, seconds, base, ratio, bool(ratio > threshold)))
+    return rows
+
+
+def load_baseline(path=BASELINE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(results, path=BASELINE):
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time the simulation hot paths and compare them with the saved "
+            "baseline. Exits with 1 when a benchmark regressed."
+        )
+    )
+    parser.add_argument("names", nargs="*", help="only run benchmarks matching these")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="save as the baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names or None, args.repeat)
+    baseline = load_baseline(args.baseline)
+    rows = compare(results, baseline, args.threshold)
+
+    print(f"{'benchmark':36} {'seconds':>10} {'baseline':>10} {'ratio':>7}")
+    for name, seconds, base, ratio, regressed in rows:
+        base = f"{base:10.4f}" if base else f"{'-':>10}"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:36} {seconds:10.4f} {base} {ratio:7.2f}{flag}")
+
+    if args.save:
+        save_baseline({**baseline, **results}, args.baseline)
+        return 0
+    return int(any(row[-1] for row in rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import numpy as np
+
+# Holiday tables are computed once for these years; np.busdaycalendar is
+# immutable, so a calendar holds every holiday of its horizon. Dates outside
+# it only skip weekends.
+FIRST_YEAR = 1950
+LAST_YEAR = 2150
+
+
+def _month_starts(years, month):
+    months = (years - 1970) * 12 + (month - 1)
+    return months.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def fixed(month, day):
+    """
+    Holiday rule: the same date every year
+    """
+
+    def rule(years):
+        return _month_starts(years, month) + np.timedelta64(day - 1, "D")
+
+    return rule
+
+
+def nth_weekday(month, weekday, n):
+    """
+    Holiday rule: the nth weekday ("Mon", "Tue", ...) of a month, counting
+    from the end of the month when n is negative
+    """
+
+    def rule(years):
+        if n > 0:
+            first = _month_starts(years, month)
+            return np.busday_offset(first, n - 1, roll="forward", weekmask=weekday)
+        last = _month_starts(years, month + 1) - np.timedelta64(1, "D")
+        return np.busday_offset(last, n + 1, roll="backward", weekmask=weekday)
+
+    return rule
+
+
+def weekday_before(month, day, weekday):
+    """
+    Holiday rule: the last weekday ("Mon", "Tue", ...) before a date, like
+    Victoria Day, the Monday before May 25
+    """
+
+    def rule(years):
+        date = fixed(month, day)(years) - np.timedelta64(1, "D")
+        return np.busday_offset(date, 0, roll="backward", weekmask=weekday)
+
+    return rule
+
+
+def easter(offset=0):
+    """
+    Holiday rule: days from Easter Sunday (Gregorian), -2 for Good Friday
+    """
+
+    def rule(years):
+        a = years % 19
+        b, c = np.divmod(years, 100)
+        d, e = np.divmod(b, 4)
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i, k = np.divmod(c, 4)
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        month, day = np.divmod(h + l - 7 * m + 114, 31)
+        return _month_starts(years, month) + (day + offset).astype("timedelta64[D]")
+
+    return rule
+
+
+_NEW_YEAR = (fixed(1, 1), None, None)
+_FAMILY_DAY = (nth_weekday(2, "Mon", 3), 2008, None)
+_GOOD_FRIDAY = (easter(-2), None, None)
+_VICTORIA_DAY = (weekday_before(5, 25, "Mon"), None, None)
+_CANADA_DAY = (fixed(7, 1), None, None)
+_CIVIC_HOLIDAY = (nth_weekday(8, "Mon", 1), None, None)
+_LABOUR_DAY = (nth_weekday(9, "Mon", 1), None, None)
+_TRUTH_AND_RECONCILIATION = (fixed(9, 30), 2021, None)
+_THANKSGIVING = (nth_weekday(10, "Mon", 2), None, None)
+_REMEMBRANCE_DAY = (fixed(11, 11), None, None)
+_CHRISTMAS = (fixed(12, 25), None, None)
+_BOXING_DAY = (fixed(12, 26), None, None)
+
+# Holiday tables: (rule, first year, last year) of each holiday, None for
+# no limit. Add a table here to make it available to BusinessCalendar.get.
+HOLIDAY_TABLES = {
+    "weekends": (),
+    # Federal statutory holidays (Canada Labour Code)
+    "CA": (
+        _NEW_YEAR,
+        _GOOD_FRIDAY,
+        _VICTORIA_DAY,
+        _CANADA_DAY,
+        _LABOUR_DAY,
+        _TRUTH_AND_RECONCILIATION,
+        _THANKSGIVING,
+        _REMEMBRANCE_DAY,
+        _CHRISTMAS,
+        _BOXING_DAY,
+    ),
+    # Ontario statutory holidays and the Civic Holiday, the days banks
+    # and the Toronto Stock Exchange close
+    "ON": (
+        _NEW_YEAR,
+        _FAMILY_DAY,
+        _GOOD_FRIDAY,
+        _VICTORIA_DAY,
+        _CANADA_DAY,
+        _CIVIC_HOLIDAY,
+        _LABOUR_DAY,
+        _THANKSGIVING,
+        _CHRISTMAS,
+        _BOXING_DAY,
+    ),
+    "QC": (
+        _NEW_YEAR,
+        _GOOD_FRIDAY,
+        _VICTORIA_DAY,  # National Patriots' Day
+        (fixed(6, 24), None, None),  # Saint-Jean-Baptiste Day
+        _CANADA_DAY,
+        _LABOUR_DAY,
+        _THANKSGIVING,
+        _CHRISTMAS,
+    ),
+    "BC": (
+        _NEW_YEAR,
+        (nth_weekday(2, "Mon", 2), 2013, 2018),  # Family Day
+        (nth_weekday(2, "Mon", 3), 2019, None),
+        _GOOD_FRIDAY,
+        _VICTORIA_DAY,
+        _CANADA_DAY,
+        _CIVIC_HOLIDAY,  # British Columbia Day
+        _LABOUR_DAY,
+        (fixed(9, 30), 2023, None),  # Truth and Reconciliation
+        _THANKSGIVING,
+        _REMEMBRANCE_DAY,
+        _CHRISTMAS,
+    ),
+    "AB": (
+        _NEW_YEAR,
+        (nth_weekday(2, "Mon", 3), 1990, None),  # Family Day
+        _GOOD_FRIDAY,
+        _VICTORIA_DAY,
+        _CANADA_DAY,
+        _LABOUR_DAY,
+        _THANKSGIVING,
+        _REMEMBRANCE_DAY,
+        _CHRISTMAS,
+    ),
+}
+
+
+def holidays(table, first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """
+    Observed holidays (sorted datetime64[D]) of a table of HOLIDAY_TABLES
+    from first_year to last_year. A holiday falling on a weekend is
+    observed on the next weekday that is not already a holiday, so Christmas
+    on a Saturday and Boxing Day on a Sunday are observed Monday and Tuesday.
+    """
+    if table not in HOLIDAY_TABLES:
+        raise ValueError(f"Unknown holiday table: {table}")
+    dates = [np.array([], dtype="datetime64[D]")]
+    for rule, first, last in HOLIDAY_TABLES[table]:
+        years = np.arange(max(first or first_year, first_year), (last or last_year) + 1)
+        years = years[years <= last_year]
+        dates.append(rule(years))
+
+    observed = np.sort(np.busday_offset(np.concatenate(dates), 0, roll="forward"))
+    while True:
+        repeated = np.flatnonzero(observed[1:] == observed[:-1]) + 1
+        if not len(repeated):
+            return observed
+        observed[repeated] = np.busday_offset(observed[repeated], 1)
+        observed.sort()
+
+
+class BusinessCalendar:
+    """
+    Business days: the days of a weekmask that are not holidays, as a
+    np.busdaycalendar. Rolling a whole schedule of dates is one
+    np.busday_offset call.
+
+    Calendars are looked up by name with get, which builds the tables of
+    HOLIDAY_TABLES on first use; calculators keep the name, so their state
+    stays plain values. Other calendars can be added with register.
+    """
+
+    __slots__ = ("name", "busdaycal")
+
+    _calendars = {}
+
+    def __init__(self, name, holidays=(), weekmask="1111100"):
+        self.name = name
+        self.busdaycal = np.busdaycalendar(
+            weekmask=weekmask, holidays=np.asarray(holidays, dtype="datetime64[D]")
+        )
+
+    def __repr__(self):
+        return f"BusinessCalendar({self.name!r}, {len(self.holidays)} holidays)"
+
+    @classmethod
+    def get(cls, name):
+        calendar = cls._calendars.get(name)
+        if calendar is None:
+            calendar = cls._calendars[name] = cls(name, holidays(name))
+        return calendar
+
+    @classmethod
+    def register(cls, calendar):
+        """
+        Make a calendar available to get. Names can't be reused: schedules
+        built from a calendar are cached by its name.
+        """
+        if calendar.name in cls._calendars or calendar.name in HOLIDAY_TABLES:
+            raise ValueError(f"Business calendar {calendar.name} already exists")
+        cls._calendars[calendar.name] = calendar
+        return calendar
+
+    @property
+    def holidays(self):
+        return self.busdaycal.holidays
+
+    def roll(self, dates, roll="forward"):
+        """
+        Dates (datetime64[D]) moved to a business day: the next one for
+        roll="forward", the previous one for "backward"
+        """
+        return np.busday_offset(
+            np.asarray(dates, dtype="datetime64[D]"),
+            0,
+            roll=roll,
+            busdaycal=self.busdaycal,
+        )
+
+    def offset(self, dates, n, roll="forward"):
+        """
+        Dates moved by n business days, after rolling them to one
+        """
+        return np.busday_offset(
+            np.asarray(dates, dtype="datetime64[D]"),
+            n,
+            roll=roll,
+            busdaycal=self.busdaycal,
+        )
+
+    def is_business_day(self, dates):
+        return np.is_busday(
+            np.asarray(dates, dtype="datetime64[D]"), busdaycal=self.busdaycal
+        )
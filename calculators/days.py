@@ -0,0 +1,39 @@
+import datetime
+import numpy as np
+
+# Dates inside the simulations are day numbers: days since 1970-01-01, the
+# same numbers as datetime64[D] arrays use. Pandas is only imported to parse
+# inputs that are not ISO dates and to build Timestamps.
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def to_day(date):
+    """
+    Day number of a date, Timestamp, datetime64 or date string
+    """
+    if isinstance(date, datetime.date):
+        return date.toordinal() - EPOCH_ORDINAL
+    if isinstance(date, np.datetime64):
+        return int(date.astype("datetime64[D]").astype(np.int64))
+    if isinstance(date, str):
+        try:
+            return datetime.date.fromisoformat(date).toordinal() - EPOCH_ORDINAL
+        except ValueError:
+            pass
+
+    import pandas as pd
+
+    return pd.Timestamp(date).toordinal() - EPOCH_ORDINAL
+
+
+def to_date(day):
+    """
+    datetime.date of a day number
+    """
+    return datetime.date.fromordinal(day + EPOCH_ORDINAL)
+
+
+def to_timestamp(day):
+    import pandas as pd
+
+    return pd.Timestamp(day, unit="D")
@@ -1,17 +1,64 @@
 from datetime import date
-import pandas as pd
 import numpy as np
+from calculators.business_days import BusinessCalendar
+from calculators.days import to_date, to_day
 
 
 class InvestmentCalculator:
-    def __init__(self, balance, dividend_yield, frequency, dividend_issue_date):
+    __slots__ = (
+        "balance",
+        "dividend_yield",
+        "frequency",
+        "dividend_balance",
+        "dividend_issue_day",
+        "business_calendar",
+    )
+
+    def __init__(
+        self,
+        balance,
+        dividend_yield,
+        frequency,
+        dividend_issue_date,
+        business_calendar="weekends",
+    ):
         self.balance = balance
         self.dividend_yield = dividend_yield
         self.frequency = frequency
         self.dividend_balance = 0.0
-        self.dividend_issue_day = pd.to_datetime(dividend_issue_date).date()
+        self.dividend_issue_day = to_date(to_day(dividend_issue_date))
+        # Name of the BusinessCalendar dividend dates roll forward to
+        self.business_calendar = business_calendar
+
+    def state(self):
+        """
+        The investment as plain (JSON friendly) values, see from_state
+        """
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["dividend_issue_day"] = to_day(self.dividend_issue_day)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        investment = cls.__new__(cls)
+        investment.business_calendar = "weekends"
+        for name, value in state.items():
+            setattr(investment, name, value)
+        investment.dividend_issue_day = to_date(state["dividend_issue_day"])
+        return investment
+
+    def load_state(self, state):
+        """
+        Put this investment in a state of state(), in place
+        """
+        loaded = self.from_state(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(loaded, name))
+        return self
 
     def __repr__(self):
+        import pandas as pd
+
         df = pd.DataFrame({"balance": [self.balance]})
         return repr(df)
 
@@ -32,11 +79,12 @@ class InvestmentCalculator:
         return self
 
     @staticmethod
-    def custom_date_range(start, end, freq, known_date):
+    def custom_date_range(start, end, freq, known_date, business_calendar="weekends"):
         """
         Custom date range function
         Specifies a start and an end range. That must contain start, end
         Then, finds the next business day incase they land on a weekend
+        or a holiday of the business calendar
 
         For example, quarterly frequency
         start = 2021-08-10
@@ -44,39 +92,47 @@ class InvestmentCalculator:
         2021-08-10, 2021-11-10, 2022-02-10, ..., 2022-08-10
 
         """
-        day = known_date.day
-        month_abbr = pd.to_datetime(known_date).strftime("%b")
-        freqs = {
-            "monthly": "m",
-            "quarterly": f"Q-{month_abbr}",
-            "semi-annually" "annualy": f"A-{month_abbr}",
-        }
-        date_range = pd.date_range(
-            start=start, end=end + pd.DateOffset(years=1), freq=freqs.get(freq)
+        import pandas as pd
+
+        calendar = DividendCalendar.get(
+            freq, pd.to_datetime(known_date).date(), business_calendar
+        )
+        start = np.datetime64(pd.to_datetime(start).date(), "M")
+        end = np.datetime64((pd.to_datetime(end) + pd.DateOffset(years=1)).date(), "M")
+        dates = calendar.between(
+            start.astype("datetime64[D]"), (end + 1).astype("datetime64[D]")
         )
-        date_range = pd.Series(date_range).apply(lambda x: x + pd.DateOffset(day=day))
-        date_range = date_range + 0 * pd.offsets.BDay()
-        return date_range
+        return pd.Series(pd.to_datetime(dates))
 
     def next_dividend_date(self, current_date):
-        this_date = pd.to_datetime(current_date).date()
-        dividend_date = self.dividend_issue_day
-
-        if this_date < dividend_date:
-            start = this_date
-            end = dividend_date
-        else:
-            start = dividend_date
-            end = this_date
-
-        dr = self.custom_date_range(
-            start=start, end=end, freq=self.frequency, known_date=dividend_date
+        this_date = np.datetime64(to_day(current_date), "D")
+        calendar = DividendCalendar.get(
+            self.frequency, self.dividend_issue_day, self.business_calendar
         )
+        return calendar.next_date(this_date).astype(object)
 
-        return dr[dr >= np.datetime64(this_date)].min().date()
+    def dividend_dates(self, start, end):
+        """
+        Dividend dates (datetime64[D]) from start to end, inclusive
+        """
+        start = np.datetime64(to_day(start), "D")
+        end = np.datetime64(to_day(end), "D")
+        calendar = DividendCalendar.get(
+            self.frequency, self.dividend_issue_day, self.business_calendar
+        )
+        return calendar.between(start, end + 1)
 
     def issue_dividend(self, current_date):
-        if pd.to_datetime(current_date).date() == self.next_dividend_date(current_date):
+        return self.issue_dividend_on(to_day(current_date))
+
+    def issue_dividend_on(self, day):
+        """
+        issue_dividend for a day number (see calculators.days)
+        """
+        calendar = DividendCalendar.get(
+            self.frequency, self.dividend_issue_day, self.business_calendar
+        )
+        if calendar.contains_day(day):
             self.dividend_balance += round(
                 self.balance * self.dividend_yield / 100 / 12.0, 2
             )
@@ -94,6 +150,94 @@ class InvestmentCalculator:
         return self
 
 
+class DividendCalendar:
+    """
+    Dividend dates for a frequency, anchored on a known issue date.
+    Dates fall on the issue day of the month (clamped to month end) and
+    are rolled forward to the next business day of a BusinessCalendar
+    (weekdays by default). They are kept as a sorted datetime64[D] array,
+    plus a set of day numbers for membership checks, and the calendar
+    grows in either direction when needed. Calendars are shared by every
+    investment with the same (frequency, issue date, business calendar).
+    """
+
+    frequencies = {
+        "monthly": 1,
+        "quarterly": 3,
+        "semi-annually": 6,
+        "annually": 12,
+    }
+
+    _calendars = {}
+
+    def __init__(self, frequency, issue_date, business_calendar="weekends"):
+        if frequency not in self.frequencies:
+            raise ValueError(f"Unknown dividend frequency: {frequency}")
+        self.frequency = frequency
+        self.issue_date = np.datetime64(issue_date, "D")
+        self.business_calendar = BusinessCalendar.get(business_calendar)
+        self.first_period = -12
+        self.last_period = 12
+        self._build()
+
+    @classmethod
+    def get(cls, frequency, issue_date, business_calendar="weekends"):
+        key = (frequency, issue_date, business_calendar)
+        calendar = cls._calendars.get(key)
+        if calendar is None:
+            calendar = cls(frequency, issue_date, business_calendar)
+            cls._calendars[key] = calendar
+        return calendar
+
+    def _build(self):
+        step = self.frequencies[self.frequency]
+        periods = np.arange(self.first_period, self.last_period + 1)
+        months = np.datetime64(self.issue_date, "M") + periods * step
+        first_days = months.astype("datetime64[D]")
+        month_lengths = (months + 1).astype("datetime64[D]") - first_days
+        day = self.issue_date - np.datetime64(self.issue_date, "M").astype(
+            "datetime64[D]"
+        )
+        dates = first_days + np.minimum(day, month_lengths - 1)
+        self.dates = self.business_calendar.roll(dates)
+        days = self.dates.astype(np.int64).tolist()
+        self._days = set(days)
+        self._first_day = days[0]
+        self._last_day = days[-1]
+
+    def _cover(self, date):
+        """
+        Extend the calendar (doubling its span) until it contains `date`
+        """
+        if self.dates[0] <= date <= self.dates[-1]:
+            return
+        while self.dates[0] > date:
+            self.first_period -= self.last_period - self.first_period
+            self._build()
+        while self.dates[-1] < date:
+            self.last_period += self.last_period - self.first_period
+            self._build()
+
+    def next_date(self, date):
+        self._cover(date)
+        return self.dates[np.searchsorted(self.dates, date)]
+
+    def contains(self, date):
+        return self.contains_day(int(date.astype("datetime64[D]").astype(np.int64)))
+
+    def contains_day(self, day):
+        if not self._first_day <= day <= self._last_day:
+            self._cover(np.datetime64(day, "D"))
+        return day in self._days
+
+    def between(self, start, end):
+        self._cover(start)
+        self._cover(end)
+        return self.dates[
+            np.searchsorted(self.dates, start) : np.searchsorted(self.dates, end)
+        ]
+
+
 if __name__ == "__main__":
 
     investment = InvestmentCalculator(
@@ -0,0 +1,315 @@
+import numpy as np
+from calculators.days import to_date, to_day
+from calculators.investment_calculator.investment_calculator import DividendCalendar
+from calculators.mortgage_calculator.mortgage_calculator import round_cents
+
+
+def pro_rata(portfolio, amount):
+    """
+    Split by the target weights
+    """
+    return amount * portfolio.weights
+
+
+def rebalance(portfolio, amount):
+    """
+    Toward the target weights: the money goes to the holdings below their
+    target, in proportion to how far below they are
+    """
+    total = portfolio.balance + amount
+    shortfall = np.maximum(portfolio.weights * total - portfolio.balances, 0.0)
+    return amount * shortfall / shortfall.sum()
+
+
+# Allocation rules: functions of the portfolio and the amount bought
+# returning the amount bought of each holding
+ALLOCATIONS = {"pro_rata": pro_rata, "rebalance": rebalance}
+
+
+class Portfolio:
+    """
+    Several holdings, each with its own dividend yield and payout calendar,
+    held as arrays with one entry per holding. A drop-in for
+    InvestmentCalculator in SmithCalculator: buy splits the money between
+    the holdings with an allocation rule of ALLOCATIONS, sell takes from
+    every holding in proportion to its balance and balance is the total.
+
+    Dividends come from one merged stream: the payout dates of every
+    distinct (frequency, issue date) calendar, precomputed for a span that
+    grows when needed, mapped to the holdings paying on each day. On other
+    days issue_dividend_on is a dict lookup, however many holdings there
+    are. Each holding pays what an InvestmentCalculator would, a twelfth of
+    its yield rounded to cents.
+
+    Arguments are broadcast against names; weights default to equal.
+    """
+
+    __slots__ = (
+        "names",
+        "balances",
+        "dividend_yields",
+        "frequencies",
+        "dividend_issue_days",
+        "weights",
+        "allocation",
+        "business_calendar",
+        "dividend_balance",
+        "_groups",
+        "_days",
+        "_payers",
+        "_first_day",
+        "_last_day",
+    )
+
+    def __init__(
+        self,
+        names,
+        dividend_yield,
+        frequency,
+        dividend_issue_date,
+        weight=None,
+        balance=0.0,
+        allocation="pro_rata",
+        business_calendar="weekends",
+    ):
+        self.names = [str(name) for name in names]
+        n = len(self.names)
+
+        def broadcast(values, dtype):
+            return np.array(np.broadcast_to(np.asarray(values, dtype=dtype), (n,)))
+
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"Unknown allocation: {allocation}")
+        if weight is None:
+            weight = 1.0
+        weights = broadcast(weight, np.float64)
+        if (weights < 0).any() or not weights.sum() > 0:
+            raise ValueError("Weights must be positive")
+
+        self.balances = broadcast(balance, np.float64)
+        self.dividend_yields = broadcast(dividend_yield, np.float64)
+        self.frequencies = broadcast(frequency, str).tolist()
+        self.dividend_issue_days = broadcast(dividend_issue_date, "datetime64[D]")
+        self.dividend_issue_days = self.dividend_issue_days.astype(np.int64)
+        self.weights = weights / weights.sum()
+        self.allocation = allocation
+        self.business_calendar = business_calendar
+        self.dividend_balance = 0.0
+        self._set_groups()
+
+    @classmethod
+    def from_frame(cls, df, **options):
+        """
+        Portfolio of the rows of a DataFrame with columns name,
+        dividend_yield, frequency, dividend_issue_date and optionally
+        weight and balance
+        """
+        columns = ("dividend_yield", "frequency", "dividend_issue_date")
+        columns += tuple(name for name in ("weight", "balance") if name in df)
+        return cls(
+            df["name"].tolist(),
+            **{name: df[name].to_numpy() for name in columns},
+            **options,
+        )
+
+    def state(self):
+        """
+        The portfolio as plain (JSON friendly) values, see from_state
+        """
+        return {
+            "names": list(self.names),
+            "balances": self.balances.tolist(),
+            "dividend_yields": self.dividend_yields.tolist(),
+            "frequencies": list(self.frequencies),
+            "dividend_issue_days": self.dividend_issue_days.tolist(),
+            "weights": self.weights.tolist(),
+            "allocation": self.allocation,
+            "business_calendar": self.business_calendar,
+            "dividend_balance": self.dividend_balance,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        portfolio = cls.__new__(cls)
+        portfolio.names = list(state["names"])
+        portfolio.balances = np.array(state["balances"], dtype=np.float64)
+        portfolio.dividend_yields = np.array(state["dividend_yields"], dtype=np.float64)
+        portfolio.frequencies = list(state["frequencies"])
+        portfolio.dividend_issue_days = np.array(
+            state["dividend_issue_days"], dtype=np.int64
+        )
+        portfolio.weights = np.array(state["weights"], dtype=np.float64)
+        portfolio.allocation = state["allocation"]
+        portfolio.business_calendar = state["business_calendar"]
+        portfolio.dividend_balance = state["dividend_balance"]
+        portfolio._set_groups()
+        return portfolio
+
+    def load_state(self, state):
+        """
+        Put this portfolio in a state of state(), in place
+        """
+        loaded = self.from_state(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(loaded, name))
+        return self
+
+    def _set_groups(self):
+        members = {}
+        for i, key in enumerate(zip(self.frequencies, self.dividend_issue_days)):
+            members.setdefault(key, []).append(i)
+        self._groups = [
+            (
+                DividendCalendar.get(
+                    frequency, to_date(int(issue_day)), self.business_calendar
+                ),
+                np.array(holdings),
+            )
+            for (frequency, issue_day), holdings in members.items()
+        ]
+        self._days = np.array([], dtype=np.int64)
+        self._payers = {}
+        self._first_day = 0
+        self._last_day = -1
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return repr(self.holdings())
+
+    def holdings(self):
+        """
+        DataFrame of the holdings, one row per holding
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "balance": self.balances,
+                "weight": self.weights,
+                "dividend_yield": self.dividend_yields,
+                "frequency": self.frequencies,
+                "dividend_issue_date": self.dividend_issue_days.astype("datetime64[D]"),
+            },
+            index=pd.Index(self.names, name="name"),
+        )
+
+    @property
+    def balance(self):
+        return float(self.balances.sum())
+
+    @property
+    def dividend_yield(self):
+        """
+        Yield of the whole portfolio, the holdings' yields weighted by
+        balance (by target weight while it is empty)
+        """
+        weights = self.balances if self.balances.sum() > 0 else self.weights
+        return float(np.average(self.dividend_yields, weights=weights))
+
+    def buy(self, amount):
+        if amount < 0:
+            raise ValueError("Can't buy a negative amount")
+
+        if amount > 0:
+            self.balances += ALLOCATIONS[self.allocation](self, amount)
+        return self
+
+    def sell(self, amount):
+        if amount < 0:
+            raise ValueError("Can't sell a negative amount")
+        balance = self.balance
+        if amount > balance:
+            raise ValueError("Insufficient balance")
+
+        if amount > 0:
+            self.balances -= amount * self.balances / balance
+        return self
+
+    def _cover(self, first, last):
+        """
+        Precompute the merged dividend stream from day `first` to `last`,
+        at least doubling the span already covered
+        """
+        if self._first_day <= first and last <= self._last_day:
+            return
+        if self._first_day <= self._last_day:
+            span = self._last_day - self._first_day + 1
+            if first < self._first_day:
+                first = min(first, self._first_day - span)
+            else:
+                first = self._first_day
+            if last > self._last_day:
+                last = max(last, self._last_day + span)
+            else:
+                last = self._last_day
+        else:
+            last = max(last, first + 365)
+
+        start = np.datetime64(first, "D")
+        end = np.datetime64(last + 1, "D")
+        days = [np.array([], dtype=np.int64)]
+        holdings = [np.array([], dtype=np.int64)]
+        for calendar, members in self._groups:
+            dates = calendar.between(start, end).astype(np.int64)
+            days.append(np.repeat(dates, len(members)))
+            holdings.append(np.tile(members, len(dates)))
+        days = np.concatenate(days)
+        holdings = np.concatenate(holdings)
+        order = np.lexsort((holdings, days))
+        days, holdings = days[order], holdings[order]
+
+        self._days, starts = np.unique(days, return_index=True)
+        self._payers = dict(zip(self._days.tolist(), np.split(holdings, starts[1:])))
+        self._first_day = first
+        self._last_day = last
+
+    def next_dividend_date(self, current_date):
+        this_date = np.datetime64(to_day(current_date), "D")
+        return min(
+            calendar.next_date(this_date) for calendar, _ in self._groups
+        ).astype(object)
+
+    def dividend_dates(self, start, end):
+        """
+        Days any holding pays a dividend (datetime64[D]) from start to end,
+        inclusive
+        """
+        first = to_day(start)
+        last = to_day(end)
+        self._cover(first, last)
+        days = self._days[
+            np.searchsorted(self._days, first) : np.searchsorted(
+                self._days, last, side="right"
+            )
+        ]
+        return days.astype("datetime64[D]")
+
+    def issue_dividend(self, current_date):
+        return self.issue_dividend_on(to_day(current_date))
+
+    def issue_dividend_on(self, day):
+        """
+        issue_dividend for a day number (see calculators.days)
+        """
+        if not self._first_day <= day <= self._last_day:
+            self._cover(day, day)
+        payers = self._payers.get(day)
+        if payers is not None:
+            issued = round_cents(
+                self.balances[payers] * self.dividend_yields[payers] / 100 / 12.0
+            )
+            self.dividend_balance += float(issued.sum())
+
+        return self
+
+    def withdraw_dividends(self, amount):
+        if amount > self.dividend_balance:
+            raise ValueError("Insufficient dividend balance.")
+        if amount < 0:
+            raise ValueError("amount must be greater than 0")
+
+        self.dividend_balance -= amount
+
+        return self
@@ -0,0 +1,216 @@
+import numpy as np
+from calculators.mortgage_calculator.mortgage_calculator import (
+    MortgageCalculator,
+    periodic_interest_factor,
+    round_cents,
+)
+
+
+def _per_unique(func, *arrays):
+    """
+    func applied to each row of arrays, calling it once per distinct row.
+    Powers are left to Python floats: NumPy's array pow can be an ulp off,
+    which would change the rounding of some amounts.
+    """
+    codes = np.zeros(len(arrays[0]), dtype=np.int64)
+    uniques = []
+    for values in arrays:
+        unique, inverse = np.unique(values, return_inverse=True)
+        codes = codes * len(unique) + inverse.reshape(-1)
+        uniques.append(unique)
+    keys, inverse = np.unique(codes, return_inverse=True)
+
+    # Back from the combined codes to the values of each array
+    columns = []
+    for unique in reversed(uniques):
+        columns.append(unique[keys % len(unique)].tolist())
+        keys = keys // len(unique)
+    values = [func(*args) for args in zip(*reversed(columns))]
+    return np.array(values, dtype=np.float64)[inverse.reshape(-1)]
+
+
+def _monthly_factor(interest_rate):
+    # As in MortgageCalculator.calculate_payment_amount
+    semi_annual_rate = interest_rate / 100.0 / 2
+    return ((1 + semi_annual_rate) ** 2) ** (1 / 12) - 1
+
+
+def _annuity_discount(interest_rate, amortization_months):
+    return 1 - (1 + _monthly_factor(interest_rate)) ** (-amortization_months)
+
+
+class MortgageBatch:
+    """
+    Many mortgages held as arrays, one row per mortgage, for quoting:
+    payment amounts, periodic factors and HELOC credit limits of every row
+    in one call, rounded exactly like the MortgageCalculator methods.
+    calculator(i) builds the MortgageCalculator of a row.
+
+    Arguments are broadcast against each other. last_payment_date is only
+    needed to build calculators.
+    """
+
+    fields = (
+        "principle",
+        "equity_available",
+        "amortization_months",
+        "interest_rate",
+        "heloc_interest_rate",
+        "payment_frequency",
+    )
+
+    def __init__(
+        self,
+        principle,
+        equity_available,
+        amortization_months,
+        interest_rate,
+        heloc_interest_rate=0.0,
+        payment_frequency="monthly",
+        last_payment_date=None,
+    ):
+        (
+            self.principle,
+            self.equity_available,
+            self.amortization_months,
+            self.interest_rate,
+            self.heloc_interest_rate,
+        ) = np.broadcast_arrays(
+            *(
+                np.atleast_1d(np.asarray(values, dtype=np.float64))
+                for values in (
+                    principle,
+                    equity_available,
+                    amortization_months,
+                    interest_rate,
+                    heloc_interest_rate,
+                )
+            )
+        )
+        n = len(self.principle)
+        self.payment_frequency = np.broadcast_to(
+            np.asarray(payment_frequency, dtype=str), (n,)
+        )
+        unknown = set(np.unique(self.payment_frequency)) - set(
+            MortgageCalculator.payment_periods
+        )
+        if unknown:
+            raise ValueError(f"Unknown payment frequencies: {sorted(unknown)}")
+
+        self.last_payment_day = None
+        if last_payment_date is not None:
+            days = np.asarray(last_payment_date, dtype="datetime64[D]")
+            self.last_payment_day = np.broadcast_to(days.astype(np.int64), (n,))
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Batch of the rows of a DataFrame with columns named after the
+        arguments
+        """
+        names = cls.fields + ("last_payment_date",)
+        return cls(**{name: df[name].to_numpy() for name in names if name in df})
+
+    def __len__(self):
+        return len(self.principle)
+
+    def __getitem__(self, rows):
+        """
+        Batch of some rows, selected by a slice, indices or a mask
+        """
+        batch = type(self).__new__(type(self))
+        for name in self.fields:
+            setattr(batch, name, np.atleast_1d(getattr(self, name)[rows]))
+        batch.last_payment_day = None
+        if self.last_payment_day is not None:
+            batch.last_payment_day = np.atleast_1d(self.last_payment_day[rows])
+        return batch
+
+    def _periods(self, payment_frequency):
+        periods = MortgageCalculator.payment_periods
+        num = np.empty(len(self))
+        denom = np.empty(len(self))
+        for frequency in np.unique(payment_frequency):
+            rows = payment_frequency == frequency
+            num[rows] = periods[frequency]["num"]
+            denom[rows] = periods[frequency]["denom"]
+        return num, denom
+
+    def _frequency(self, payment_frequency):
+        if payment_frequency is None:
+            return self.payment_frequency
+        return np.broadcast_to(np.asarray(payment_frequency, dtype=str), (len(self),))
+
+    def periodic_interest_factor(self, payment_frequency=None):
+        return _per_unique(
+            periodic_interest_factor,
+            self.interest_rate,
+            self._frequency(payment_frequency),
+        )
+
+    def calculate_payment_amount(self, payment_frequency=None):
+        """
+        Payment amounts amortizing each principle over its amortization
+        months. Rows with a zero interest rate get nan.
+        """
+        pif = _per_unique(_monthly_factor, self.interest_rate)
+        discount = _per_unique(
+            _annuity_discount, self.interest_rate, self.amortization_months
+        )
+        num, denom = self._periods(self._frequency(payment_frequency))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payment = self.principle * pif
+            payment = payment / discount
+        return round_cents(payment * num / denom)
+
+    def calculate_heloc_credit_limit(self):
+        return round_cents(self.equity_available * 0.8 - self.principle)
+
+    def quote(self, payment_frequency=None):
+        """
+        DataFrame of the inputs with the payment amount, periodic factor
+        and credit limit of each row
+        """
+        import pandas as pd
+
+        df = pd.DataFrame({name: getattr(self, name) for name in self.fields})
+        if payment_frequency is not None:
+            df["payment_frequency"] = self._frequency(payment_frequency)
+        df["payment_amount"] = self.calculate_payment_amount(payment_frequency)
+        df["periodic_factor"] = self.periodic_interest_factor(payment_frequency)
+        df["credit_limit"] = self.calculate_heloc_credit_limit()
+        return df
+
+    def calculator(self, i, payment_amount=None):
+        """
+        MortgageCalculator of row i, built from its state without
+        recalculating anything
+        """
+        if self.last_payment_day is None:
+            raise ValueError("Building calculators needs last_payment_date")
+        if payment_amount is None:
+            payment_amount = self[i : i + 1].calculate_payment_amount()[0]
+        credit_limit = round(self.equity_available[i] * 0.8 - self.principle[i], 2)
+        return MortgageCalculator.from_state(
+            {
+                "principle": self.principle[i].item(),
+                "equity_available": self.equity_available[i].item(),
+                "amortization_months": self.amortization_months[i].item(),
+                "interest_rate": self.interest_rate[i].item(),
+                "heloc_interest_rate": self.heloc_interest_rate[i].item(),
+                "payment_frequency": str(self.payment_frequency[i]),
+                "_last_payment_day": int(self.last_payment_day[i]),
+                "payment_amount": float(payment_amount),
+                "credit_limit": float(credit_limit),
+                "credit_balance": 0.0,
+                "credit_available": round(float(credit_limit), 2),
+                "rate_schedule": None,
+                "heloc_rate_schedule": None,
+                "business_calendar": None,
+            }
+        )
+
+    def calculators(self):
+        payment_amount = self.calculate_payment_amount()
+        for i in range(len(self)):
+            yield self.calculator(i, payment_amount[i])
@@ -1,8 +1,181 @@
-import pandas as pd
+import bisect
+import math
+import numpy as np
 import calendar
+from calculators.business_days import BusinessCalendar
+from calculators.days import to_date, to_day, to_timestamp
+
+
+def round_cents(values):
+    """
+    Round an array to cents, giving exactly what round(value, 2) gives for
+    each value. np.rint(values * 100) can land on the wrong side of a half
+    cent when the scaling is inexact, so values within reach of a half cent
+    (and amounts too large to check this way) are rounded with round.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.rint(scaled)
+    check = np.abs(scaled - rounded) >= 0.49999
+    check |= np.abs(scaled) >= 1e9
+    rounded /= 100
+    if check.any():
+        rounded[check] = [round(value, 2) for value in values[check]]
+    return rounded
+
+
+def amortize(principle, payment_amount, periodic_factor):
+    """
+    Amortize several mortgages at once, one payment per step, with the
+    rounding of MortgageCalculator.calculate_interest_and_principle. The
+    final payment is reduced to what is left owing. This is the entry point
+    for quoting many mortgages; each step is one NumPy operation across
+    them, so for a single mortgage MortgageCalculator.amortization_schedule
+    is faster.
+
+    Arguments are arrays of shape (n,). Returns the interest, principle and
+    balance per payment as arrays of shape (n_payments, n), zero once a
+    mortgage is paid off, and the number of payments of each mortgage.
+    """
+    balance = np.array(principle, dtype=np.float64, ndmin=1)
+    payment_amount = np.broadcast_to(payment_amount, balance.shape)
+    periodic_factor = np.broadcast_to(periodic_factor, balance.shape)
+
+    owing = balance > 0
+    interest = round_cents(periodic_factor * balance)
+    if (payment_amount[owing] <= interest[owing]).any():
+        raise ValueError("Payment amount does not cover the interest")
+
+    interest_paid, principle_paid, balances = [], [], []
+    while owing.any():
+        interest = round_cents(periodic_factor * balance)
+        principle = np.minimum(round_cents(payment_amount - interest), balance)
+        if not owing.all():
+            interest[~owing] = 0.0
+            principle[~owing] = 0.0
+        balance = balance - principle
+        owing = balance > 0
+
+        interest_paid.append(interest)
+        principle_paid.append(principle)
+        balances.append(balance)
+
+    n_payments = np.count_nonzero(principle_paid, axis=0) if balances else 0
+    shape = (len(balances),) + balance.shape
+    return (
+        np.array(interest_paid).reshape(shape),
+        np.array(principle_paid).reshape(shape),
+        np.array(balances).reshape(shape),
+        np.zeros(balance.shape, dtype=np.int64) + n_payments,
+    )
+
+
+def periodic_interest_factor(interest_rate, payment_frequency):
+    """
+    Interest rate per payment period for an annual rate compounded semi
+    annually. interest_rate can be an array of rates.
+    """
+    semi_annual_rate = interest_rate / 100.0 / 2
+    # pif = monthly interest factor
+    denom = MortgageCalculator.payment_periods[payment_frequency]["denom"]
+    if "accelerated" in payment_frequency:
+        pif = ((1 + semi_annual_rate) ** 2) ** (1 / denom) - 1
+    else:
+        pif = ((1 + semi_annual_rate) ** 2) ** (1 / 12) - 1
+        num = MortgageCalculator.payment_periods[payment_frequency]["num"]
+        pif = pif * num / denom
+    return pif
+
+
+class RateSchedule:
+    """
+    Piecewise constant annual interest rate. `rates` maps effective dates
+    to the rate in effect from that date until the next one (a dict or
+    (date, rate) pairs); the first rate also applies before its date.
+
+    Periodic factors are computed once per segment and payment frequency;
+    lookups by day number (see calculators.days) are binary searches.
+    """
+
+    __slots__ = ("days", "rates", "_factors")
+
+    def __init__(self, rates):
+        if isinstance(rates, dict):
+            rates = rates.items()
+        segments = sorted((to_day(date), rate) for date, rate in rates)
+        if not segments:
+            raise ValueError("A rate schedule needs at least one rate")
+        self.days = [day for day, _ in segments]
+        self.rates = [rate for _, rate in segments]
+        if len(set(self.days)) < len(self.days):
+            raise ValueError("Rate schedule has several rates on the same date")
+        self._factors = {}
+
+    def __repr__(self):
+        segments = ", ".join(
+            f"{to_date(day)}: {rate}" for day, rate in zip(self.days, self.rates)
+        )
+        return f"RateSchedule({{{segments}}})"
+
+    def state(self):
+        return {"days": list(self.days), "rates": list(self.rates)}
+
+    @classmethod
+    def from_state(cls, state):
+        schedule = cls.__new__(cls)
+        schedule.days = list(state["days"])
+        schedule.rates = list(state["rates"])
+        schedule._factors = {}
+        return schedule
+
+    def index(self, day):
+        """
+        Segment in effect on a day number
+        """
+        return max(bisect.bisect_right(self.days, day) - 1, 0)
+
+    def rate(self, day):
+        return self.rates[self.index(day)]
+
+    def next_change(self, day):
+        """
+        Day number of the first rate change after `day`, None if there is none
+        """
+        i = bisect.bisect_right(self.days, day)
+        return self.days[i] if i < len(self.days) else None
+
+    def periodic_factor(self, day, payment_frequency):
+        factors = self._factors.get(payment_frequency)
+        if factors is None:
+            factors = [
+                periodic_interest_factor(rate, payment_frequency) for rate in self.rates
+            ]
+            self._factors[payment_frequency] = factors
+        return factors[self.index(day)]
 
 
 class MortgageCalculator:
+    __slots__ = (
+        "principle",
+        "equity_available",
+        "amortization_months",
+        "interest_rate",
+        "heloc_interest_rate",
+        "payment_frequency",
+        "_last_payment_day",
+        "payment_amount",
+        "credit_limit",
+        "credit_balance",
+        "credit_available",
+        "rate_schedule",
+        "heloc_rate_schedule",
+        "_rate_day",
+        "_next_rate_day",
+        "business_calendar",
+        "_payment_schedules",
+        "_periodic_factors",
+    )
+
     def __init__(
         self,
         principle,
@@ -13,14 +186,25 @@ class MortgageCalculator:
         payment_freqency,
         last_payment_date,
         payment_amount=None,
+        rate_schedule=None,
+        heloc_rate_schedule=None,
+        business_calendar=None,
     ):
+        if payment_freqency not in self.payment_periods:
+            raise ValueError(f"Unknown payment frequency: {payment_freqency}")
         self.principle = principle
         self.equity_available = equity_available
         self.amortization_months = amortization_months
         self.interest_rate = interest_rate
         self.heloc_interest_rate = heloc_interest_rate
         self.payment_frequency = payment_freqency
-        self.last_payment_date = pd.to_datetime(last_payment_date)
+        # Name of the BusinessCalendar payment dates roll forward to, None
+        # to keep them on schedule
+        self.business_calendar = business_calendar
+        self._payment_schedules = {}
+        self._periodic_factors = {}
+        self.last_payment_date = last_payment_date
+        self._set_rate_schedules(rate_schedule, heloc_rate_schedule)
         if payment_amount is not None:
             self.payment_amount = payment_amount
         else:
@@ -37,37 +221,236 @@ class MortgageCalculator:
         "accelerated weekly": {"num": 13, "denom": 52},
     }
 
+    # Spacing between payments, as (step, unit)
+    payment_intervals = {
+        "monthly": (1, "M"),
+        "bi-weekly": (14, "D"),
+        "weekly": (7, "D"),
+        "accelerated bi-weekly": (14, "D"),
+        "accelerated weekly": (7, "D"),
+    }
+
     def __repr__(self):
         df = self.data()
         return repr(df)
 
+    def state(self):
+        """
+        The mortgage as plain (JSON friendly) values, see from_state
+        """
+        state = {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name not in ("_payment_schedules", "_periodic_factors")
+        }
+        for name in ("rate_schedule", "heloc_rate_schedule"):
+            if state[name] is not None:
+                state[name] = state[name].state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        mortgage = cls.__new__(cls)
+        mortgage._rate_day = None
+        mortgage._next_rate_day = None
+        mortgage.business_calendar = None
+        for name, value in state.items():
+            setattr(mortgage, name, value)
+        for name in ("rate_schedule", "heloc_rate_schedule"):
+            schedule = state.get(name)
+            if schedule is not None:
+                schedule = RateSchedule.from_state(schedule)
+            setattr(mortgage, name, schedule)
+        mortgage._payment_schedules = {}
+        mortgage._periodic_factors = {}
+        return mortgage
+
+    def load_state(self, state):
+        """
+        Put this mortgage in a state of state(), in place
+        """
+        loaded = self.from_state(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(loaded, name))
+        return self
+
+    def _set_rate_schedules(self, rate_schedule, heloc_rate_schedule):
+        if rate_schedule is not None and not isinstance(rate_schedule, RateSchedule):
+            rate_schedule = RateSchedule(rate_schedule)
+        if heloc_rate_schedule is not None and not isinstance(
+            heloc_rate_schedule, RateSchedule
+        ):
+            heloc_rate_schedule = RateSchedule(heloc_rate_schedule)
+        self.rate_schedule = rate_schedule
+        self.heloc_rate_schedule = heloc_rate_schedule
+        self._rate_day = None
+        self._next_rate_day = None
+        if rate_schedule is not None or heloc_rate_schedule is not None:
+            # The rates in effect on the last payment date; the payment
+            # amount is calculated from them
+            self._next_rate_day = self._last_payment_day
+            self.update_rates(self._last_payment_day, renew=False)
+
+    def update_rates(self, day, renew=True):
+        """
+        Switch to the rates of the rate schedules in effect on day number
+        `day`. Cheap unless a rate changed since the last call. When the
+        mortgage rate changes (a renewal) the payment amount is
+        recalculated to keep the remaining amortization, see renew.
+        """
+        if self._next_rate_day is None or day < self._next_rate_day:
+            return
+        changes = []
+        if self.heloc_rate_schedule is not None:
+            self.heloc_interest_rate = self.heloc_rate_schedule.rate(day)
+            changes.append(self.heloc_rate_schedule.next_change(day))
+        if self.rate_schedule is not None:
+            rate = self.rate_schedule.rate(day)
+            if renew and rate != self.interest_rate:
+                self.renew(rate)
+            self.interest_rate = rate
+            self._rate_day = day
+            changes.append(self.rate_schedule.next_change(day))
+        changes = [change for change in changes if change is not None]
+        self._next_rate_day = min(changes) if changes else None
+
+    def remaining_amortization_months(self):
+        """
+        Months left until the principle is paid off at the current rate
+        and payment amount
+        """
+        semi_annual_rate = self.interest_rate / 100.0 / 2
+        pif = ((1 + semi_annual_rate) ** 2) ** (1 / 12) - 1
+        num = self.payment_periods[self.payment_frequency]["num"]
+        denom = self.payment_periods[self.payment_frequency]["denom"]
+        payment = self.payment_amount * denom / num
+        if pif == 0:
+            return self.principle / payment
+        if payment <= pif * self.principle:
+            raise ValueError("Payment amount does not cover the interest")
+        return -math.log(1 - pif * self.principle / payment) / math.log(1 + pif)
+
+    def renew(self, interest_rate):
+        """
+        Renew the mortgage at a new rate, keeping the remaining amortization
+        """
+        self.amortization_months = self.remaining_amortization_months()
+        self.interest_rate = interest_rate
+        self.payment_amount = self.calculate_payment_amount()
+        return self
+
+    @property
+    def last_payment_date(self):
+        return to_timestamp(self._last_payment_day)
+
+    @last_payment_date.setter
+    def last_payment_date(self, last_payment_date):
+        self._last_payment_day = to_day(last_payment_date)
+
     def heloc_payment_date(self, current_date):
         """
         HELOC interest is due at the end of every month
         """
+        import pandas as pd
+
         date = pd.to_datetime(current_date)
         return date + pd.DateOffset(day=31)
 
-    def mortgage_payment_date(self, current_date):
-        date = pd.to_datetime(current_date)
-        dr = pd.date_range(
-            self.last_payment_date, date + pd.DateOffset(months=2), freq="d"
-        ).to_frame()
+    def is_heloc_payment_day(self, day):
+        """
+        Whether HELOC interest is due on a day number (see calculators.days)
+        """
+        return to_date(day + 1).day == 1
+
+    def payment_schedule(self, payment_frequency=None, until=None):
+        """
+        Payment dates (datetime64[D]) anchored on the last payment date.
+        The schedule is generated once per frequency and extended lazily
+        so that it covers at least `until`. With a business calendar, dates
+        falling on weekends or holidays roll forward to the next business
+        day.
+        """
+        if payment_frequency is None:
+            payment_frequency = self.payment_frequency
+        offset = 0
+        if until is not None:
+            offset = to_day(until) - self._last_payment_day
+        dates, _, _ = self._payment_schedule(payment_frequency, offset)
+        return dates
+
+    def _payment_schedule(self, payment_frequency, offset):
+        """
+        Returns the payment dates, an index mapping each day offset from
+        the last payment date to the position of the next payment date and
+        a list of flags telling which offsets are payment days. Doubles
+        the number of generated payments until `offset` is covered.
+        """
+        anchor = np.datetime64(self._last_payment_day, "D")
+        key = (payment_frequency, self._last_payment_day, self.business_calendar)
+        schedule = self._payment_schedules.get(key)
+        if schedule is not None and offset < len(schedule[1]):
+            return schedule
+
+        n_payments = 64 if schedule is None else 2 * len(schedule[0])
+        while True:
+            dates = self._generate_payment_dates(payment_frequency, n_payments)
+            offsets = (dates - anchor).astype(np.int64)
+            if offset <= offsets[-1]:
+                break
+            n_payments *= 2
+
+        next_index = np.searchsorted(offsets, np.arange(offsets[-1] + 1))
+        is_payment = np.zeros(len(next_index), dtype=bool)
+        is_payment[offsets[offsets >= 0]] = True
+        schedule = (dates, next_index, is_payment.tolist())
+        self._payment_schedules[key] = schedule
+        return schedule
+
+    def _generate_payment_dates(self, payment_frequency, n_payments):
+        start = np.datetime64(self._last_payment_day, "D")
+        step, unit = self.payment_intervals[payment_frequency]
+        if unit == "M":
+            # Same day of the month as the last payment, clamped to month end
+            months = np.datetime64(start, "M") + np.arange(n_payments) * step
+            first_days = months.astype("datetime64[D]")
+            month_lengths = (months + 1).astype("datetime64[D]") - first_days
+            day = np.timedelta64(to_date(self._last_payment_day).day - 1, "D")
+            dates = first_days + np.minimum(day, month_lengths - 1)
+        else:
+            dates = start + np.arange(n_payments) * np.timedelta64(step, "D")
+
+        if self.business_calendar is not None:
+            dates = BusinessCalendar.get(self.business_calendar).roll(dates)
+        return dates
 
-        if self.payment_frequency in ["monthly"]:
-            day = self.last_payment_date.day
-            dr = dr.resample("m").first().dropna()
-            dr = dr.apply(lambda x: x + pd.DateOffset(day=day))
+    def _next_payment_date(self, date):
+        offset = max(to_day(date) - self._last_payment_day, 0)
+        dates, next_index, _ = self._payment_schedule(self.payment_frequency, offset)
+        return dates[next_index[offset]]
 
-        if self.payment_frequency in ["weekly", "accelerated weekly"]:
-            dr = dr.resample("7 d").first().dropna()
+    def mortgage_payment_date(self, current_date):
+        """
+        Next mortgage payment date on or after `current_date`
+        """
+        day = self._next_payment_date(current_date).astype(np.int64)
+        return to_timestamp(int(day))
 
-        if self.payment_frequency in ["bi-weekly", "accelerated bi-weekly"]:
-            dr = dr.resample("14 d").first().dropna()
+    def is_mortgage_payment_date(self, current_date):
+        return self.is_payment_day(to_day(current_date))
 
-        return dr[dr >= date][0].min()
+    def is_payment_day(self, day):
+        """
+        is_mortgage_payment_date for a day number (see calculators.days)
+        """
+        offset = day - self._last_payment_day
+        if offset < 0:
+            return False
+        _, _, is_payment = self._payment_schedule(self.payment_frequency, offset)
+        return is_payment[offset]
 
     def data(self):
+        import pandas as pd
+
         df = pd.DataFrame(
             {
                 "principle": [self.principle],
@@ -77,7 +460,7 @@ class MortgageCalculator:
         )
         return df
 
-    def calculate_payment_amount(self):
+    def calculate_payment_amount(self, payment_frequency=None):
         # Calculate the monthly from the amortization months
         # Canada uses semi-annual compounding, so we need to get the effective rate
         # P * [(i (i + 1) ^ n) / ((i + 1) ^ n - 1)]
@@ -89,11 +472,19 @@ class MortgageCalculator:
         # pif = monthly interest factor
         pif = ((1 + semi_annual_rate) ** 2) ** (1 / 12) - 1
         n = self.amortization_months
+        if n <= 0:
+            raise ValueError(f"Amortization months must be > 0, got {n}")
+        if pif == 0:
+            raise ValueError(
+                "No payment amount at a 0% interest rate, give payment_amount"
+            )
         payment = P * pif
         payment = payment / (1 - (1 + pif) ** (-n))
 
-        num = self.payment_periods[self.payment_frequency]["num"]
-        denom = self.payment_periods[self.payment_frequency]["denom"]
+        if payment_frequency is None:
+            payment_frequency = self.payment_frequency
+        num = self.payment_periods[payment_frequency]["num"]
+        denom = self.payment_periods[payment_frequency]["denom"]
         return round(payment * num / denom, 2)
 
     def calculate_heloc_credit_limit(self):
@@ -102,21 +493,75 @@ class MortgageCalculator:
     def calculate_credit_available(self):
         return round(self.credit_limit - self.credit_balance, 2)
 
+    def periodic_interest_factor(self, payment_frequency=None):
+        """
+        Interest rate per payment period, cached per (rate, frequency) or
+        taken from the rate schedule
+        """
+        if payment_frequency is None:
+            payment_frequency = self.payment_frequency
+        if self._rate_day is not None:
+            return self.rate_schedule.periodic_factor(self._rate_day, payment_frequency)
+        key = (self.interest_rate, payment_frequency)
+        pif = self._periodic_factors.get(key)
+        if pif is not None:
+            return pif
+
+        pif = periodic_interest_factor(self.interest_rate, payment_frequency)
+        self._periodic_factors[key] = pif
+        return pif
+
     def calculate_interest_and_principle(self):
-        semi_annual_rate = self.interest_rate / 100.0 / 2
-        # pif = monthly interest factor
-        denom = self.payment_periods[self.payment_frequency]["denom"]
-        if "accelerated" in self.payment_frequency:
-            pif = ((1 + semi_annual_rate) ** 2) ** (1 / denom) - 1
-        else:
-            pif = ((1 + semi_annual_rate) ** 2) ** (1 / 12) - 1
-            num = self.payment_periods[self.payment_frequency]["num"]
-            pif = pif * num / denom
-        payment = self.payment_amount
+        pif = self.periodic_interest_factor()
         interest_payment = round(pif * self.principle, 2)
         principle_payment = round(self.payment_amount - interest_payment, 2)
         return interest_payment, principle_payment
 
+    def amortization_schedule(self, payment_frequency=None):
+        """
+        Payment by payment amortization table from the current principle,
+        starting with the payment after the last payment date. Interest and
+        principle are rounded exactly like make_regular_payment; the final
+        payment only covers what is left owing. See amortize for many
+        mortgages at once.
+        """
+        import pandas as pd
+
+        if payment_frequency is None:
+            payment_frequency = self.payment_frequency
+        if payment_frequency == self.payment_frequency:
+            payment_amount = self.payment_amount
+        else:
+            payment_amount = self.calculate_payment_amount(payment_frequency)
+        pif = self.periodic_interest_factor(payment_frequency)
+
+        balance = self.principle
+        if balance > 0 and payment_amount <= round(pif * balance, 2):
+            raise ValueError("Payment amount does not cover the interest")
+        payments, interests, principles, balances = [], [], [], []
+        while balance > 0:
+            interest = round(pif * balance, 2)
+            principle = min(round(payment_amount - interest, 2), balance)
+            balance -= principle
+            payments.append(round(interest + principle, 2))
+            interests.append(interest)
+            principles.append(principle)
+            balances.append(balance)
+
+        n = len(balances)
+        dates = self._generate_payment_dates(payment_frequency, n + 1)[1:]
+        df = pd.DataFrame(
+            {
+                "date": dates.astype("datetime64[ns]"),
+                "payment": np.array(payments, dtype=np.float64),
+                "interest": np.array(interests, dtype=np.float64),
+                "principle": np.array(principles, dtype=np.float64),
+                "balance": np.array(balances, dtype=np.float64),
+                "cumulative_interest": np.cumsum(interests, dtype=np.float64),
+            }
+        )
+        return df
+
     def make_regular_payment(self):
         interest_payment, principle_payment = self.calculate_interest_and_principle()
         self.principle -= principle_payment
@@ -0,0 +1,365 @@
+import numpy as np
+import pandas as pd
+from calculators.days import to_date, to_day
+from calculators.investment_calculator.portfolio import Portfolio
+from calculators.mortgage_calculator.mortgage_calculator import round_cents
+from calculators.smith_calculator.smith_calculator import merge_event_days
+from calculators.smith_calculator.recorder import Recorder
+from calculators.smith_calculator.scenario import expand_grid, make_smith_calculator
+
+
+class SmithBatch:
+    """
+    Run many scenarios of the Smith strategy in lockstep.
+
+    Scenarios are given as SmithCalculator objects, which are not modified.
+    Scenarios that share a payment calendar (mortgage payment dates,
+    dividend dates, start date and horizon) advance together through each
+    event, with the rules of SmithCalculator.step applied to arrays of
+    shape (n_scenarios,). The result matches running each scenario's
+    simulate on its own.
+
+    Where simulate would raise (for example a draw larger than the credit
+    available), the scenario stops and the error is kept in self.errors.
+    """
+
+    def __init__(self, calculators):
+        self.calculators = list(calculators)
+        if any(isinstance(smith.investment, Portfolio) for smith in self.calculators):
+            raise ValueError("SmithBatch does not support portfolios")
+        self.errors = {}
+
+    @classmethod
+    def from_grid(cls, param_grid, **base):
+        """
+        One scenario per combination of param_grid, see scenario.expand_grid
+        """
+        return cls(
+            make_smith_calculator(**params)
+            for params in expand_grid(param_grid, **base)
+        )
+
+    def groups(self):
+        """
+        Scenario ids grouped by payment calendar
+        """
+        groups = {}
+        for i, smith in enumerate(self.calculators):
+            mortgage = smith.mortgage
+            investment = smith.investment
+            key = (
+                mortgage.payment_intervals[mortgage.payment_frequency],
+                mortgage.last_payment_date,
+                mortgage.business_calendar,
+                investment.frequency,
+                investment.dividend_issue_day,
+                investment.business_calendar,
+                smith.start_date,
+                smith.n_steps,
+            )
+            groups.setdefault(key, []).append(i)
+        return list(groups.values())
+
+    def simulate(self):
+        """
+        Long format tracker: the columns of SmithCalculator.simulate with
+        a leading "scenario" column holding the scenario id (position in
+        self.calculators), sorted by scenario and date.
+        """
+        self.errors = {}
+        chunks = []
+        for ids in self.groups():
+            chunks.extend(BatchState(self, ids).run())
+
+        columns = ["scenario"] + list(Recorder.columns)
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+
+        data = {
+            column: np.concatenate([chunk[column] for chunk in chunks])
+            for column in columns
+        }
+        order = np.argsort(data["scenario"], kind="stable")
+        data = {column: values[order] for column, values in data.items()}
+        data["date"] = data["date"].astype("datetime64[D]").astype("datetime64[ns]")
+        return pd.DataFrame(data)
+
+
+class BatchState:
+    """
+    Arrays of state for one group of scenarios sharing a calendar, one entry
+    per scenario of ids.
+
+    Subclasses can change how the group is simulated (monte_carlo does)
+    through these hooks:
+
+    - the parameter arrays set in __init__ (pif, heloc_rate, dividend_yield,
+      tax_rate, ...) are read afresh on every step, so they can be replaced
+      between steps;
+    - step(day, payment_day, heloc_day, dividend_day) is called for every
+      event day of run, in date order;
+    - row(recorded, day, interest, principle, heloc_interest, dividends) is
+      given the scenarios with an event that day and returns the tracker
+      rows run collects, or None to keep none;
+    - fail(failed, message) ends the scenarios of the mask failed, recording
+      message in batch.errors.
+
+    The state arrays (principle, credit_balance, investment_balance, cash,
+    payoff_day, total_tax_refund, ...) may be read at any time.
+    """
+
+    def __init__(self, batch, ids):
+        self.batch = batch
+        self.ids = np.array(ids)
+        self.smith = batch.calculators[ids[0]]
+        calculators = [batch.calculators[i] for i in ids]
+        mortgages = [smith.mortgage for smith in calculators]
+        if any(m.rate_schedule or m.heloc_rate_schedule for m in mortgages):
+            raise ValueError("SmithBatch does not support rate schedules")
+        investments = [smith.investment for smith in calculators]
+
+        def values(objects, name):
+            return np.array([getattr(obj, name) for obj in objects], dtype=np.float64)
+
+        # Parameters
+        self.pif = np.array([m.periodic_interest_factor() for m in mortgages])
+        self.payment_amount = values(mortgages, "payment_amount")
+        self.equity_available = values(mortgages, "equity_available")
+        self.heloc_rate = values(mortgages, "heloc_interest_rate") / 100 / 12.0
+        self.dividend_yield = values(investments, "dividend_yield")
+        self.tax_rate = values(calculators, "marginal_tax_rate") / 100
+        self.div_tax_rate = values(calculators, "dividend_tax_rate") / 100
+        self.draw_threshold = values(calculators, "draw_threshold")
+        self.top_up_threshold = values(calculators, "top_up_threshold")
+        self.top_up = values(calculators, "top_up")
+        self.capitalize_threshold = values(calculators, "capitalize_threshold")
+
+        # State
+        self.principle = values(mortgages, "principle")
+        self.credit_limit = values(mortgages, "credit_limit")
+        self.credit_balance = values(mortgages, "credit_balance")
+        self.credit_available = values(mortgages, "credit_available")
+        self.investment_balance = values(investments, "balance")
+        self.dividend_balance = values(investments, "dividend_balance")
+        n = len(ids)
+        self.cash = np.zeros(n)
+        self.new_credit = np.zeros(n)
+        self.tax_return_available = np.zeros(n, dtype=bool)
+        self.alive = np.ones(n, dtype=bool)
+        self.tax_years = {}
+        self.payoff_day = np.full(n, -1, dtype=np.int64)
+        self.total_tax_refund = np.zeros(n)
+
+    def fail(self, failed, message):
+        for i in self.ids[failed]:
+            self.batch.errors[int(i)] = message
+        self.alive &= ~failed
+
+    def update_credit(self, changed):
+        limit = round_cents(self.equity_available * 0.8 - self.principle)
+        self.credit_limit = np.where(changed, limit, self.credit_limit)
+        self.update_available(changed)
+
+    def update_available(self, changed):
+        available = round_cents(self.credit_limit - self.credit_balance)
+        self.credit_available = np.where(changed, available, self.credit_available)
+
+    def run(self):
+        smith = self.smith
+        start = to_day(smith.start_date)
+        chunks = [
+            self.row(
+                np.ones(len(self.ids), dtype=bool),
+                start,
+                *np.zeros((4, len(self.ids))),
+            )
+        ]
+        schedules = smith.event_schedules()
+        if not schedules:
+            return chunks
+
+        payment_days = set(schedules["mortgage"])
+        heloc_days = set(schedules["heloc"])
+        dividend_days = set(schedules["dividend"])
+        end = start + smith.n_steps - 1
+
+        def carry():
+            return bool((self.cash[self.alive] > 0).any())
+
+        for day in merge_event_days(schedules.values(), end, carry):
+            if not self.alive.any():
+                break
+            chunk = self.step(
+                day, day in payment_days, day in heloc_days, day in dividend_days
+            )
+            if chunk is not None and day == start:
+                # simulate drops rows that repeat the initial row
+                initial = chunks[0]
+                position = np.searchsorted(initial["scenario"], chunk["scenario"])
+                repeated = np.ones(len(position), dtype=bool)
+                for column, values in chunk.items():
+                    repeated &= values == initial[column][position]
+                chunk = {column: values[~repeated] for column, values in chunk.items()}
+            if chunk is not None:
+                chunks.append(chunk)
+        return chunks
+
+    def step(self, day, payment_day, heloc_day, dividend_day):
+        n = len(self.ids)
+        alive = self.alive
+        month = to_date(day).month
+        event = np.zeros(n, dtype=bool)
+        interest = np.zeros(n)
+        principle = np.zeros(n)
+        heloc_interest = np.zeros(n)
+        dividends = np.zeros(n)
+
+        if month < 3:
+            self.tax_return_available |= alive
+
+        if payment_day:
+            interest = np.where(alive, round_cents(self.pif * self.principle), 0.0)
+            principle = np.where(
+                alive, round_cents(self.payment_amount - interest), 0.0
+            )
+            self.principle = self.principle - principle
+            self.update_credit(alive)
+            self.new_credit = self.new_credit + principle
+            event |= alive
+
+        if heloc_day:
+            due = round_cents(self.heloc_rate * self.credit_balance)
+            capitalize = alive & (self.credit_available > self.capitalize_threshold)
+            pay = alive & ~capitalize
+            self.fail(
+                capitalize & (due > self.credit_available),
+                "Can not capitalize interest. Not enough credit available.",
+            )
+            self.fail(
+                pay & (due > self.credit_balance),
+                "Can't make a payment larger than the balance",
+            )
+            capitalize &= self.alive
+            pay &= self.alive
+            self.credit_balance = np.where(
+                capitalize,
+                self.credit_balance + due,
+                np.where(pay, self.credit_balance - due, self.credit_balance),
+            )
+            self.update_available(capitalize | pay)
+            self.cash = np.where(pay, self.cash - due, self.cash)
+            heloc_interest = np.where(self.alive, due, 0.0)
+            event |= self.alive
+
+        alive = self.alive
+        if dividend_day:
+            issued = round_cents(
+                self.investment_balance * self.dividend_yield / 100 / 12.0
+            )
+            self.dividend_balance = np.where(
+                alive, self.dividend_balance + issued, self.dividend_balance
+            )
+
+        withdraw = alive & (self.dividend_balance > 0)
+        if withdraw.any():
+            dividends = np.where(withdraw, self.dividend_balance, 0.0)
+            self.cash = np.where(withdraw, self.cash + dividends, self.cash)
+            self.dividend_balance = np.where(withdraw, 0.0, self.dividend_balance)
+            event |= withdraw
+
+        refund = alive & self.tax_return_available if month == 3 else None
+        if refund is not None and refund.any():
+            self.tax_refund(day, refund)
+            event |= refund
+
+        alive = self.alive
+        double_up = alive & (self.cash > 0)
+        if double_up.any():
+            amount = np.minimum(np.maximum(0, self.cash), self.payment_amount)
+            amount = np.where(double_up, amount, 0.0)
+            self.principle = self.principle - amount
+            self.update_credit(double_up)
+            self.new_credit = self.new_credit + amount
+            self.cash = self.cash - amount
+            event |= double_up
+
+        draw = alive & (self.credit_available > self.draw_threshold)
+        draw &= self.new_credit > 0
+        if draw.any():
+            top_up = draw & (self.credit_available > self.top_up_threshold)
+            self.new_credit = np.where(
+                top_up, self.new_credit + self.top_up, self.new_credit
+            )
+            self.fail(
+                draw & (self.new_credit > self.credit_available),
+                "Can't draw more than available credit",
+            )
+            draw &= self.alive
+            amount = np.where(draw, self.new_credit, 0.0)
+            self.credit_balance = self.credit_balance + amount
+            self.update_available(draw)
+            self.investment_balance = self.investment_balance + amount
+            self.new_credit = np.where(draw, 0.0, self.new_credit)
+            event |= draw
+
+        event &= self.alive
+        paid_off = event & (self.principle <= 5000)
+        self.alive &= ~paid_off
+        self.payoff_day[paid_off] = day
+        event &= ~paid_off
+        if not event.any():
+            return None
+
+        year = to_date(day).year
+        totals = self.tax_year(year)
+        totals[0] += np.where(event, heloc_interest, 0.0)
+        totals[1] += np.where(event, dividends, 0.0)
+        return self.row(event, day, interest, principle, heloc_interest, dividends)
+
+    def tax_year(self, year):
+        totals = self.tax_years.get(year)
+        if totals is None:
+            totals = self.tax_years[year] = np.zeros((2, len(self.ids)))
+        return totals
+
+    def tax_refund(self, day, refund):
+        year = to_date(day).year - 1
+        interest_paid, dividends_earned = self.tax_year(year)
+        tax_return = self.tax_rate * interest_paid
+        dividend_tax = dividends_earned * 1.38 * self.div_tax_rate
+        tax_return = round_cents(tax_return - dividend_tax)
+
+        lump_sum = refund & (tax_return > 0)
+        amount = tax_return + np.maximum(0, self.cash)
+        self.fail(
+            lump_sum & ((amount < 0) | (amount > self.equity_available * 0.1)),
+            "Amount needs to be > 0 and < 10% of equity",
+        )
+        lump_sum &= self.alive
+        refund &= self.alive
+        self.total_tax_refund = np.where(
+            refund, self.total_tax_refund + tax_return, self.total_tax_refund
+        )
+        self.principle = np.where(lump_sum, self.principle - amount, self.principle)
+        self.update_credit(lump_sum)
+        self.new_credit = np.where(lump_sum, self.new_credit + amount, self.new_credit)
+        self.cash = np.where(refund & ~lump_sum, self.cash - tax_return, self.cash)
+        self.tax_return_available &= ~refund
+        self.cash = np.where(refund, np.minimum(self.cash, 0), self.cash)
+
+    def row(self, recorded, day, interest, principle, heloc_interest, dividends):
+        return {
+            "scenario": self.ids[recorded],
+            "date": np.full(np.count_nonzero(recorded), day, dtype=np.int64),
+            "mort_interest_paid": interest[recorded],
+            "mort_principle_paid": principle[recorded],
+            "mort_principle": self.principle[recorded],
+            "interest_capitalized": heloc_interest[recorded],
+            "credit_limit": self.credit_limit[recorded],
+            "credit_available": self.credit_available[recorded],
+            "credit_balance": self.credit_balance[recorded],
+            "investment_balance": self.investment_balance[recorded],
+            "dividends": dividends[recorded],
+            "out_of_pocket": self.cash[recorded],
+            "event": np.ones(np.count_nonzero(recorded), dtype=bool),
+        }
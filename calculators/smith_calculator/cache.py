@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import tempfile
+from calculators.smith_calculator.checkpoint import load_checkpoint, save_checkpoint
+from calculators.smith_calculator.smith_calculator import ENGINE_VERSION
+
+# SmithCalculator state that simulate resets before it runs: the results of
+# an earlier run, not inputs
+RUN_RESULTS = (
+    "cash",
+    "new_credit",
+    "tax_return_available",
+    "ledger",
+    "payoff_day",
+    "peak_credit_balance",
+    "last_day",
+)
+
+
+def cache_key(smith, engine):
+    """
+    Hash of everything a simulation depends on: the state of the calculators
+    before simulating (see SmithCalculator.state) less RUN_RESULTS, the
+    engine and ENGINE_VERSION
+    """
+    state = smith.state()
+    for name in RUN_RESULTS:
+        del state[name]
+    inputs = {"version": ENGINE_VERSION, "engine": engine, "state": state}
+    text = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SimulationCache:
+    """
+    Simulation results (trackers and end states) on disk, keyed by
+    cache_key.
+
+    Each result is a checkpoint file (see checkpoint.py) written to a
+    temporary file and renamed into place, so several processes can share a
+    directory: readers never see partial files and a result evicted by
+    another process is a miss. Reading a result touches its file, and when
+    the files take more than max_bytes the least recently used ones are
+    removed.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self):
+        return (
+            f"SimulationCache({self.directory!r}, hits={self.hits}, "
+            f"misses={self.misses}, evictions={self.evictions})"
+        )
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def simulate(self, smith, engine="daily"):
+        """
+        smith.simulate(engine), from the cache when the same simulation was
+        run before. Either way `smith` is left in its end state, loaded into
+        its own mortgage, investment and ledger on a hit (see load_state).
+        """
+        key = cache_key(smith, engine)
+        path = self._path(key)
+        try:
+            end, tracker = load_checkpoint(path)
+        except FileNotFoundError:
+            tracker = None
+
+        if tracker is not None:
+            self.hits += 1
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            smith.load_state(end.state())
+            return tracker
+
+        self.misses += 1
+        tracker = smith.simulate(engine=engine)
+        self._store(path, smith, tracker)
+        return tracker
+
+    def _store(self, path, smith, tracker):
+        # A name of its own, so threads of one process don't collide either
+        fd, temporary = tempfile.mkstemp(
+            prefix=os.path.basename(path)[: -len(".npz")] + ".",
+            suffix=".tmp.npz",
+            dir=self.directory,
+        )
+        os.close(fd)
+        try:
+            save_checkpoint(temporary, smith, tracker)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".npz") or ".tmp." in entry.name:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @property
+    def size(self):
+        """
+        Bytes taken by the cached results
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Remove the least recently used results until they fit in max_bytes
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
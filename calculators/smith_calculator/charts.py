@@ -0,0 +1,26 @@
+import numpy as np
+
+BALANCE_COLUMNS = ["mort_principle", "credit_balance", "investment_balance"]
+
+
+def downsample(tracker, max_points=1000):
+    """
+    At most max_points rows of a tracker, evenly spaced and keeping the
+    first and last rows. A 30 year daily tracker has more rows than a chart
+    has pixels, and plotting them all is what makes the charts slow.
+    """
+    if len(tracker) <= max_points:
+        return tracker
+    positions = np.linspace(0, len(tracker) - 1, max_points).round()
+    return tracker.iloc[np.unique(positions.astype(np.int64))]
+
+
+def balances(tracker, max_points=1000):
+    """
+    The balances and net worth of a tracker by date, downsampled
+    """
+    df = downsample(tracker, max_points).set_index("date")[BALANCE_COLUMNS].copy()
+    df["net_worth"] = (
+        df["investment_balance"] - df["credit_balance"] - df["mort_principle"]
+    )
+    return df
@@ -0,0 +1,36 @@
+import json
+import numpy as np
+from calculators.smith_calculator.recorder import Recorder
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+
+def save_checkpoint(path, smith, tracker=None):
+    """
+    Save the state of a simulation (see SmithCalculator.state) and the
+    tracker so far to a compressed .npz file. The state is stored as JSON,
+    which keeps every float exactly, and the tracker one array per column.
+    """
+    arrays = {"state": np.array(json.dumps(smith.state()))}
+    if tracker is not None:
+        for column in Recorder.columns:
+            arrays[f"tracker/{column}"] = tracker[column].to_numpy()
+    np.savez_compressed(path, **arrays)
+
+
+def load_checkpoint(path):
+    """
+    Returns the SmithCalculator and the tracker (None when it was not
+    saved) of a checkpoint. Carry on the simulation with
+    SmithCalculator.resume.
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        smith = SmithCalculator.from_state(json.loads(str(arrays["state"])))
+        if "tracker/date" not in arrays:
+            return smith, None
+
+        import pandas as pd
+
+        tracker = pd.DataFrame(
+            {column: arrays[f"tracker/{column}"] for column in Recorder.columns}
+        )
+    return smith, tracker
@@ -0,0 +1,146 @@
+import argparse
+import json
+import logging
+import sys
+from calculators.business_days import HOLIDAY_TABLES
+from calculators.investment_calculator.investment_calculator import DividendCalendar
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.smith_calculator.export import ARROW_SUFFIXES, export
+from calculators.smith_calculator.scenario import (
+    DEFAULT_SCENARIO,
+    make_smith_calculator,
+)
+
+# Allowed values of the scenario flags taking a name
+CHOICES = {
+    "payment_frequency": list(MortgageCalculator.payment_periods),
+    "dividend_frequency": list(DividendCalendar.frequencies),
+    "holidays": ["", *HOLIDAY_TABLES],
+}
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def load_config(path):
+    """
+    Scenario parameters from a JSON or TOML (.toml) file
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_numbers(params):
+    """
+    Raise ValueError for a parameter whose default is a number (see
+    scenario.py) given something else, as a config file can
+    """
+    for name, value in params.items():
+        default = DEFAULT_SCENARIO.get(name, "")
+        if isinstance(default, str) or (value is None and default is None):
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="smith-calc",
+        description=(
+            "Simulate a Smith maneuvre scenario and print its summary. "
+            "Scenario parameters come from --config and the flags below, "
+            "flags winning. Pandas is only imported to write the tracker."
+        ),
+    )
+    parser.add_argument("--config", help="JSON or TOML file of scenario parameters")
+    parser.add_argument("--engine", choices=["daily", "event"], default="event")
+    parser.add_argument(
+        "--format", choices=["text", "json"], default="text", help="summary format"
+    )
+    parser.add_argument(
+        "--tracker",
+        metavar="FILE",
+        help=(
+            "write the tracker to FILE (.csv, .json, .parquet or .arrow, "
+            "- for CSV on stdout)"
+        ),
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="log tax refunds")
+
+    scenario = parser.add_argument_group("scenario parameters")
+    for name, default in DEFAULT_SCENARIO.items():
+        scenario.add_argument(
+            "--" + name.replace("_", "-"),
+            dest=name,
+            type=str if isinstance(default, str) else _number,
+            choices=CHOICES.get(name),
+            default=argparse.SUPPRESS,
+            help=f"default: {default}",
+        )
+    return parser
+
+
+def format_summary(summary, format="text"):
+    values = {
+        name: round(value, 2) if isinstance(value, float) else value
+        for name, value in summary.items()
+    }
+    if format == "json":
+        return json.dumps(values, default=str)
+    return "\n".join(f"{name}: {value}" for name, value in values.items())
+
+
+def write_tracker(tracker, path):
+    if path == "-":
+        tracker.to_csv(sys.stdout, index=False)
+    elif path.endswith(".json"):
+        tracker.to_json(path, orient="records", date_format="iso")
+    elif path.endswith((".parquet",) + ARROW_SUFFIXES):
+        export(tracker, path)
+    else:
+        tracker.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = vars(parser.parse_args(argv))
+    if args.pop("verbose"):
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    options = {name: args.pop(name) for name in ("config", "engine", "format")}
+    tracker_path = args.pop("tracker")
+
+    try:
+        params = load_config(options["config"]) if options["config"] else {}
+        params.update(args)
+        check_numbers(params)
+        smith = make_smith_calculator(**params)
+        if tracker_path:
+            tracker = smith.simulate(engine=options["engine"])
+        else:
+            smith.run(engine=options["engine"])
+    except (OSError, KeyError, ValueError, TypeError, ArithmeticError) as error:
+        parser.exit(2, f"smith-calc: error: {error}\n")
+
+    if tracker_path:
+        write_tracker(tracker, tracker_path)
+    if tracker_path != "-":
+        print(format_summary(smith.summary(), options["format"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
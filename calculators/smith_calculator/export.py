@@ -0,0 +1,232 @@
+import json
+import os
+import numpy as np
+
+# Day numbers (see calculators.days) of missing dates in .npy directories
+MISSING_DAY = np.iinfo(np.int32).min
+
+ARROW_SUFFIXES = (".arrow", ".feather", ".ipc")
+
+
+def _missing(value):
+    return value is None or value != value
+
+
+def to_columns(df):
+    """
+    The columns of a tracker or sweep DataFrame (its index included when it
+    is named) as compact arrays, and the kind of each column. Dates become
+    int32 day numbers (kind "date", missing dates are MISSING_DAY), text
+    becomes fixed width unicode (kind "text", None is stored as ""); money
+    stays float64 and `event` bool.
+    """
+    if df.index.name is not None:
+        df = df.reset_index()
+
+    columns, kinds = {}, {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype.kind == "M":
+            days = values.astype("datetime64[D]")
+            missing = np.isnat(days)
+            days = days.astype(np.int64)
+            days[missing] = MISSING_DAY
+            columns[name] = days.astype(np.int32)
+            kinds[name] = "date"
+        elif values.dtype.kind == "O":
+            columns[name] = np.array(
+                ["" if _missing(value) else str(value) for value in values], dtype=str
+            )
+            kinds[name] = "text"
+        else:
+            columns[name] = values
+            kinds[name] = values.dtype.kind
+    return columns, kinds
+
+
+def date_units(df):
+    """
+    Unit ("s", "ns", ...) of each date column of df, its named index
+    included, so from_columns can give the dates back their dtype
+    """
+    if df.index.name is not None:
+        df = df.reset_index()
+    return {
+        name: np.datetime_data(dtype)[0]
+        for name, dtype in df.dtypes.items()
+        if isinstance(dtype, np.dtype) and dtype.kind == "M"
+    }
+
+
+def from_columns(columns, kinds, index=None, units=None):
+    """
+    DataFrame of arrays written by to_columns. Dates are datetime64 in the
+    unit given by units (see date_units), nanoseconds by default.
+    """
+    import pandas as pd
+
+    units = units or {}
+    data = {}
+    for name, values in columns.items():
+        if kinds[name] == "date":
+            dates = values.astype(np.int64).astype("datetime64[D]")
+            dates[values == MISSING_DAY] = np.datetime64("NaT")
+            data[name] = dates.astype(f"datetime64[{units.get(name, 'ns')}]")
+        elif kinds[name] == "text":
+            data[name] = pd.Series(
+                [str(value) or None for value in values], dtype=object
+            )
+        else:
+            # A view, still backed by the memory map if there is one
+            data[name] = np.asarray(values)
+    df = pd.DataFrame(data, copy=False)
+    if index is not None:
+        df = df.set_index(index)
+    return df
+
+
+def write_npy(df, directory):
+    """
+    Write one <column>.npy file per column and a columns.json listing them
+    to `directory`, see read_npy
+    """
+    columns, kinds = to_columns(df)
+    os.makedirs(directory, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(directory, f"{name}.npy"), values)
+    with open(os.path.join(directory, "columns.json"), "w") as f:
+        meta = {"kinds": kinds, "index": df.index.name, "units": date_units(df)}
+        json.dump(meta, f)
+
+
+def _npy_meta(directory):
+    with open(os.path.join(directory, "columns.json")) as f:
+        return json.load(f)
+
+
+def load_npy(directory, mmap_mode="r"):
+    """
+    The arrays of a write_npy directory, memory mapped by default so
+    nothing is read until used, and their kinds and index name. read_npy
+    builds a DataFrame on them.
+    """
+    meta = _npy_meta(directory)
+    columns = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in meta["kinds"]
+    }
+    return columns, meta["kinds"], meta["index"]
+
+
+def read_npy(directory, mmap_mode="r"):
+    units = _npy_meta(directory).get("units")
+    return from_columns(*load_npy(directory, mmap_mode), units=units)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet and Arrow files need pyarrow; "
+            "write_npy writes a .npy directory without it"
+        ) from None
+    return pyarrow
+
+
+def to_table(df):
+    """
+    pyarrow Table of a tracker or sweep DataFrame, with dates as date32
+    and their pandas unit in the metadata
+    """
+    pa = _pyarrow()
+    columns, kinds = to_columns(df)
+    arrays = {}
+    for name, values in columns.items():
+        if kinds[name] == "date":
+            arrays[name] = pa.array(values, pa.date32(), mask=values == MISSING_DAY)
+        elif kinds[name] == "text":
+            arrays[name] = pa.array(values, pa.string(), mask=values == "")
+        else:
+            arrays[name] = pa.array(values)
+    metadata = {"index": df.index.name or "", "units": json.dumps(date_units(df))}
+    return pa.table(arrays, metadata=metadata)
+
+
+def from_table(table):
+    metadata = table.schema.metadata or {}
+    index = metadata.get(b"index", b"").decode() or None
+    units = json.loads(metadata.get(b"units", b"{}"))
+    import pandas as pd
+
+    pa = _pyarrow()
+    df = table.to_pandas(date_as_object=False)
+    for field in table.schema:
+        if pa.types.is_date(field.type):
+            unit = units.get(field.name, "ns")
+            df[field.name] = df[field.name].to_numpy().astype(f"datetime64[{unit}]")
+        elif pa.types.is_string(field.type):
+            df[field.name] = pd.Series(
+                table.column(field.name).to_pylist(), index=df.index, dtype=object
+            )
+    if index is not None:
+        df = df.set_index(index)
+    return df
+
+
+def write_parquet(df, path):
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_table(df), path)
+
+
+def read_parquet(path):
+    import pyarrow.parquet as pq
+
+    return from_table(pq.read_table(path))
+
+
+def write_arrow(df, path):
+    """
+    Write an Arrow IPC (Feather v2) file, see read_arrow
+    """
+    pa = _pyarrow()
+    table = to_table(df)
+    with pa.OSFile(os.fspath(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow(path):
+    """
+    Read an Arrow IPC file through a memory map
+    """
+    pa = _pyarrow()
+    with pa.memory_map(os.fspath(path)) as source:
+        return from_table(pa.ipc.open_file(source).read_all())
+
+
+def export(df, path):
+    """
+    Write a tracker or sweep DataFrame by the suffix of `path`: .parquet,
+    .arrow (.feather, .ipc) or else a directory of .npy files
+    """
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        write_parquet(df, path)
+    elif path.endswith(ARROW_SUFFIXES):
+        write_arrow(df, path)
+    else:
+        write_npy(df, path)
+
+
+def load(path):
+    """
+    Read a file or directory written by export
+    """
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        return read_parquet(path)
+    if path.endswith(ARROW_SUFFIXES):
+        return read_arrow(path)
+    return read_npy(path)
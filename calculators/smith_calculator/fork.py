@@ -0,0 +1,145 @@
+from calculators.days import to_day, to_timestamp
+from calculators.investment_calculator.portfolio import Portfolio
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+# Branch parameter -> the calculator of a SmithCalculator holding it
+PARAMETERS = {
+    "interest_rate": "mortgage",
+    "heloc_interest_rate": "mortgage",
+    "payment_amount": "mortgage",
+    "equity_available": "mortgage",
+    "dividend_yield": "investment",
+    "marginal_tax_rate": None,
+    "dividend_tax_rate": None,
+    "n_steps": None,
+    "draw_threshold": None,
+    "top_up_threshold": None,
+    "top_up": None,
+    "capitalize_threshold": None,
+}
+
+# Rate parameters -> the mortgage's schedule setting them when it has one
+RATE_SCHEDULES = {
+    "interest_rate": "rate_schedule",
+    "heloc_interest_rate": "heloc_rate_schedule",
+}
+
+
+class Branch:
+    """
+    A what-if branch of a Fork. `prefix` is the tracker up to the fork date,
+    shared by every branch, `suffix` the rows of this branch from the fork
+    date on and `smith` the SmithCalculator at the end of the branch.
+    """
+
+    def __init__(self, name, smith, prefix, suffix):
+        self.name = name
+        self.smith = smith
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def __repr__(self):
+        return f"Branch({self.name!r}, suffix={len(self.suffix)} rows)"
+
+    @property
+    def tracker(self):
+        """
+        The whole tracker, built on demand (the prefix is copied here)
+        """
+        import pandas as pd
+
+        return pd.concat([self.prefix, self.suffix], ignore_index=True)
+
+    def summary(self):
+        return self.smith.summary()
+
+
+class Fork:
+    """
+    Simulate `smith` up to `fork_date` once, then branch off what-if
+    scenarios from there:
+
+        fork = Fork(smith, "2026-01-01")
+        fork.branch("base")
+        fork.branch("rates up", heloc_interest_rate=6.0)
+        fork.branch(
+            "lump sum", lambda smith: smith.mortgage.make_lump_sum_payment(20000)
+        )
+        fork.summaries()
+
+    A branch starts from a copy of the state at the fork date (see
+    SmithCalculator.state), which is a few dozen numbers, and only simulates
+    from the fork date on, so N branches cost the prefix once plus N
+    suffixes. The prefix tracker is shared between the branches, not copied.
+    `smith` itself is left untouched.
+    """
+
+    def __init__(self, smith, fork_date, engine="event"):
+        self.engine = engine
+        self.fork_day = to_day(fork_date)
+
+        base = SmithCalculator.from_state(smith.state())
+        n_steps = base.n_steps
+        base.n_steps = min(max(self.fork_day - base._start_day, 0), n_steps)
+        self.prefix = base.simulate(engine=engine)
+        base.n_steps = n_steps
+        self.state = base.state()
+        self.branches = {}
+
+    @property
+    def fork_date(self):
+        return to_timestamp(self.fork_day)
+
+    def branch(self, name, *actions, **params):
+        """
+        Simulate a branch from the fork date. `params` set parameters of the
+        scenario from the fork date on (see PARAMETERS) and `actions` are
+        called with the branch's SmithCalculator at the fork date, before
+        its first step, for example to make a lump sum payment.
+
+        A new equity_available resets the credit limit. Rates set by a rate
+        schedule of the mortgage can't be overridden (the schedule would
+        put them back); branch with an action changing the schedule instead.
+        Likewise a Portfolio has a yield per holding, so dividend_yield can't
+        be set on one; an action can set its dividend_yields.
+        """
+        unknown = set(params) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown branch parameters: {sorted(unknown)}")
+
+        smith = SmithCalculator.from_state(self.state)
+        mortgage = smith.mortgage
+        for param, schedule in RATE_SCHEDULES.items():
+            if param in params and getattr(mortgage, schedule) is not None:
+                raise ValueError(f"{param} is set by the mortgage's {schedule}")
+        if isinstance(smith.investment, Portfolio):
+            held = sorted(
+                param for param in params if PARAMETERS[param] == "investment"
+            )
+            if held:
+                raise ValueError(f"{held} can't be set on a Portfolio")
+        for param, value in params.items():
+            calculator = PARAMETERS[param]
+            target = smith if calculator is None else getattr(smith, calculator)
+            setattr(target, param, value)
+        if "equity_available" in params:
+            mortgage.credit_limit = mortgage.calculate_heloc_credit_limit()
+            mortgage.credit_available = mortgage.calculate_credit_available()
+        for action in actions:
+            action(smith)
+
+        suffix = smith.resume(engine=self.engine)
+        branch = Branch(name, smith, self.prefix, suffix)
+        self.branches[name] = branch
+        return branch
+
+    def summaries(self):
+        """
+        Summary of each branch, indexed by branch name
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            [branch.summary() for branch in self.branches.values()],
+            index=pd.Index(list(self.branches), name="branch"),
+        )
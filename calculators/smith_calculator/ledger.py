@@ -0,0 +1,69 @@
+class TaxLedger:
+    """
+    Running totals per tax (calendar) year.
+
+    The simulation adds every recorded row as it happens, so the tax refund
+    for a finished year is a dictionary lookup instead of a scan of the
+    tracker. Refunds are booked against the tax year they are for, not the
+    year they are received in.
+    """
+
+    columns = ("mort_interest_paid", "interest_capitalized", "dividends", "tax_refund")
+
+    def __init__(self):
+        self.years = {}
+
+    def _totals(self, year):
+        totals = self.years.get(year)
+        if totals is None:
+            totals = self.years[year] = [0.0] * len(self.columns)
+        return totals
+
+    def record(self, row, year=None):
+        """
+        Add a tracker row to the totals of its year, or of `year` when given
+        """
+        if year is None:
+            year = row["date"].year
+        totals = self._totals(year)
+        totals[0] += row["mort_interest_paid"]
+        totals[1] += row["interest_capitalized"]
+        totals[2] += row["dividends"]
+        return self
+
+    def record_tax_refund(self, year, amount):
+        self._totals(year)[3] += amount
+        return self
+
+    def year(self, year):
+        totals = self.years.get(year, [0.0] * len(self.columns))
+        return dict(zip(self.columns, totals))
+
+    def total(self, column):
+        i = self.columns.index(column)
+        return sum(totals[i] for year, totals in sorted(self.years.items()))
+
+    def state(self):
+        return {str(year): list(totals) for year, totals in self.years.items()}
+
+    @classmethod
+    def from_state(cls, state):
+        ledger = cls()
+        ledger.years = {int(year): list(totals) for year, totals in state.items()}
+        return ledger
+
+    def load_state(self, state):
+        self.years = self.from_state(state).years
+        return self
+
+    def to_frame(self):
+        import pandas as pd
+
+        years = sorted(self.years)
+        df = pd.DataFrame(
+            [self.years[year] for year in years],
+            index=pd.Index(years, name="year"),
+            columns=list(self.columns),
+            dtype="float64",
+        )
+        return df
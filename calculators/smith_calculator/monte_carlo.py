@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+from calculators.mortgage_calculator.mortgage_calculator import (
+    periodic_interest_factor,
+)
+from calculators.smith_calculator.batch import BatchState, SmithBatch
+from calculators.smith_calculator.sweep import SUMMARY_COLUMNS
+
+
+class Constant:
+    """
+    The same value on every path, every month
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def paths(self, rng, n_paths, n_months):
+        return np.full((n_paths, n_months), float(self.value))
+
+
+class MeanReverting:
+    """
+    Monthly mean reverting process (discrete Ornstein-Uhlenbeck):
+
+        x[t + 1] = x[t] + speed * (mean - x[t]) + volatility * N(0, 1)
+
+    With probability shock_probability a month also gets a shock of
+    shock_size (for example -2.0 for a dividend cut), which then reverts to
+    the mean like any other move. Values are kept at or above floor.
+    Values are in percent, like the calculators' rates and yields.
+    """
+
+    def __init__(
+        self,
+        start,
+        mean,
+        speed,
+        volatility,
+        shock_probability=0.0,
+        shock_size=0.0,
+        floor=0.0,
+    ):
+        self.start = start
+        self.mean = mean
+        self.speed = speed
+        self.volatility = volatility
+        self.shock_probability = shock_probability
+        self.shock_size = shock_size
+        self.floor = floor
+
+    def paths(self, rng, n_paths, n_months):
+        moves = self.volatility * rng.standard_normal((n_paths, n_months))
+        if self.shock_probability:
+            shocks = rng.random((n_paths, n_months)) < self.shock_probability
+            moves += np.where(shocks, self.shock_size, 0.0)
+
+        values = np.empty((n_paths, n_months))
+        x = np.full(n_paths, float(self.start))
+        for month in range(n_months):
+            values[:, month] = x
+            x = np.maximum(
+                x + self.speed * (self.mean - x) + moves[:, month], self.floor
+            )
+        return values
+
+
+class MonteCarlo:
+    """
+    Simulate a SmithCalculator scenario along random paths of the mortgage
+    rate, HELOC rate and dividend yield.
+
+    Each of interest_rate, heloc_interest_rate and dividend_yield is a
+    model with a paths(rng, n_paths, n_months) method (Constant,
+    MeanReverting) giving the value for each month of the simulation; by
+    default the scenario's own value is kept. The paths are simulated in
+    lockstep with the rules of SmithBatch, chunk_size paths at a time, and
+    only a summary is kept per path. The payment amount stays as set on the
+    mortgage when the rate moves.
+
+    Each model draws from its own stream of seed, so the same seed and
+    chunk_size give the same paths.
+    """
+
+    def __init__(
+        self,
+        smith,
+        interest_rate=None,
+        heloc_interest_rate=None,
+        dividend_yield=None,
+        n_paths=1000,
+        seed=None,
+        chunk_size=1000,
+    ):
+        self.smith = smith
+        self.interest_rate = interest_rate or Constant(smith.mortgage.interest_rate)
+        self.heloc_interest_rate = heloc_interest_rate or Constant(
+            smith.mortgage.heloc_interest_rate
+        )
+        self.dividend_yield = dividend_yield or Constant(
+            smith.investment.dividend_yield
+        )
+        self.n_paths = n_paths
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def n_months(self):
+        start = np.datetime64(self.smith.start_date.date(), "M")
+        end = np.datetime64(
+            (self.smith.start_date + pd.Timedelta(days=self.smith.n_steps)).date(), "M"
+        )
+        return int((end - start).astype(np.int64)) + 1
+
+    def run(self):
+        """
+        One row per path: the columns of SmithCalculator.summary and an
+        "error" column for paths that failed.
+        """
+        rngs = [
+            np.random.default_rng(seed)
+            for seed in np.random.SeedSequence(self.seed).spawn(3)
+        ]
+        models = [self.interest_rate, self.heloc_interest_rate, self.dividend_yield]
+        n_months = self.n_months()
+
+        chunks = []
+        errors = [None] * self.n_paths
+        for offset in range(0, self.n_paths, self.chunk_size):
+            n = min(self.chunk_size, self.n_paths - offset)
+            rates = [model.paths(rng, n, n_months) for model, rng in zip(models, rngs)]
+            batch = SmithBatch([self.smith] * n)
+            state = _PathState(batch, list(range(n)), *rates)
+            state.run()
+            chunks.append(state.summary())
+            for i, error in batch.errors.items():
+                errors[offset + i] = error
+
+        summaries = pd.DataFrame(
+            {
+                column: np.concatenate([chunk[column] for chunk in chunks])
+                for column in SUMMARY_COLUMNS
+            }
+        )
+        summaries["error"] = pd.Series(errors, dtype=object)
+        summaries.index.name = "path"
+        return summaries
+
+    @staticmethod
+    def distribution(summaries, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """
+        Quantiles of the payoff date and net worth over the paths that did
+        not fail. Paths that do not pay off within the horizon count as
+        paying off last, so a quantile reaching them is NaT.
+        """
+        summaries = summaries[summaries["error"].isna()]
+        payoff = summaries["payoff_date"].to_numpy(dtype="datetime64[D]")
+        days = np.where(
+            np.isnat(payoff), np.inf, payoff.astype(np.int64).astype(np.float64)
+        )
+        net_worth = summaries["net_worth"].to_numpy(dtype=np.float64)
+        if not len(days):
+            days = net_worth = np.full(1, np.nan)
+
+        payoff_days = np.quantile(days, quantiles, method="higher")
+        payoff_dates = np.full(len(quantiles), np.datetime64("NaT"), "datetime64[D]")
+        known = np.isfinite(payoff_days)
+        payoff_dates[known] = payoff_days[known].astype(np.int64)
+        return pd.DataFrame(
+            {
+                "payoff_date": payoff_dates.astype("datetime64[ns]"),
+                "net_worth": np.quantile(net_worth, quantiles),
+            },
+            index=pd.Index(quantiles, name="quantile"),
+        )
+
+
+class _PathState(BatchState):
+    """
+    Batch state whose rates and yield change each month, keeping a running
+    summary instead of the tracker rows
+    """
+
+    def __init__(self, batch, ids, interest_rates, heloc_rates, dividend_yields):
+        super().__init__(batch, ids)
+        frequency = self.smith.mortgage.payment_frequency
+        self.pifs = periodic_interest_factor(interest_rates, frequency)
+        self.heloc_rates = heloc_rates / 100 / 12.0
+        self.dividend_yields = dividend_yields
+        self.start_month = np.datetime64(self.smith.start_date.date(), "M")
+        self.month = None
+        self.set_month(0)
+        self.peak_credit_balance = self.credit_balance.copy()
+
+    def set_month(self, month):
+        if month != self.month:
+            self.month = month
+            self.pif = self.pifs[:, month]
+            self.heloc_rate = self.heloc_rates[:, month]
+            self.dividend_yield = self.dividend_yields[:, month]
+
+    def step(self, day, payment_day, heloc_day, dividend_day):
+        month = np.datetime64(day, "D").astype("datetime64[M]") - self.start_month
+        self.set_month(int(month.astype(np.int64)))
+        return super().step(day, payment_day, heloc_day, dividend_day)
+
+    def row(self, recorded, day, interest, principle, heloc_interest, dividends):
+        self.peak_credit_balance = np.where(
+            recorded,
+            np.maximum(self.peak_credit_balance, self.credit_balance),
+            self.peak_credit_balance,
+        )
+        return None
+
+    def summary(self):
+        failed = np.zeros(len(self.ids), dtype=bool)
+        failed[list(self.batch.errors)] = True
+
+        def final(values):
+            return np.where(failed, np.nan, values)
+
+        payoff = self.payoff_day.astype("datetime64[D]")
+        payoff[(self.payoff_day < 0) | failed] = np.datetime64("NaT")
+        return {
+            "payoff_date": payoff.astype("datetime64[ns]"),
+            "final_principle": final(self.principle),
+            "final_credit_balance": final(self.credit_balance),
+            "final_investment_balance": final(self.investment_balance),
+            "net_worth": final(
+                self.investment_balance - self.credit_balance - self.principle
+            ),
+            "total_tax_refund": final(self.total_tax_refund),
+            "peak_credit_balance": final(
+                np.maximum(self.peak_credit_balance, self.credit_balance)
+            ),
+        }
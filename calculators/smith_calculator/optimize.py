@@ -0,0 +1,219 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from calculators.days import to_day
+from calculators.smith_calculator.scenario import (
+    DEFAULT_SCENARIO,
+    make_smith_calculator,
+    scenario_params,
+)
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+
+def net_worth(smith):
+    return smith.summary()["net_worth"]
+
+
+def payoff(smith):
+    """
+    Minus the days from the start date to payoff, so earlier scores higher.
+    Runs not paid off yet count the days so far plus the days the principle
+    left would take at the payment amount, ignoring interest: they score
+    lower than any run that paid off, less principle left scoring higher.
+    """
+    start = to_day(smith.start_date)
+    if smith.payoff_day is not None:
+        return -(smith.payoff_day - start)
+    mortgage = smith.mortgage
+    payments = mortgage.principle / mortgage.payment_amount
+    per_year = mortgage.payment_periods[mortgage.payment_frequency]["denom"]
+    return -(smith.last_day + 1 - start + payments * 365.25 / per_year)
+
+
+OBJECTIVES = {"net_worth": net_worth, "payoff": payoff}
+
+
+def _simulate_stage(params, state, n_steps, engine):
+    """
+    Simulate a candidate up to n_steps, from scratch or from the state of
+    its previous stage. Returns its state, or the error as "Type: message"
+    (see sweep.simulate_scenario) so one bad candidate doesn't stop a run.
+    """
+    try:
+        if state is None:
+            smith = make_smith_calculator(**{**params, "n_steps": n_steps})
+            smith.run(engine=engine)
+        else:
+            smith = SmithCalculator.from_state(state)
+            smith.n_steps = n_steps
+            smith.resume(engine=engine)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}"
+    return smith.state()
+
+
+def _simulate_chunk(chunk, engine):
+    return [_simulate_stage(*item, engine) for item in chunk]
+
+
+class Optimizer:
+    """
+    Search scenario parameters (see scenario.py) for the best value of an
+    objective by grid refinement: simulate a grid of `points` values per
+    parameter within `bounds`, then shrink the bounds by `shrink` around
+    the best candidate and repeat, `rounds` times.
+
+    The objective is "net_worth", "payoff" or a function of the finished
+    SmithCalculator returning a score to maximize.
+
+    Candidates are simulated across `workers` processes in `stages`
+    (fractions of the horizon), resuming where their previous stage ended.
+    After each stage but the last, candidates scoring more than `tolerance`
+    (relative to the best score) behind the best stop: they are clearly
+    dominated, while close ones carry on in case they catch up later.
+    tolerance=0 keeps only those tied with the best; stages=(1.0,)
+    simulates every candidate to the horizon.
+    """
+
+    def __init__(
+        self,
+        objective,
+        bounds,
+        points=5,
+        rounds=4,
+        shrink=0.5,
+        stages=(0.25, 0.5, 1.0),
+        tolerance=0.01,
+        workers=None,
+        engine="event",
+        **base,
+    ):
+        unknown = set(bounds) - set(DEFAULT_SCENARIO)
+        if unknown:
+            raise ValueError(f"Unknown scenario parameters: {sorted(unknown)}")
+        self.objective = OBJECTIVES.get(objective, objective)
+        self.bounds = {name: tuple(bound) for name, bound in bounds.items()}
+        self.base = scenario_params(**base)
+        self.points = points
+        self.rounds = rounds
+        self.shrink = shrink
+        self.stages = stages
+        self.tolerance = tolerance
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.history = []
+        self.simulations = 0
+
+    def grid(self, bounds):
+        """
+        Candidate parameters: every combination of `points` values per
+        parameter, integers staying integers
+        """
+        axes = []
+        for name, (low, high) in bounds.items():
+            values = np.linspace(low, high, self.points)
+            if isinstance(self.bounds[name][0], int):
+                values = np.unique(values.round().astype(np.int64))
+            axes.append(values.tolist())
+        return [dict(zip(bounds, values)) for values in itertools.product(*axes)]
+
+    def evaluate(self, candidates, pool=None):
+        """
+        Scores of candidates (-inf for candidates that raised or were
+        dropped before the last stage), simulating them in stages
+        """
+        n_steps = self.base["n_steps"]
+        scores = [-math.inf] * len(candidates)
+        states = [None] * len(candidates)
+        alive = list(range(len(candidates)))
+        for stage, fraction in enumerate(self.stages):
+            horizon = max(1, round(n_steps * fraction))
+            items = [
+                ({**self.base, **candidates[i]}, states[i], horizon) for i in alive
+            ]
+            self.simulations += len(items)
+            for i, state in zip(alive, self._map(items, pool)):
+                if isinstance(state, str):
+                    scores[i] = -math.inf
+                    states[i] = None
+                else:
+                    states[i] = state
+                    scores[i] = self.objective(SmithCalculator.from_state(state))
+
+            alive = [i for i in alive if states[i] is not None]
+            if alive and stage < len(self.stages) - 1:
+                # Candidates clearly behind the best stop here
+                best = max(scores[i] for i in alive)
+                threshold = best - self.tolerance * abs(best)
+                for i in alive:
+                    if scores[i] < threshold:
+                        scores[i] = -math.inf
+                alive = [i for i in alive if scores[i] >= threshold]
+        return scores
+
+    def _map(self, items, pool):
+        if pool is None:
+            return [_simulate_stage(*item, self.engine) for item in items]
+        chunksize = max(1, math.ceil(len(items) / (self.workers * 4)))
+        chunks = [items[i : i + chunksize] for i in range(0, len(items), chunksize)]
+        results = pool.map(_simulate_chunk, chunks, [self.engine] * len(chunks))
+        return [state for chunk in results for state in chunk]
+
+    def run(self):
+        """
+        Returns the best parameters and their score; every evaluated
+        candidate is kept in self.history as (round, parameters, score)
+        """
+        if self.workers == 1:
+            return self._run(None)
+        with ProcessPoolExecutor(self.workers) as pool:
+            return self._run(pool)
+
+    def _run(self, pool):
+        bounds = dict(self.bounds)
+        scored = {}
+        best, best_score = None, -math.inf
+        for round_ in range(self.rounds):
+            candidates = [
+                candidate
+                for candidate in self.grid(bounds)
+                if tuple(candidate.values()) not in scored
+            ]
+            for candidate, score in zip(candidates, self.evaluate(candidates, pool)):
+                scored[tuple(candidate.values())] = score
+                self.history.append((round_, candidate, score))
+                if score > best_score:
+                    best, best_score = candidate, score
+            if best is None:
+                raise ValueError("Every candidate raised")
+            bounds = self._refine(bounds, best)
+        return best, best_score
+
+    def _refine(self, bounds, best):
+        refined = {}
+        for name, (low, high) in bounds.items():
+            half_width = (high - low) * self.shrink / 2
+            low_limit, high_limit = self.bounds[name]
+            low = max(low_limit, best[name] - half_width)
+            high = min(high_limit, best[name] + half_width)
+            refined[name] = (low, high)
+        return refined
+
+    def history_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(
+            [
+                {"round": round_, **candidate, "score": score}
+                for round_, candidate, score in self.history
+            ]
+        )
+
+
+def optimize(objective, bounds, **options):
+    """
+    Best parameters and score, see Optimizer
+    """
+    return Optimizer(objective, bounds, **options).run()
@@ -0,0 +1,272 @@
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import pandas as pd
+from calculators.smith_calculator.cli import _number, check_numbers, load_config
+from calculators.smith_calculator.export import _pyarrow, to_table
+from calculators.smith_calculator.scenario import DEFAULT_SCENARIO, scenario_params
+from calculators.smith_calculator.sweep import SUMMARY_COLUMNS, simulate_scenario
+
+# Input chunks handed to the workers at any time. With the chunk being read,
+# this bounds the rows held in memory.
+MAX_PENDING = 2
+
+
+def read_chunks(path, chunksize):
+    """
+    DataFrames of up to chunksize rows of a CSV or Parquet (.parquet) file,
+    read lazily
+    """
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        _pyarrow()
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def row_params(record):
+    """
+    Scenario parameters of an input row: its scenario columns (see
+    scenario.py) that are not empty, numbers converted cell by cell (a
+    column with one bad cell is read as text). Other columns are ignored.
+    Raises ValueError for a cell that is not a number where one is needed.
+    """
+    params = {}
+    for name, value in record.items():
+        if name not in DEFAULT_SCENARIO or pd.isna(value):
+            continue
+        if hasattr(value, "item"):
+            value = value.item()
+        default = DEFAULT_SCENARIO[name]
+        if not isinstance(default, str) and isinstance(value, str):
+            try:
+                value = _number(value.strip())
+            except ValueError:
+                raise ValueError(f"{name} is not a number: {value!r}") from None
+        if isinstance(default, int) and isinstance(value, float):
+            # Integer columns with empty cells are read as floats
+            if value.is_integer():
+                value = int(value)
+        params[name] = value
+    return params
+
+
+def simulate_rows(records, base, engine="event"):
+    """
+    Summaries of input rows (dicts of cells) on top of the base parameters.
+    A row with a bad cell gets a summary holding only the error, as a
+    scenario that raises does (see simulate_scenario), so no row can stop
+    the job.
+    """
+    summaries = []
+    for record in records:
+        try:
+            params = {**base, **row_params(record)}
+        except Exception as error:
+            summaries.append({"error": f"{type(error).__name__}: {error}"})
+            continue
+        summary, _ = simulate_scenario(params, engine)
+        summaries.append(summary)
+    return summaries
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow.parquet as pq
+
+        table = to_table(df)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _writer(path):
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        _pyarrow()
+        return _ParquetWriter(path)
+    return _CsvWriter(path)
+
+
+def run_pipeline(
+    input_path,
+    output_path,
+    chunksize=10000,
+    workers=None,
+    engine="event",
+    id_column=None,
+    progress=None,
+    **base,
+):
+    """
+    Simulate every row of a CSV or Parquet file of scenarios (one column per
+    scenario parameter, empty cells and missing columns taking the base
+    parameters) and write one summary row per input row to a CSV or
+    Parquet file.
+
+    The input is read chunksize rows at a time and each chunk is spread
+    over `workers` processes. At most MAX_PENDING chunks are in flight, so
+    memory stays bounded however large the file is. Summaries are written
+    as their chunk finishes, in input order, indexed by "row" (position in
+    the input) with the id_column of the input if given. A row that fails
+    gets an "error" message instead of a summary and the job carries on.
+
+    progress(rows, failed, seconds) is called after each chunk is written.
+    Returns the totals: rows, failed rows, seconds and rows per second.
+    """
+    base = scenario_params(**base)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    writer = _writer(output_path)
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    pending = deque()
+    start = time.perf_counter()
+    totals = {"rows": 0, "failed": 0}
+
+    def submit(chunk, offset):
+        index = pd.RangeIndex(offset, offset + len(chunk), name="row")
+        ids = None if id_column is None else chunk[id_column].to_numpy()
+        scenario = [name for name in chunk.columns if name in DEFAULT_SCENARIO]
+        records = chunk[scenario].to_dict("records")
+        if pool is None:
+            results = [simulate_rows(records, base, engine)]
+        else:
+            size = max(1, math.ceil(len(records) / (workers * 4)))
+            pieces = [records[i : i + size] for i in range(0, len(records), size)]
+            results = pool.map(simulate_rows, pieces, repeat(base), repeat(engine))
+        pending.append((index, ids, results))
+
+    def write():
+        index, ids, results = pending.popleft()
+        summaries = [summary for result in results for summary in result]
+        df = pd.DataFrame(index=index)
+        if ids is not None:
+            df[id_column] = ids
+        for column in SUMMARY_COLUMNS:
+            values = [summary.get(column) for summary in summaries]
+            if column == "payoff_date":
+                values = pd.to_datetime(pd.Series(values, index=index, dtype=object))
+            else:
+                # Failed rows get nan
+                values = np.array(values, dtype=np.float64)
+            df[column] = values
+        df["error"] = pd.Series(
+            [summary["error"] for summary in summaries], index=index, dtype=object
+        )
+        writer.write(df)
+
+        totals["rows"] += len(df)
+        totals["failed"] += int(df["error"].notna().sum())
+        if progress is not None:
+            progress(totals["rows"], totals["failed"], time.perf_counter() - start)
+
+    try:
+        offset = 0
+        for chunk in read_chunks(input_path, chunksize):
+            if id_column is not None and id_column not in chunk:
+                raise ValueError(f"No {id_column} column in {input_path}")
+            submit(chunk, offset)
+            offset += len(chunk)
+            while len(pending) >= MAX_PENDING:
+                write()
+        while pending:
+            write()
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    totals["seconds"] = seconds
+    totals["rows_per_second"] = totals["rows"] / seconds if seconds else 0.0
+    return totals
+
+
+def report(rows, failed, seconds):
+    rate = rows / seconds if seconds else 0.0
+    print(
+        f"{rows} rows, {failed} failed, {seconds:.1f}s, {rate:.0f} rows/s",
+        file=sys.stderr,
+    )
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(
+        prog="smith-batch",
+        description=(
+            "Simulate every row of a CSV or Parquet file of scenarios and "
+            "write a summary row for each"
+        ),
+    )
+    parser.add_argument("input", help="CSV or .parquet file, one scenario per row")
+    parser.add_argument("output", help="CSV or .parquet file of summaries")
+    parser.add_argument("--config", help="JSON or TOML file of base parameters")
+    parser.add_argument("--id-column", help="input column copied to the output")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    parser.add_argument("--workers", type=int, help="default: one per CPU")
+    parser.add_argument("--engine", choices=["daily", "event"], default="event")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress")
+    return parser
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    try:
+        base = load_config(args.config) if args.config else {}
+        check_numbers(base)
+        totals = run_pipeline(
+            args.input,
+            args.output,
+            chunksize=args.chunksize,
+            workers=args.workers,
+            engine=args.engine,
+            id_column=args.id_column,
+            progress=None if args.quiet else report,
+            **base,
+        )
+    except (OSError, KeyError, ValueError, ImportError) as error:
+        parser.exit(2, f"smith-batch: error: {error}\n")
+
+    if not args.quiet:
+        print(
+            f"done: {totals['rows']} rows, {totals['failed']} failed, "
+            f"{totals['rows_per_second']:.0f} rows/s",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
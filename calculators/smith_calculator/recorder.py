@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class Recorder:
+    """
+    Columnar recorder for the simulation tracker.
+
+    Every column is a NumPy array that doubles in size when it fills up,
+    so appending a row is amortized O(1). The DataFrame is only built once,
+    in to_frame.
+    """
+
+    columns = {
+        "date": "datetime64[ns]",
+        "mort_interest_paid": "float64",
+        "mort_principle_paid": "float64",
+        "mort_principle": "float64",
+        "interest_capitalized": "float64",
+        "credit_limit": "float64",
+        "credit_available": "float64",
+        "credit_balance": "float64",
+        "investment_balance": "float64",
+        "dividends": "float64",
+        "out_of_pocket": "float64",
+        "event": "bool",
+    }
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.data = {
+            column: np.empty(capacity, dtype=dtype)
+            for column, dtype in self.columns.items()
+        }
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Recorder holding the rows of a tracker DataFrame
+        """
+        recorder = cls(capacity=max(len(df), 1))
+        for column, dtype in cls.columns.items():
+            recorder.data[column][: len(df)] = df[column].to_numpy(dtype=dtype)
+        recorder.size = len(df)
+        return recorder
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self.data["date"])
+
+    @property
+    def nbytes(self):
+        """
+        Bytes allocated for the columns
+        """
+        return sum(values.nbytes for values in self.data.values())
+
+    def append(self, row):
+        if self.size == self.capacity:
+            self._grow()
+
+        i = self.size
+        for column, values in self.data.items():
+            values[i] = row[column]
+        self.size += 1
+        return self
+
+    def _grow(self):
+        capacity = max(2 * self.capacity, 1)
+        for column, values in self.data.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[: self.size] = values[: self.size]
+            self.data[column] = grown
+
+    def column(self, name):
+        """
+        View of the recorded values of a column
+        """
+        return self.data[name][: self.size]
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(
+            {column: self.column(column).copy() for column in self.columns}
+        )
@@ -0,0 +1,99 @@
+import itertools
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.investment_calculator.investment_calculator import InvestmentCalculator
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+# Flat description of a scenario. initial_draw is drawn from the HELOC and
+# invested before the simulation starts.
+DEFAULT_SCENARIO = {
+    "principle": 486888.03,
+    "equity_available": 795000,
+    "amortization_months": 329,
+    "interest_rate": 2.74,
+    "heloc_interest_rate": 2.95,
+    "payment_frequency": "bi-weekly",
+    "last_payment_date": "2021-08-10",
+    "payment_amount": None,
+    "investment_balance": 0.0,
+    "dividend_yield": 4.45,
+    "dividend_frequency": "monthly",
+    "dividend_issue_date": "2021-08-15",
+    "initial_draw": 140000,
+    "start_date": "2021-08-17",
+    "n_steps": 365 * 25,
+    "marginal_tax_rate": 40.5,
+    "dividend_tax_rate": 40.5 - 15.0198 - 11,  # Marginal, federal, provincial
+    # Holiday table (see calculators.business_days) whose business days
+    # payment and dividend dates roll to. "" keeps payments on schedule and
+    # only rolls dividends past weekends.
+    "holidays": "",
+    # Strategy, see SmithCalculator
+    "draw_threshold": 2000,
+    "top_up_threshold": 10000,
+    "top_up": 1000,
+    "capitalize_threshold": 2000000,
+}
+
+
+def scenario_params(**params):
+    """
+    Complete scenario parameters, filling in the defaults
+    """
+    unknown = set(params) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {sorted(unknown)}")
+    return {**DEFAULT_SCENARIO, **params}
+
+
+def make_smith_calculator(**params):
+    """
+    Build the mortgage, investment and SmithCalculator for a scenario
+    """
+    params = scenario_params(**params)
+
+    mortgage = MortgageCalculator(
+        principle=params["principle"],
+        equity_available=params["equity_available"],
+        amortization_months=params["amortization_months"],
+        interest_rate=params["interest_rate"],
+        heloc_interest_rate=params["heloc_interest_rate"],
+        payment_freqency=params["payment_frequency"],
+        last_payment_date=params["last_payment_date"],
+        payment_amount=params["payment_amount"],
+        business_calendar=params["holidays"] or None,
+    )
+    investment = InvestmentCalculator(
+        balance=params["investment_balance"],
+        dividend_yield=params["dividend_yield"],
+        frequency=params["dividend_frequency"],
+        dividend_issue_date=params["dividend_issue_date"],
+        business_calendar=params["holidays"] or "weekends",
+    )
+    if params["initial_draw"]:
+        mortgage.draw_from_heloc(params["initial_draw"])
+        investment.buy(params["initial_draw"])
+
+    return SmithCalculator(
+        mortgage=mortgage,
+        investment=investment,
+        start_date=params["start_date"],
+        n_steps=params["n_steps"],
+        marginal_tax_rate=params["marginal_tax_rate"],
+        dividend_tax_rate=params["dividend_tax_rate"],
+        draw_threshold=params["draw_threshold"],
+        top_up_threshold=params["top_up_threshold"],
+        top_up=params["top_up"],
+        capitalize_threshold=params["capitalize_threshold"],
+    )
+
+
+def expand_grid(param_grid, **base):
+    """
+    Every combination of the values in param_grid (parameter -> list of
+    values), on top of the base parameters. Returns a list of parameters.
+    """
+    names = list(param_grid)
+    return [
+        scenario_params(**{**base, **dict(zip(names, values))})
+        for values in itertools.product(*(param_grid[name] for name in names))
+    ]
@@ -1,10 +1,63 @@
-from numpy import divide
-import pandas as pd
+import heapq
+import logging
+from time import perf_counter
+import numpy as np
+from calculators.days import to_date, to_day, to_timestamp
 from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
 from calculators.investment_calculator.investment_calculator import InvestmentCalculator
+from calculators.investment_calculator.portfolio import Portfolio
+from calculators.smith_calculator.recorder import Recorder
+from calculators.smith_calculator.ledger import TaxLedger
+from calculators.smith_calculator.stats import SimulationStats
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change to the simulation changes its results, so results cached
+# by earlier versions are not used (see cache.py)
+ENGINE_VERSION = 1
+
+
+def merge_event_days(schedules, end, carry):
+    """
+    Merge sorted schedules of day numbers with a heap, up to and including
+    `end`, dropping repeated days. While carry() is true after a day has
+    been produced, the following day is produced as well.
+    """
+    last = None
+    for day in heapq.merge(*schedules, [end + 1]):
+        while last is not None and last + 1 < day and carry():
+            last += 1
+            yield last
+        if day > end:
+            break
+        if last is not None and day <= last:
+            continue
+        last = day
+        yield day
 
 
 class SmithCalculator:
+    __slots__ = (
+        "mortgage",
+        "investment",
+        "_start_day",
+        "n_steps",
+        "marginal_tax_rate",
+        "dividend_tax_rate",
+        "draw_threshold",
+        "top_up_threshold",
+        "top_up",
+        "capitalize_threshold",
+        "cash",
+        "new_credit",
+        "tax_return_available",
+        "ledger",
+        "payoff_day",
+        "peak_credit_balance",
+        "last_day",
+        "stats",
+    )
+
     def __init__(
         self,
         mortgage,
@@ -13,165 +66,480 @@ class SmithCalculator:
         n_steps,
         marginal_tax_rate,
         dividend_tax_rate,
+        draw_threshold=2000,
+        top_up_threshold=10000,
+        top_up=1000,
+        capitalize_threshold=2000000,
     ):
         self.mortgage = mortgage
         self.investment = investment
-        self.start_date = pd.to_datetime(start_date)
+        self.start_date = start_date
         self.n_steps = n_steps
         self.marginal_tax_rate = marginal_tax_rate
         self.dividend_tax_rate = dividend_tax_rate
+        # Strategy: new credit is drawn and invested while more than
+        # draw_threshold is available, plus top_up while more than
+        # top_up_threshold is; HELOC interest is capitalized while more than
+        # capitalize_threshold is available, else paid
+        self.draw_threshold = draw_threshold
+        self.top_up_threshold = top_up_threshold
+        self.top_up = top_up
+        self.capitalize_threshold = capitalize_threshold
+        self.cash = 0
+        self.new_credit = 0
+        self.tax_return_available = False
+        self.ledger = TaxLedger()
+        self.payoff_day = None
+        self.peak_credit_balance = None
+        self.last_day = None
+        self.stats = None
 
     # Refunds come out in March
     tax_refund_month = 3
 
-    def simulate(self):
-        date_range = pd.date_range(
-            start=self.start_date, periods=self.n_steps, freq="D"
-        )
+    @property
+    def start_date(self):
+        return to_timestamp(self._start_day)
 
-        tracker = pd.DataFrame(
-            {
-                "date": [self.start_date],
-                "mort_interest_paid": 0,
-                "mort_principle_paid": 0,
-                "mort_principle": self.mortgage.principle,
-                "interest_capitalized": 0,
-                "credit_limit": self.mortgage.credit_limit,
-                "credit_available": self.mortgage.credit_available,
-                "credit_balance": self.mortgage.credit_balance,
-                "investment_balance": self.investment.balance,
-                "dividends": 0,
-                "out_of_pocket": 0,
-                "event": True,
-            }
-        )
+    @start_date.setter
+    def start_date(self, start_date):
+        self._start_day = to_day(start_date)
+
+    @property
+    def payoff_date(self):
+        """
+        Date on which the last simulation paid the mortgage down, or None
+        """
+        if self.payoff_day is None:
+            return None
+        return to_timestamp(self.payoff_day)
+
+    def simulate(self, engine="daily", profile=False):
+        """
+        Run the strategy from the start date for n_steps days.
+
+        engine="daily" steps through every day, engine="event" only steps
+        through the days on which something can happen (see event_dates).
+        Both produce the same tracker. Per tax year totals of the recorded
+        rows and of the tax refunds are kept in self.ledger.
+
+        With profile=True, returns (tracker, stats) where stats is a
+        SimulationStats with the calls, events and time of each phase.
+        """
+        if not profile:
+            tracker = Recorder()
+            for row in self.simulate_iter(engine=engine):
+                tracker.append(row)
+            return tracker.to_frame()
+
+        stats = self.stats = SimulationStats()
+        start = perf_counter()
+        try:
+            tracker = Recorder()
+            for row in self.simulate_iter(engine=engine):
+                tracker.append(row)
+                stats.lap("record", True)
+        finally:
+            self.stats = None
+        stats.total_seconds = perf_counter() - start
+        stats.peak_tracker_bytes = tracker.nbytes
+        return tracker.to_frame(), stats
 
-        cash = 0
-        new_credit = 0
+    def run(self, engine="daily"):
+        """
+        Run the strategy like simulate without keeping the tracker, for
+        summary. Unlike simulate, this does not need pandas.
+        """
+        for _ in self._simulate_rows(self._days(engine)):
+            pass
+        return self
+
+    def simulate_iter(self, engine="daily", chunk_size=None):
+        """
+        Run the strategy like simulate, yielding the tracker rows as they
+        are produced instead of returning the tracker at the end.
+
+        Rows are yielded as dictionaries, or with chunk_size as DataFrames
+        of up to chunk_size rows. Closing the generator stops the
+        simulation. Only the tax ledger is kept, so memory does not grow
+        with the horizon.
+        """
+        rows = self._simulate_rows(self._days(engine))
+        if chunk_size is None:
+            for row in rows:
+                row["date"] = to_timestamp(row["date"])
+                yield row
+            return
+
+        chunk = Recorder(capacity=chunk_size)
+        for row in rows:
+            row["date"] = to_timestamp(row["date"])
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk.to_frame()
+                chunk = Recorder(capacity=chunk_size)
+        if len(chunk):
+            yield chunk.to_frame()
+
+    def resume(self, engine="daily", tracker=None):
+        """
+        Carry on a simulation from the day after self.last_day up to the
+        end of the horizon, for example after extending n_steps or after
+        restoring a checkpoint (see checkpoint.py). Returns `tracker` (the
+        tracker so far) with the new rows added. The result is the same as
+        simulating the whole horizon at once. Raises ValueError if the
+        calculator was never simulated.
+        """
+        if self.last_day is None:
+            raise ValueError("Nothing to resume: simulate or run first")
+        tracker = Recorder() if tracker is None else Recorder.from_frame(tracker)
+        if self.payoff_day is None:
+            # Nothing has been stepped yet: the first step can still repeat
+            # the initial row
+            last_row = self._initial_row() if self.last_day < self._start_day else None
+            days = self._days(engine, first=self.last_day + 1)
+            for row in self._step_rows(days, last_row):
+                row["date"] = to_timestamp(row["date"])
+                tracker.append(row)
+        return tracker.to_frame()
+
+    def state(self):
+        """
+        The simulation state as plain (JSON friendly) values, see from_state
+        """
+        state = {name: getattr(self, name) for name in self._state_slots}
+        state["mortgage"] = self.mortgage.state()
+        state["investment"] = self.investment.state()
+        state["ledger"] = self.ledger.state()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        smith = cls.__new__(cls)
+        for name in cls._state_slots:
+            setattr(smith, name, state[name])
+        smith.mortgage = MortgageCalculator.from_state(state["mortgage"])
+        if "names" in state["investment"]:
+            smith.investment = Portfolio.from_state(state["investment"])
+        else:
+            smith.investment = InvestmentCalculator.from_state(state["investment"])
+        smith.ledger = TaxLedger.from_state(state["ledger"])
+        smith.stats = None
+        return smith
+
+    def load_state(self, state):
+        """
+        Put this calculator in a state of state(), in place: the mortgage,
+        investment and ledger objects are kept and loaded too, so references
+        to them see the new state
+        """
+        for name in self._state_slots:
+            setattr(self, name, state[name])
+        self.mortgage.load_state(state["mortgage"])
+        self.investment.load_state(state["investment"])
+        self.ledger.load_state(state["ledger"])
+        return self
+
+    _state_slots = (
+        "_start_day",
+        "n_steps",
+        "marginal_tax_rate",
+        "dividend_tax_rate",
+        "draw_threshold",
+        "top_up_threshold",
+        "top_up",
+        "capitalize_threshold",
+        "cash",
+        "new_credit",
+        "tax_return_available",
+        "payoff_day",
+        "peak_credit_balance",
+        "last_day",
+    )
+
+    def _days(self, engine, first=None):
+        if first is None:
+            first = self._start_day
+        if engine == "daily":
+            return range(first, self._start_day + self.n_steps)
+        if engine == "event":
+            return self.event_days(first)
+        raise ValueError(f"Unknown engine: {engine}")
+
+    def _simulate_rows(self, days):
+        # Tracker rows with day numbers as dates
+        self.ledger = TaxLedger()
+        row = self._initial_row()
+        self.ledger.record(row, to_date(self._start_day).year)
+        self.peak_credit_balance = row["credit_balance"]
+        self.cash = 0
+        self.new_credit = 0
+        self.tax_return_available = False
+        self.payoff_day = None
+        self.last_day = self._start_day - 1
+        if self.stats is not None:
+            self.stats.start()
+        yield row
 
         # print(f"Start Date: {self.start_date.date()}")
-        for date in date_range:
-
-            principle = 0
-            interest = 0
-            heloc_interest = 0
-            event = False
-            dividends = 0
-
-            if date.month >= 1 and date.month < 3:
-                tax_return_available = True
-
-            mortgage_due_date = self.mortgage.mortgage_payment_date(date)
-            if date == mortgage_due_date:
-                interest, principle = self.mortgage.calculate_interest_and_principle()
-                self.mortgage.make_regular_payment()
-                # print(f"\t{date.date()}: Make mortgage payment")
-                new_credit += principle
-                event = True
-
-            heloc_due_date = self.mortgage.heloc_payment_date(date)
-            if date == heloc_due_date:
-                # print(f"\t{date.date()}: Capitalize HELOC interest")
-                if self.mortgage.credit_available > 2000000:
-                    heloc_interest = self.mortgage.capitalize_heloc_interest()
-                else:
-                    heloc_interest = self.mortgage.heloc_interest_due()
-                    self.mortgage.make_heloc_payment(heloc_interest)
-                    cash -= heloc_interest
-                event = True
-
-            self.investment.issue_dividend(date)
-            div_balance = self.investment.dividend_balance
-
-            if div_balance > 0:
-                # print(f"\t{date}: Dividend Issued")
-                self.investment.withdraw_dividends(div_balance)
-                # print(f"\t{date}: Withdraw Dividend ${div_balance}")
-                dividends += div_balance
-                cash += div_balance
-                event = True
-
-            if date.month == 3 and tax_return_available:
-                # Tax return calculated as
-                # Marginal tax rate * total interest paid this year
-                tax_rate = self.marginal_tax_rate / 100
-                div_tax_rate = self.dividend_tax_rate / 100
-                tax_start = date - pd.DateOffset(years=1, month=1, day=1)
-                tax_end = tax_start + pd.DateOffset(month=12, day=31)
-                interest_paid = tracker[tracker["date"].between(tax_start, tax_end)][
-                    "interest_capitalized"
-                ].sum()
-                tax_return = tax_rate * interest_paid
-                # subtract dividend tax rate * total dividends
-                dividends_earned = tracker[tracker["date"].between(tax_start, tax_end)][
-                    "dividends"
-                ].sum()
-                dividend_tax = dividends_earned * 1.38 * div_tax_rate
-                tax_return -= dividend_tax
-                tax_return = round(tax_return, 2)
-                if tax_return > 0:
-                    amt = tax_return + max(0, cash)
-                    self.mortgage.make_lump_sum_payment(amt)
-                    new_credit += amt
-                else:
-                    cash -= tax_return
-                tax_return_available = False
-                event = True
-                print(f"{date}: Tax Return - ${tax_return}")
-                tax_return = 0
-                cash = min(cash, 0)
-            if cash > 0:
-                amt = min(max(0, cash), self.mortgage.payment_amount)
-                self.mortgage.make_double_up_payment(amt)
-                # print(f"\t{date}: Double up mortgage payment ${cash}")
-                new_credit += amt
-                cash -= amt
-                event = True
-
-            div_balance = self.investment.dividend_balance
-
-            new_credit_available = (
-                self.mortgage.credit_limit - tracker["credit_limit"].iloc[-1]
-            )
+        yield from self._step_rows(days, last_row=row)
 
-            # if new_credit_available > 0:
-            if self.mortgage.credit_available > 2000 and new_credit > 0:
-                if self.mortgage.credit_available > 10000:
-                    new_credit += 1000
-                # print(f"\t{date}: Draw from HELOC and invest")
-                self.mortgage.draw_from_heloc(new_credit)
-                self.investment.buy(new_credit)
-                new_credit = 0
-                event = True
-
-            if not event:
+    def _initial_row(self):
+        return {
+            "date": self._start_day,
+            "mort_interest_paid": 0,
+            "mort_principle_paid": 0,
+            "mort_principle": self.mortgage.principle,
+            "interest_capitalized": 0,
+            "credit_limit": self.mortgage.credit_limit,
+            "credit_available": self.mortgage.credit_available,
+            "credit_balance": self.mortgage.credit_balance,
+            "investment_balance": self.investment.balance,
+            "dividends": 0,
+            "out_of_pocket": 0,
+            "event": True,
+        }
+
+    def _step_rows(self, days, last_row):
+        stats = self.stats
+        for day in days:
+            new_row = self._step(day)
+            self.last_day = day
+
+            if new_row is None:
                 continue
+            if stats is not None:
+                stats.start()
 
             if self.mortgage.principle <= 5000:
-                break
-
-            new_row = pd.DataFrame(
-                {
-                    "date": [date],
-                    "mort_interest_paid": interest,
-                    "mort_principle_paid": principle,
-                    "mort_principle": self.mortgage.principle,
-                    "interest_capitalized": heloc_interest,
-                    "credit_limit": self.mortgage.credit_limit,
-                    "credit_available": self.mortgage.credit_available,
-                    "credit_balance": self.mortgage.credit_balance,
-                    "investment_balance": self.investment.balance,
-                    "dividends": dividends,
-                    "out_of_pocket": cash,
-                    "event": event,
-                }
+                self.payoff_day = day
+                return
+
+            new_row["date"] = day
+            self.ledger.record(new_row, to_date(day).year)
+            self.peak_credit_balance = max(
+                self.peak_credit_balance, new_row["credit_balance"]
             )
-            tracker = tracker.append(new_row)
+            # Each date is stepped once, so only the first step can repeat
+            # the initial row
+            if new_row != last_row:
+                yield new_row
+            last_row = new_row
+
+        # Days after the last event have nothing to do
+        self.last_day = max(self.last_day, self._start_day + self.n_steps - 1)
+
+    def summary(self):
+        """
+        Compact outcome of a finished simulation. payoff_date is a
+        datetime.date, or None when the mortgage is not paid down within
+        the horizon.
+        """
+        principle = self.mortgage.principle
+        credit_balance = self.mortgage.credit_balance
+        investment_balance = self.investment.balance
+        return {
+            "payoff_date": (
+                None if self.payoff_day is None else to_date(self.payoff_day)
+            ),
+            "final_principle": principle,
+            "final_credit_balance": credit_balance,
+            "final_investment_balance": investment_balance,
+            "net_worth": investment_balance - credit_balance - principle,
+            "total_tax_refund": self.ledger.total("tax_refund"),
+            "peak_credit_balance": max(self.peak_credit_balance, credit_balance),
+        }
+
+    def event_dates(self):
+        """
+        Days on which something can happen, in order: the start date,
+        mortgage payments, HELOC month ends, dividends and March 1st
+        (tax refund). The schedules are merged with a heap. While the
+        simulation is holding cash, the following day is also produced so
+        that the double up payments carry on as in the daily loop.
+        """
+        for day in self.event_days():
+            yield to_timestamp(day)
+
+    def event_days(self, first=None):
+        """
+        event_dates as day numbers (see calculators.days), from `first`
+        instead of the start date when given
+        """
+        schedules = self.event_schedules(first)
+        end = self._start_day + self.n_steps - 1
+        return merge_event_days(schedules.values(), end, lambda: self.cash > 0)
+
+    def event_schedules(self, first=None):
+        """
+        Scheduled event days (days since 1970-01-01) within the simulation,
+        or from `first` to its end, by kind of event
+        """
+        if first is None:
+            first = self._start_day
+        last = self._start_day + self.n_steps - 1
+        if first > last:
+            return {}
+
+        start = np.datetime64(first, "D")
+        end = np.datetime64(last, "D")
+
+        months = np.arange(np.datetime64(start, "M"), np.datetime64(end, "M") + 1)
+        heloc_dates = (months + 1).astype("datetime64[D]") - 1
+        years = np.arange(np.datetime64(start, "Y"), np.datetime64(end, "Y") + 1)
+        tax_dates = (years.astype("datetime64[M]") + 2).astype("datetime64[D]")
+
+        schedules = {
+            "start": np.array([start]),
+            "mortgage": self.mortgage.payment_schedule(until=end),
+            "heloc": heloc_dates,
+            "dividend": self.investment.dividend_dates(start, end),
+            "tax": tax_dates,
+        }
+        for kind, dates in schedules.items():
+            dates = dates[(dates >= start) & (dates <= end)]
+            schedules[kind] = dates.astype(np.int64).tolist()
+        return schedules
+
+    def step(self, date):
+        """
+        Apply one day of the strategy. Returns the tracker row for the day
+        or None when nothing happened.
+        """
+        row = self._step(to_day(date))
+        if row is not None:
+            row["date"] = date
+        return row
+
+    def _step(self, day):
+        # step for a day number. The row's date is left for the caller.
+        stats = self.stats
+        if stats is not None:
+            stats.steps += 1
+            stats.start()
+
+        date = to_date(day)
+        principle = 0
+        interest = 0
+        heloc_interest = 0
+        event = False
+        dividends = 0
+
+        self.mortgage.update_rates(day)
+
+        if date.month >= 1 and date.month < 3:
+            self.tax_return_available = True
+
+        payment_day = self.mortgage.is_payment_day(day)
+        if payment_day:
+            interest, principle = self.mortgage.calculate_interest_and_principle()
+            self.mortgage.make_regular_payment()
+            # print(f"\t{date.date()}: Make mortgage payment")
+            self.new_credit += principle
+            event = True
+        if stats is not None:
+            stats.lap("mortgage", payment_day)
+
+        heloc_day = self.mortgage.is_heloc_payment_day(day)
+        if heloc_day:
+            # print(f"\t{date.date()}: Capitalize HELOC interest")
+            if self.mortgage.credit_available > self.capitalize_threshold:
+                heloc_interest = self.mortgage.capitalize_heloc_interest()
+            else:
+                heloc_interest = self.mortgage.heloc_interest_due()
+                self.mortgage.make_heloc_payment(heloc_interest)
+                self.cash -= heloc_interest
+            event = True
+        if stats is not None:
+            stats.lap("heloc", heloc_day)
+
+        self.investment.issue_dividend_on(day)
+        div_balance = self.investment.dividend_balance
+
+        if div_balance > 0:
+            # print(f"\t{date}: Dividend Issued")
+            self.investment.withdraw_dividends(div_balance)
+            # print(f"\t{date}: Withdraw Dividend ${div_balance}")
+            dividends += div_balance
+            self.cash += div_balance
+            event = True
+        if stats is not None:
+            stats.lap("dividends", div_balance > 0)
+
+        refund_day = date.month == 3 and self.tax_return_available
+        if refund_day:
+            # Tax return calculated as
+            # Marginal tax rate * total interest paid this year
+            tax_rate = self.marginal_tax_rate / 100
+            div_tax_rate = self.dividend_tax_rate / 100
+            tax_year = self.ledger.year(date.year - 1)
+            interest_paid = tax_year["interest_capitalized"]
+            tax_return = tax_rate * interest_paid
+            # subtract dividend tax rate * total dividends
+            dividends_earned = tax_year["dividends"]
+            dividend_tax = dividends_earned * 1.38 * div_tax_rate
+            tax_return -= dividend_tax
+            tax_return = round(tax_return, 2)
+            if tax_return > 0:
+                amt = tax_return + max(0, self.cash)
+                self.mortgage.make_lump_sum_payment(amt)
+                self.new_credit += amt
+            else:
+                self.cash -= tax_return
+            self.ledger.record_tax_refund(date.year - 1, tax_return)
+            self.tax_return_available = False
+            event = True
+            logger.info("%s: Tax Return - $%s", date, tax_return)
+            tax_return = 0
+            self.cash = min(self.cash, 0)
+        if stats is not None:
+            stats.lap("tax_refund", refund_day)
+
+        double_up = self.cash > 0
+        if double_up:
+            amt = min(max(0, self.cash), self.mortgage.payment_amount)
+            self.mortgage.make_double_up_payment(amt)
+            # print(f"\t{date}: Double up mortgage payment ${cash}")
+            self.new_credit += amt
+            self.cash -= amt
+            event = True
+
+        # if new_credit_available > 0:
+        draw = (
+            self.mortgage.credit_available > self.draw_threshold and self.new_credit > 0
+        )
+        if draw:
+            if self.mortgage.credit_available > self.top_up_threshold:
+                self.new_credit += self.top_up
+            # print(f"\t{date}: Draw from HELOC and invest")
+            self.mortgage.draw_from_heloc(self.new_credit)
+            self.investment.buy(self.new_credit)
+            self.new_credit = 0
+            event = True
+        if stats is not None:
+            stats.lap("reinvest", double_up or draw)
+
+        if not event:
+            return None
 
-        return tracker.drop_duplicates()
+        return {
+            "date": None,
+            "mort_interest_paid": interest,
+            "mort_principle_paid": principle,
+            "mort_principle": self.mortgage.principle,
+            "interest_capitalized": heloc_interest,
+            "credit_limit": self.mortgage.credit_limit,
+            "credit_available": self.mortgage.credit_available,
+            "credit_balance": self.mortgage.credit_balance,
+            "investment_balance": self.investment.balance,
+            "dividends": dividends,
+            "out_of_pocket": self.cash,
+            "event": event,
+        }
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     mortgage = MortgageCalculator(
         principle=486888.03,
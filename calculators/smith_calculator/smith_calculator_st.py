@@ -0,0 +1,232 @@
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.smith_calculator.charts import balances
+from calculators.smith_calculator.scenario import (
+    DEFAULT_SCENARIO,
+    make_smith_calculator,
+)
+
+MAX_POINTS = 1000
+CHUNK_SIZE = 250
+MAX_RUNS = 32
+# Seconds between chart updates while a simulation runs
+REFRESH = 0.2
+
+
+class Run:
+    """
+    A simulation running in a background thread, its tracker arriving in
+    chunks of CHUNK_SIZE rows that the script polls with tracker(). A rerun
+    of the script (a slider moved) does not stop it, so its result is there
+    the next time the same inputs come up.
+    """
+
+    def __init__(self, params, engine):
+        self.chunks = []
+        self.summary = None
+        self.error = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._simulate, args=(params, engine), daemon=True
+        )
+        self._thread.start()
+
+    def _simulate(self, params, engine):
+        try:
+            smith = make_smith_calculator(**params)
+            for chunk in smith.simulate_iter(engine=engine, chunk_size=CHUNK_SIZE):
+                with self._lock:
+                    self.chunks.append(chunk)
+            self.summary = smith.summary()
+        except Exception as error:
+            # Nobody would see it raised in this thread
+            self.error = str(error)
+        finally:
+            self.done.set()
+
+    def tracker(self):
+        """
+        The rows so far, None before the first chunk
+        """
+        with self._lock:
+            if len(self.chunks) > 1:
+                # Later polls only concatenate the new chunks
+                self.chunks[:] = [pd.concat(self.chunks, ignore_index=True)]
+            return self.chunks[0] if self.chunks else None
+
+    def last_date(self):
+        with self._lock:
+            return self.chunks[-1]["date"].iloc[-1] if self.chunks else None
+
+
+@st.cache_resource
+def runs():
+    """
+    Runs by inputs, shared by every session, finished or not
+    """
+    return OrderedDict()
+
+
+def get_run(params, engine):
+    key = (tuple(sorted(params.items())), engine)
+    cache = runs()
+    run = cache.get(key)
+    if run is None:
+        run = cache[key] = Run(params, engine)
+        while len(cache) > MAX_RUNS:
+            cache.popitem(last=False)
+    cache.move_to_end(key)
+    return run
+
+
+def scenario_inputs():
+    st.sidebar.header("Mortgage")
+    params = {
+        "principle": st.sidebar.number_input(
+            "Principle", 0.0, value=DEFAULT_SCENARIO["principle"], step=1000.0
+        ),
+        "equity_available": st.sidebar.number_input(
+            "Home value", 0.0, value=float(DEFAULT_SCENARIO["equity_available"])
+        ),
+        "interest_rate": st.sidebar.slider(
+            "Interest rate (%)", 0.5, 10.0, DEFAULT_SCENARIO["interest_rate"], 0.01
+        ),
+        "heloc_interest_rate": st.sidebar.slider(
+            "HELOC interest rate (%)",
+            0.5,
+            12.0,
+            DEFAULT_SCENARIO["heloc_interest_rate"],
+            0.01,
+        ),
+        "amortization_months": st.sidebar.slider(
+            "Amortization (months)", 12, 360, DEFAULT_SCENARIO["amortization_months"]
+        ),
+        "payment_frequency": st.sidebar.selectbox(
+            "Payment frequency",
+            list(MortgageCalculator.payment_periods),
+            index=list(MortgageCalculator.payment_periods).index(
+                DEFAULT_SCENARIO["payment_frequency"]
+            ),
+        ),
+        "last_payment_date": str(
+            st.sidebar.date_input(
+                "Last payment date",
+                pd.Timestamp(DEFAULT_SCENARIO["last_payment_date"]),
+            )
+        ),
+    }
+    st.sidebar.header("Investment")
+    params["dividend_yield"] = st.sidebar.slider(
+        "Dividend yield (%)", 0.0, 10.0, DEFAULT_SCENARIO["dividend_yield"], 0.01
+    )
+    params["initial_draw"] = st.sidebar.number_input(
+        "Initial HELOC draw", 0.0, value=float(DEFAULT_SCENARIO["initial_draw"])
+    )
+    st.sidebar.header("Simulation")
+    params["start_date"] = str(
+        st.sidebar.date_input(
+            "Start date", pd.Timestamp(DEFAULT_SCENARIO["start_date"])
+        )
+    )
+    params["n_steps"] = 365 * st.sidebar.slider("Horizon (years)", 1, 30, 25)
+    params["marginal_tax_rate"] = st.sidebar.slider(
+        "Marginal tax rate (%)", 0.0, 60.0, DEFAULT_SCENARIO["marginal_tax_rate"]
+    )
+    # Defaults to the marginal rate less the dividend tax credit of the
+    # default scenario
+    credit = (
+        DEFAULT_SCENARIO["marginal_tax_rate"] - DEFAULT_SCENARIO["dividend_tax_rate"]
+    )
+    params["dividend_tax_rate"] = st.sidebar.slider(
+        "Dividend tax rate (%)",
+        0.0,
+        60.0,
+        max(params["marginal_tax_rate"] - credit, 0.0),
+        0.01,
+    )
+    return params
+
+
+def comparison_inputs(params):
+    """
+    Extra scenarios: the same inputs with other values of one parameter
+    """
+    st.sidebar.header("Compare")
+    name = st.sidebar.selectbox(
+        "Parameter",
+        ["interest_rate", "heloc_interest_rate", "dividend_yield"],
+    )
+    text = st.sidebar.text_input("Other values", placeholder="e.g. 3.5, 4.5")
+    try:
+        values = [float(value) for value in text.split(",") if value.strip()]
+    except ValueError:
+        st.sidebar.error("Values must be numbers separated by commas")
+        values = []
+    return {f"{name}={value}": {**params, name: value} for value in values}
+
+
+def show_summaries(scenarios):
+    rows = {}
+    for label, run in scenarios.items():
+        if run.error is not None:
+            rows[label] = {"error": run.error}
+        elif run.done.is_set():
+            rows[label] = run.summary
+    if rows:
+        st.subheader("Summary")
+        st.dataframe(pd.DataFrame.from_dict(rows, orient="index"))
+
+
+def main():
+    st.set_page_config(page_title="Smith Maneuvre Calculator", layout="wide")
+    st.title("Smith Maneuvre Calculator")
+
+    params = scenario_inputs()
+    engine = st.sidebar.radio(
+        "Engine", ["event", "daily"], help="Both give the same results"
+    )
+    scenarios = {"scenario": params, **comparison_inputs(params)}
+    runs_ = {label: get_run(values, engine) for label, values in scenarios.items()}
+
+    st.subheader("Balances")
+    balance_placeholder = st.empty()
+    st.subheader("Net worth")
+    net_worth_placeholder = st.empty()
+    progress = st.empty()
+
+    # Redraw as rows arrive until every run is done. Moving a slider
+    # reruns the script, which leaves this loop, not the simulations.
+    while True:
+        done = all(run.done.is_set() for run in runs_.values())
+        net_worth = {}
+        for label, run in runs_.items():
+            tracker = run.tracker()
+            if tracker is None:
+                continue
+            # Downsampled, so redrawing stays cheap however long the horizon
+            chart = balances(tracker, MAX_POINTS)
+            net_worth[label] = chart.pop("net_worth")
+            if label == "scenario":
+                balance_placeholder.line_chart(chart)
+        if net_worth:
+            # The scenarios' rows fall on different dates
+            net_worth_placeholder.line_chart(pd.DataFrame(net_worth).ffill())
+        if done:
+            progress.empty()
+            break
+        last_dates = [
+            date for date in (run.last_date() for run in runs_.values()) if date
+        ]
+        if last_dates:
+            progress.caption(f"Simulating... {min(last_dates).date()}")
+        time.sleep(REFRESH)
+
+    show_summaries(runs_)
+
+
+main()
@@ -0,0 +1,57 @@
+from time import perf_counter
+
+
+class SimulationStats:
+    """
+    Per phase counters of a profiled simulation (see SmithCalculator.simulate).
+
+    For each phase of a step, calls counts how many times the phase ran,
+    events how many times it did something (made a payment, issued a
+    dividend, ...) and seconds the time spent in it. "record" is the time
+    spent recording rows in the tracker and tax ledger.
+    """
+
+    phases = ("mortgage", "heloc", "dividends", "tax_refund", "reinvest", "record")
+
+    def __init__(self):
+        self.calls = dict.fromkeys(self.phases, 0)
+        self.events = dict.fromkeys(self.phases, 0)
+        self.seconds = dict.fromkeys(self.phases, 0.0)
+        self.steps = 0
+        self.total_seconds = 0.0
+        self.peak_tracker_bytes = 0
+        self._last = None
+
+    def start(self):
+        self._last = perf_counter()
+
+    def lap(self, phase, event):
+        """
+        Add the time since start or the previous lap to `phase`
+        """
+        now = perf_counter()
+        self.seconds[phase] += now - self._last
+        self.calls[phase] += 1
+        self.events[phase] += bool(event)
+        self._last = now
+
+    def to_frame(self):
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "calls": self.calls,
+                "events": self.events,
+                "seconds": self.seconds,
+            }
+        )
+        df.index.name = "phase"
+        df["share"] = df["seconds"] / self.total_seconds if self.total_seconds else 0.0
+        return df
+
+    def __repr__(self):
+        return (
+            f"SimulationStats(steps={self.steps}, "
+            f"total_seconds={self.total_seconds:.4f}, "
+            f"peak_tracker_bytes={self.peak_tracker_bytes})\n{self.to_frame()!r}"
+        )
@@ -0,0 +1,113 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+from calculators.smith_calculator.scenario import expand_grid, make_smith_calculator
+
+SUMMARY_COLUMNS = [
+    "payoff_date",
+    "final_principle",
+    "final_credit_balance",
+    "final_investment_balance",
+    "net_worth",
+    "total_tax_refund",
+    "peak_credit_balance",
+]
+
+
+def simulate_scenario(params, engine="event", tracker=False):
+    """
+    Simulate one scenario from its parameters (see scenario.py).
+    Returns its summary and, when tracker is True, its tracker. A scenario
+    that raises gets a summary holding only the error, as "Type: message",
+    so one bad scenario doesn't stop a sweep.
+    """
+    try:
+        smith = make_smith_calculator(**params)
+        result = None
+        if tracker:
+            result = smith.simulate(engine=engine)
+        else:
+            smith.run(engine=engine)
+        summary = smith.summary()
+        summary["error"] = None
+    except Exception as error:
+        summary = {"error": f"{type(error).__name__}: {error}"}
+        result = None
+
+    return summary, result
+
+
+def _simulate_chunk(chunk, engine, tracker):
+    return [simulate_scenario(params, engine, tracker) for params in chunk]
+
+
+def map_scenarios(
+    scenarios, workers=None, chunksize=None, engine="event", tracker=False
+):
+    """
+    Simulate scenarios across a process pool, yielding (summary, tracker)
+    pairs in the order of scenarios. Scenarios go to the workers in chunks
+    to keep the traffic between processes low; by default each worker gets
+    about four chunks. workers=1 runs everything in this process.
+    """
+    scenarios = list(scenarios)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(scenarios) <= 1:
+        for params in scenarios:
+            yield simulate_scenario(params, engine, tracker)
+        return
+
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(scenarios) / (workers * 4)))
+    chunks = [scenarios[i : i + chunksize] for i in range(0, len(scenarios), chunksize)]
+    with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+        for results in pool.map(
+            _simulate_chunk, chunks, repeat(engine), repeat(tracker)
+        ):
+            yield from results
+
+
+def sweep(
+    param_grid,
+    workers=None,
+    chunksize=None,
+    engine="event",
+    trackers=False,
+    **base,
+):
+    """
+    Simulate every combination of param_grid (parameter -> list of values,
+    on top of the base parameters) across `workers` processes.
+
+    Returns a DataFrame with one row per scenario: its id, the grid
+    parameters, the summary columns and an "error" column for scenarios
+    that raised. With trackers=True, returns (summaries, trackers) where
+    trackers is a list of tracker DataFrames (None for failed scenarios).
+    """
+    scenarios = expand_grid(param_grid, **base)
+    rows = []
+    tracker_list = []
+    for params, (summary, tracker) in zip(
+        scenarios, map_scenarios(scenarios, workers, chunksize, engine, trackers)
+    ):
+        row = {name: params[name] for name in param_grid}
+        row.update({column: summary.get(column) for column in SUMMARY_COLUMNS})
+        row["error"] = summary["error"]
+        rows.append(row)
+        tracker_list.append(tracker)
+
+    summaries = pd.DataFrame(
+        rows, columns=list(param_grid) + SUMMARY_COLUMNS + ["error"]
+    )
+    summaries["error"] = pd.Series(
+        [row["error"] for row in rows], index=summaries.index, dtype=object
+    )
+    summaries.index.name = "scenario"
+    summaries["payoff_date"] = pd.to_datetime(summaries["payoff_date"])
+    if trackers:
+        return summaries, tracker_list
+    return summaries
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from calculators.smith_calculator.batch import SmithBatch
+from calculators.smith_calculator.scenario import expand_grid, make_smith_calculator
+
+
+def test_batch_matches_simulate():
+    grid = expand_grid(
+        {
+            "payment_frequency": ["monthly", "bi-weekly", "accelerated weekly"],
+            "interest_rate": [2.0, 5.0],
+            "dividend_yield": [3.0, 8.0],
+        },
+        n_steps=365 * 4,
+    )
+    batch = SmithBatch(make_smith_calculator(**params) for params in grid)
+    assert len(batch.groups()) == 3
+
+    result = batch.simulate()
+    assert list(result["scenario"].unique()) == list(range(len(grid)))
+    assert batch.errors == {}
+
+    for i, params in enumerate(grid):
+        tracker = make_smith_calculator(**params).simulate(engine="event")
+        scenario = result[result["scenario"] == i].drop(columns="scenario")
+        pd.testing.assert_frame_equal(
+            scenario.reset_index(drop=True), tracker, check_exact=True
+        )
+
+
+def test_batch_strategy():
+    param_grid = {
+        "draw_threshold": [2000, 50000],
+        "top_up": [0, 1000],
+        "capitalize_threshold": [0, 2000000],
+    }
+    batch = SmithBatch.from_grid(param_grid, n_steps=365 * 4)
+    result = batch.simulate()
+
+    for i, params in enumerate(expand_grid(param_grid, n_steps=365 * 4)):
+        smith = make_smith_calculator(**params)
+        if i in batch.errors:
+            with pytest.raises(ValueError, match=batch.errors[i]):
+                smith.simulate(engine="event")
+            continue
+        tracker = smith.simulate(engine="event")
+        scenario = result[result["scenario"] == i].drop(columns="scenario")
+        pd.testing.assert_frame_equal(
+            scenario.reset_index(drop=True), tracker, check_exact=True
+        )
+
+
+def test_batch_errors():
+    # The second tax refund is larger than the 10% lump sum allowance
+    batch = SmithBatch.from_grid(
+        {"heloc_interest_rate": [3.0, 30.0]},
+        principle=50000,
+        equity_available=250000,
+        dividend_yield=0.0,
+        marginal_tax_rate=90.0,
+        n_steps=365 * 2,
+    )
+    result = batch.simulate()
+
+    assert list(batch.errors) == [1]
+    assert "10% of equity" in batch.errors[1]
+    tracker = make_smith_calculator(
+        principle=50000,
+        equity_available=250000,
+        heloc_interest_rate=3.0,
+        dividend_yield=0.0,
+        marginal_tax_rate=90.0,
+        n_steps=365 * 2,
+    ).simulate(engine="event")
+    assert (result["scenario"] == 0).sum() == len(tracker)
@@ -0,0 +1,46 @@
+import importlib.util
+import json
+import os
+
+# Loaded by path: benchmarks/ is not installed with the package
+_spec = importlib.util.spec_from_file_location(
+    "bench",
+    os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks", "bench.py"),
+)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+BENCHMARKS, compare, main = bench.BENCHMARKS, bench.compare, bench.main
+
+
+def test_compare():
+    rows = compare({"a": 1.0, "b": 1.0, "c": 1.0}, {"a": 0.9, "b": 0.5}, threshold=1.25)
+    assert [row[-1] for row in rows] == [False, True, False]
+    assert rows[1][3] == 2.0
+
+
+def test_baseline(tmp_path, capsys):
+    assert "simulate[monthly]" in BENCHMARKS
+    baseline = tmp_path / "baseline.json"
+    assert (
+        main(
+            [
+                "mortgage_payment_date",
+                "--repeat",
+                "1",
+                "--baseline",
+                str(baseline),
+                "--save",
+            ]
+        )
+        == 0
+    )
+    results = json.loads(baseline.read_text())["results"]
+    assert list(results) == ["mortgage_payment_date"]
+
+    results["mortgage_payment_date"] /= 100
+    baseline.write_text(json.dumps({"results": results}))
+    assert (
+        main(["mortgage_payment_date", "--repeat", "1", "--baseline", str(baseline)])
+        == 1
+    )
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,120 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from calculators.business_days import BusinessCalendar, holidays
+from calculators.investment_calculator.investment_calculator import (
+    InvestmentCalculator,
+)
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.smith_calculator.batch import SmithBatch
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+
+def test_holidays():
+    ontario = holidays("ON", 2021, 2022).astype(str).tolist()
+    assert ontario == [
+        "2021-01-01",
+        "2021-02-15",  # Family Day
+        "2021-04-02",  # Good Friday
+        "2021-05-24",  # Victoria Day
+        "2021-07-01",
+        "2021-08-02",  # Civic Holiday
+        "2021-09-06",
+        "2021-10-11",
+        "2021-12-27",  # Christmas and Boxing Day fell on the weekend
+        "2021-12-28",
+        "2022-01-03",  # New Year's Day fell on a Saturday
+        "2022-02-21",
+        "2022-04-15",
+        "2022-05-23",
+        "2022-07-01",
+        "2022-08-01",
+        "2022-09-05",
+        "2022-10-10",
+        "2022-12-26",
+        "2022-12-27",
+    ]
+    federal = holidays("CA", 2023, 2023).astype(str).tolist()
+    assert "2023-10-02" in federal  # Truth and Reconciliation, observed
+    assert "2023-11-13" in federal  # Remembrance Day, observed
+    assert "2023-06-24" not in federal
+    assert "2023-06-26" in holidays("QC", 2023, 2023).astype(str).tolist()
+    assert np.array_equal(holidays("weekends"), np.array([], dtype="datetime64[D]"))
+
+    with pytest.raises(ValueError):
+        holidays("XX")
+
+
+def test_roll():
+    ontario = BusinessCalendar.get("ON")
+    assert BusinessCalendar.get("ON") is ontario
+    dates = np.array(["2021-12-24", "2021-12-25", "2022-04-15", "2022-04-18"])
+    rolled = ontario.roll(dates).astype(str).tolist()
+    assert rolled == ["2021-12-24", "2021-12-29", "2022-04-18", "2022-04-18"]
+    assert ontario.roll(dates, roll="backward")[1] == np.datetime64("2021-12-24")
+    assert ontario.offset("2021-12-24", 1) == np.datetime64("2021-12-29")
+    assert ontario.is_business_day(dates).tolist() == [True, False, False, True]
+
+    with pytest.raises(ValueError):
+        BusinessCalendar.register(BusinessCalendar("ON"))
+    with pytest.raises(ValueError):
+        BusinessCalendar.get("XX")
+
+
+def test_dividend_dates():
+    investment = InvestmentCalculator(0, 4, "monthly", "2021-01-15")
+    ontario = InvestmentCalculator(0, 4, "monthly", "2021-01-15", "ON")
+    # 2022-01-15 is a Saturday; 2021-02-15 is Family Day
+    assert investment.next_dividend_date("2022-01-14") == datetime.date(2022, 1, 17)
+    assert investment.next_dividend_date("2021-02-14") == datetime.date(2021, 2, 15)
+    assert ontario.next_dividend_date("2021-02-14") == datetime.date(2021, 2, 16)
+    assert ontario.state()["business_calendar"] == "ON"
+    dates = InvestmentCalculator.custom_date_range(
+        "2021-02-01", "2021-03-01", "monthly", "2021-01-15", "ON"
+    )
+    assert pd.Timestamp("2021-02-16") in set(dates)
+
+
+def test_payment_dates():
+    def make_mortgage(business_calendar=None):
+        return MortgageCalculator(
+            principle=100000,
+            equity_available=500000,
+            amortization_months=300,
+            interest_rate=3.0,
+            heloc_interest_rate=4.0,
+            payment_freqency="monthly",
+            last_payment_date="2021-11-25",
+            business_calendar=business_calendar,
+        )
+
+    mortgage = make_mortgage()
+    ontario = make_mortgage("ON")
+    assert mortgage.payment_amount == ontario.payment_amount
+    assert mortgage.is_mortgage_payment_date("2021-12-25")
+    assert not ontario.is_mortgage_payment_date("2021-12-25")
+    assert ontario.is_mortgage_payment_date("2021-12-29")
+    assert ontario.mortgage_payment_date("2022-04-01") == pd.Timestamp("2022-04-25")
+    schedule = ontario.payment_schedule(until="2030-01-01")
+    assert BusinessCalendar.get("ON").is_business_day(schedule).all()
+    assert MortgageCalculator.from_state(ontario.state()).business_calendar == "ON"
+
+
+@pytest.mark.parametrize("payment_frequency", ["monthly", "weekly"])
+def test_engines_with_holidays(payment_frequency):
+    params = dict(payment_frequency=payment_frequency, holidays="ON", n_steps=365 * 3)
+    daily = make_smith_calculator(**params).simulate(engine="daily")
+    event = make_smith_calculator(**params).simulate(engine="event")
+    pd.testing.assert_frame_equal(daily, event, check_exact=True)
+    assert not daily["date"].isin(pd.to_datetime(holidays("ON"))).any()
+
+    smith = make_smith_calculator(**params)
+    smith.simulate(engine="event")
+    resumed = SmithCalculator.from_state(smith.state())
+    assert resumed.investment.business_calendar == "ON"
+
+    batch = SmithBatch([make_smith_calculator(**params)])
+    result = batch.simulate().drop(columns="scenario")
+    pd.testing.assert_frame_equal(result, event, check_exact=True)
@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+from calculators.smith_calculator.cache import SimulationCache, cache_key
+from calculators.smith_calculator.scenario import make_smith_calculator
+
+
+def test_cache(tmp_path):
+    cache = SimulationCache(tmp_path)
+    first = make_smith_calculator(n_steps=365 * 5)
+    tracker = cache.simulate(first, engine="event")
+    second = make_smith_calculator(n_steps=365 * 5)
+    mortgage, investment = second.mortgage, second.investment
+    cached = cache.simulate(second, engine="event")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+    pd.testing.assert_frame_equal(cached, tracker, check_exact=True)
+    assert second.summary() == first.summary()
+    assert second.state() == first.state()
+    # A hit loads the end state into the same objects, as a miss leaves it
+    assert second.mortgage is mortgage and second.investment is investment
+    assert mortgage.principle == first.mortgage.principle
+    assert investment.balance == first.investment.balance
+
+    cache.simulate(make_smith_calculator(n_steps=365 * 5), engine="daily")
+    cache.simulate(make_smith_calculator(n_steps=365 * 5, interest_rate=3.0))
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_cache_key():
+    smith = make_smith_calculator()
+    assert cache_key(smith, "event") == cache_key(make_smith_calculator(), "event")
+    assert cache_key(smith, "event") != cache_key(smith, "daily")
+    smith.mortgage.heloc_interest_rate += 0.01
+    assert cache_key(smith, "event") != cache_key(make_smith_calculator(), "event")
+
+    # The results of an earlier run are not inputs: the same balances after
+    # a run give the same key
+    fresh = make_smith_calculator(n_steps=365)
+    smith = make_smith_calculator(n_steps=365)
+    smith.run(engine="event")
+    smith.mortgage.load_state(fresh.mortgage.state())
+    smith.investment.load_state(fresh.investment.state())
+    assert smith.last_day is not None
+    assert cache_key(smith, "event") == cache_key(fresh, "event")
+
+
+def test_threads(tmp_path):
+    cache = SimulationCache(tmp_path)
+
+    def simulate(_):
+        return cache.simulate(make_smith_calculator(n_steps=365))
+
+    with ThreadPoolExecutor(4) as pool:
+        trackers = list(pool.map(simulate, range(8)))
+    for tracker in trackers[1:]:
+        pd.testing.assert_frame_equal(tracker, trackers[0])
+    assert os.listdir(tmp_path) == [
+        f"{cache_key(make_smith_calculator(n_steps=365), 'daily')}.npz"
+    ]
+
+
+def test_eviction(tmp_path):
+    cache = SimulationCache(tmp_path)
+    paths = {}
+    for rate in [2.0, 3.0, 4.0]:
+        smith = make_smith_calculator(n_steps=365, interest_rate=rate)
+        paths[rate] = tmp_path / f"{cache_key(smith, 'daily')}.npz"
+        cache.simulate(smith)
+    # 3.0 is the least recently used
+    for seconds, rate in enumerate([3.0, 2.0, 4.0]):
+        os.utime(paths[rate], (seconds, seconds))
+
+    cache.max_bytes = cache.size - 1
+    cache.evict()
+    assert cache.evictions == 1
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        paths[rate].name for rate in [2.0, 4.0]
+    )
+
+    cache.simulate(make_smith_calculator(n_steps=365, interest_rate=2.0))
+    assert cache.hits == 1
+
+
+def _simulate(directory, rate):
+    cache = SimulationCache(directory)
+    smith = make_smith_calculator(n_steps=365 * 2, interest_rate=rate)
+    return cache.simulate(smith, engine="event"), smith.summary()
+
+
+def test_processes(tmp_path):
+    rates = [2.0, 3.0] * 4
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(_simulate, [tmp_path] * len(rates), rates))
+
+    for rate, (tracker, summary) in zip(rates, results):
+        smith = make_smith_calculator(n_steps=365 * 2, interest_rate=rate)
+        pd.testing.assert_frame_equal(tracker, smith.simulate(engine="event"))
+        assert summary == smith.summary()
+    # Only the results, no temporary files left
+    assert len(os.listdir(tmp_path)) == 2
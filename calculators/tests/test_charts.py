@@ -0,0 +1,30 @@
+import pandas as pd
+from calculators.smith_calculator.charts import balances, downsample
+from calculators.smith_calculator.scenario import make_smith_calculator
+
+
+def test_downsample():
+    tracker = make_smith_calculator(n_steps=365 * 30).simulate(engine="daily")
+    assert len(tracker) > 500
+
+    sample = downsample(tracker, 500)
+    assert len(sample) == 500
+    assert sample["date"].is_monotonic_increasing
+    pd.testing.assert_series_equal(sample.iloc[0], tracker.iloc[0])
+    pd.testing.assert_series_equal(sample.iloc[-1], tracker.iloc[-1])
+
+    assert len(downsample(tracker.iloc[:10], 1000)) == 10
+
+
+def test_balances():
+    smith = make_smith_calculator(n_steps=365 * 5)
+    tracker = smith.simulate(engine="event")
+    chart = balances(tracker, 100)
+    assert len(chart) == 100
+    assert list(chart.columns) == [
+        "mort_principle",
+        "credit_balance",
+        "investment_balance",
+        "net_worth",
+    ]
+    assert chart["net_worth"].iloc[-1] == smith.summary()["net_worth"]
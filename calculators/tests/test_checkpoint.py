@@ -0,0 +1,63 @@
+import itertools
+import json
+import pandas as pd
+import pytest
+from calculators.smith_calculator.checkpoint import load_checkpoint, save_checkpoint
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+def test_extend_horizon(tmp_path, engine):
+    smith = make_smith_calculator(n_steps=365 * 6)
+    full = smith.simulate(engine=engine)
+
+    part = make_smith_calculator(n_steps=365 * 3)
+    tracker = part.simulate(engine=engine)
+    save_checkpoint(tmp_path / "checkpoint.npz", part, tracker)
+
+    resumed, tracker = load_checkpoint(tmp_path / "checkpoint.npz")
+    resumed.n_steps = 365 * 6
+    tracker = resumed.resume(engine=engine, tracker=tracker)
+
+    pd.testing.assert_frame_equal(tracker, full, check_exact=True)
+    assert resumed.summary() == smith.summary()
+    pd.testing.assert_frame_equal(resumed.ledger.to_frame(), smith.ledger.to_frame())
+
+
+def test_resume_after_stopping(tmp_path):
+    full = make_smith_calculator(n_steps=365 * 4).simulate(engine="event")
+
+    smith = make_smith_calculator(n_steps=365 * 4)
+    rows = smith.simulate_iter(engine="event")
+    first_rows = list(itertools.islice(rows, 100))
+    rows.close()
+    save_checkpoint(tmp_path / "checkpoint.npz", smith)
+
+    resumed, tracker = load_checkpoint(tmp_path / "checkpoint.npz")
+    assert tracker is None
+    assert resumed.last_day == smith.last_day
+    rest = resumed.resume(engine="event")
+    pd.testing.assert_frame_equal(
+        pd.concat([pd.DataFrame(first_rows), rest], ignore_index=True),
+        full,
+        check_dtype=False,
+    )
+
+
+def test_state_round_trip():
+    smith = make_smith_calculator(n_steps=365 * 2)
+    smith.simulate(engine="event")
+    state = json.loads(json.dumps(smith.state()))
+
+    restored = SmithCalculator.from_state(state)
+    assert restored.state() == smith.state()
+    assert restored.start_date == smith.start_date
+    assert restored.mortgage.last_payment_date == smith.mortgage.last_payment_date
+    assert restored.investment.dividend_issue_day == smith.investment.dividend_issue_day
+    assert restored.resume(engine="event").empty
+
+
+def test_resume_not_simulated():
+    with pytest.raises(ValueError, match="Nothing to resume"):
+        make_smith_calculator(n_steps=365).resume(engine="event")
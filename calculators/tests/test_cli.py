@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from calculators.smith_calculator.cli import main
+from calculators.smith_calculator.scenario import make_smith_calculator
+
+
+def test_summary(capsys):
+    assert main(["--n-steps", "730", "--format", "json"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+
+    smith = make_smith_calculator(n_steps=730)
+    smith.run(engine="event")
+    expected = smith.summary()
+    assert summary["payoff_date"] is None
+    assert summary["final_principle"] == round(expected["final_principle"], 2)
+    assert summary["net_worth"] == round(expected["net_worth"], 2)
+
+
+def test_config_and_flags(tmp_path, capsys):
+    config = tmp_path / "scenario.toml"
+    config.write_text('payment_frequency = "monthly"\nn_steps = 3650\n')
+    tracker = tmp_path / "tracker.csv"
+
+    main(["--config", str(config), "--interest-rate", "3.5", "--tracker", str(tracker)])
+    out = capsys.readouterr().out
+    assert out.startswith("payoff_date: None\nfinal_principle: ")
+
+    expected = make_smith_calculator(
+        payment_frequency="monthly", n_steps=3650, interest_rate=3.5
+    ).simulate(engine="event")
+    written = pd.read_csv(tracker, parse_dates=["date"])
+    assert len(written) == len(expected)
+    assert (written["date"] == expected["date"]).all()
+
+
+def test_error(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(["--initial-draw", "10000000"])
+    assert exit.value.code == 2
+    assert "more than available credit" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as exit:
+        main(["--payment-frequency", "yearly"])
+    assert exit.value.code == 2
+    assert "invalid choice: 'yearly'" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as exit:
+        main(["--interest-rate", "0"])
+    assert exit.value.code == 2
+    assert "0% interest rate" in capsys.readouterr().err
+
+    config = tmp_path / "scenario.json"
+    config.write_text('{"payment_frequency": "yearly"}')
+    text = tmp_path / "text.toml"
+    text.write_text('interest_rate = "high"\n')
+    for path in (config, text, tmp_path / "missing.json"):
+        with pytest.raises(SystemExit) as exit:
+            main(["--config", str(path)])
+        assert exit.value.code == 2
+        assert capsys.readouterr().err.startswith("smith-calc: error: ")
+
+
+def test_lazy_pandas():
+    code = (
+        "import sys; from calculators.smith_calculator.cli import main; "
+        "main(['--n-steps', '365']); assert 'pandas' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
@@ -0,0 +1,18 @@
+import datetime
+import numpy as np
+import pandas as pd
+from calculators.days import to_date, to_day, to_timestamp
+
+
+def test_to_day():
+    assert to_day("1970-01-01") == 0
+    assert to_day(datetime.date(2021, 8, 17)) == 18856
+    assert to_day(pd.Timestamp("2021-08-17 13:45")) == 18856
+    assert to_day(np.datetime64("2021-08-17")) == 18856
+    assert to_day(np.datetime64("2021-08-17T13:45:00.000000000")) == 18856
+
+
+def test_from_day():
+    assert to_date(18856) == datetime.date(2021, 8, 17)
+    assert to_timestamp(18856) == pd.Timestamp("2021-08-17")
+    assert to_day(to_date(-1)) == -1
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from calculators.smith_calculator.export import export, load, load_npy
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import sweep
+
+
+@pytest.fixture(scope="module")
+def tracker():
+    return make_smith_calculator(n_steps=365 * 3).simulate(engine="event")
+
+
+@pytest.fixture(scope="module")
+def summaries():
+    summaries = sweep(
+        {"interest_rate": [2.0, 3.0], "n_steps": [365, 365 * 30]}, workers=1
+    )
+    summaries.loc[0, "error"] = "Payment amount does not cover the interest"
+    return summaries
+
+
+def test_npy(tmp_path, tracker):
+    export(tracker, tmp_path / "tracker")
+    columns, kinds, index = load_npy(tmp_path / "tracker")
+    assert isinstance(columns["credit_balance"], np.memmap)
+    assert columns["date"].dtype == np.int32
+    assert columns["event"].dtype == bool
+    assert kinds["date"] == "date"
+    assert index is None
+
+    pd.testing.assert_frame_equal(load(tmp_path / "tracker"), tracker, check_exact=True)
+
+
+def test_npy_sweep(tmp_path, summaries):
+    export(summaries, tmp_path / "sweep")
+    result = load(tmp_path / "sweep")
+    pd.testing.assert_frame_equal(result, summaries, check_exact=True)
+    assert result["error"].iloc[1] is None
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_pyarrow(tmp_path, tracker, summaries, suffix):
+    pytest.importorskip("pyarrow")
+    export(tracker, tmp_path / f"tracker{suffix}")
+    pd.testing.assert_frame_equal(
+        load(tmp_path / f"tracker{suffix}"), tracker, check_exact=True
+    )
+    export(summaries, tmp_path / f"sweep{suffix}")
+    pd.testing.assert_frame_equal(
+        load(tmp_path / f"sweep{suffix}"), summaries, check_exact=True
+    )
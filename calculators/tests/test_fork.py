@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from calculators.mortgage_calculator.mortgage_calculator import RateSchedule
+from calculators.smith_calculator.fork import Fork
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+@pytest.mark.parametrize("fork_date", ["2021-08-10", "2024-03-15"])
+def test_unchanged_branch(engine, fork_date):
+    full = make_smith_calculator(n_steps=365 * 6)
+    tracker = full.simulate(engine=engine)
+
+    fork = Fork(make_smith_calculator(n_steps=365 * 6), fork_date, engine=engine)
+    branch = fork.branch("base")
+    pd.testing.assert_frame_equal(branch.tracker, tracker, check_exact=True)
+    assert branch.summary() == full.summary()
+
+
+def test_branches():
+    smith = make_smith_calculator(n_steps=365 * 10)
+    fork = Fork(smith, "2025-01-01")
+    base = fork.branch("base")
+    lump_sum = fork.branch(
+        "lump sum", lambda smith: smith.mortgage.make_lump_sum_payment(20000)
+    )
+    rates_up = fork.branch("rates up", heloc_interest_rate=8.0)
+
+    assert smith.last_day is None
+    assert base.prefix is lump_sum.prefix is rates_up.prefix
+    assert base.prefix["date"].iloc[-1] < fork.fork_date <= base.suffix["date"][0]
+
+    # Same as stopping at the fork date, paying and carrying on
+    scratch = make_smith_calculator(n_steps=365 * 10)
+    scratch.n_steps = (fork.fork_date - scratch.start_date).days
+    tracker = scratch.simulate(engine="event")
+    scratch.mortgage.make_lump_sum_payment(20000)
+    scratch.n_steps = 365 * 10
+    tracker = scratch.resume(engine="event", tracker=tracker)
+    pd.testing.assert_frame_equal(lump_sum.tracker, tracker, check_exact=True)
+
+    summaries = fork.summaries()
+    assert list(summaries.index) == ["base", "lump sum", "rates up"]
+    assert (
+        summaries.loc["lump sum", "final_principle"]
+        < summaries.loc["base", "final_principle"]
+    )
+    # More deductible HELOC interest
+    assert (
+        summaries.loc["rates up", "total_tax_refund"]
+        > summaries.loc["base", "total_tax_refund"]
+    )
+
+
+def test_unknown_parameter():
+    fork = Fork(make_smith_calculator(n_steps=365), "2022-01-01")
+    with pytest.raises(ValueError, match="Unknown branch parameters"):
+        fork.branch("typo", interest_rte=3.0)
+
+
+def test_mortgage_parameters():
+    fork = Fork(make_smith_calculator(n_steps=365 * 3), "2022-01-10")
+    equity = fork.branch("equity", equity_available=800000)
+    mortgage = SmithCalculator.from_state(fork.state).mortgage
+    assert equity.suffix["credit_limit"][0] == round(
+        800000 * 0.8 - equity.suffix["mort_principle"][0], 2
+    )
+    assert equity.suffix["credit_limit"][0] > mortgage.credit_limit
+    first = equity.suffix.iloc[0]
+    assert first["credit_available"] == round(
+        first["credit_limit"] - first["credit_balance"], 2
+    )
+
+    state = make_smith_calculator(n_steps=365 * 3).state()
+    state["mortgage"]["heloc_rate_schedule"] = RateSchedule(
+        {"2021-01-01": 3.5, "2023-01-01": 5.0}
+    ).state()
+    fork = Fork(SmithCalculator.from_state(state), "2022-01-10")
+    with pytest.raises(ValueError, match="heloc_rate_schedule"):
+        fork.branch("rates up", heloc_interest_rate=8.0)
+    fork.branch("rates down", interest_rate=1.0)
@@ -1,6 +1,10 @@
 import pytest
+import numpy as np
 import pandas as pd
-from calculators.investment_calculator.investment_calculator import InvestmentCalculator
+from calculators.investment_calculator.investment_calculator import (
+    InvestmentCalculator,
+    DividendCalendar,
+)
 
 
 def test_buy():
@@ -160,3 +164,64 @@ def test_withdraw_dividends():
 
     with pytest.raises(ValueError):
         investment.withdraw_dividends(10000)
+
+
+def test_next_dividend_date_long_horizon():
+    investment = InvestmentCalculator(
+        balance=100000.0,
+        dividend_yield=10.0,
+        frequency="monthly",
+        dividend_issue_date="2021-10-10",
+    )
+
+    next_date = investment.next_dividend_date("2046-05-09")
+    actual = pd.to_datetime("2046-05-10").date()
+    assert next_date == actual
+
+    next_date = investment.next_dividend_date("2001-02-13")
+    actual = pd.to_datetime("2001-03-12").date()  # Mar 10th is a saturday
+    assert next_date == actual
+
+    investment = InvestmentCalculator(
+        balance=100000.0,
+        dividend_yield=10.0,
+        frequency="semi-annually",
+        dividend_issue_date="2021-10-10",
+    )
+
+    next_date = investment.next_dividend_date("2021-10-12")
+    actual = pd.to_datetime("2022-04-11").date()  # Apr 10th is a sunday
+    assert next_date == actual
+
+    investment = InvestmentCalculator(
+        balance=100000.0,
+        dividend_yield=10.0,
+        frequency="annually",
+        dividend_issue_date="2021-10-10",
+    )
+
+    next_date = investment.next_dividend_date("2021-10-12")
+    actual = pd.to_datetime("2022-10-10").date()
+    assert next_date == actual
+
+
+def test_dividend_calendar():
+    calendar = DividendCalendar.get("monthly", pd.to_datetime("2021-01-31").date())
+    assert calendar is DividendCalendar.get(
+        "monthly", pd.to_datetime("2021-01-31").date()
+    )
+
+    # Day of the month is clamped to the end of shorter months
+    assert calendar.contains(np.datetime64("2021-02-01"))  # Jan 31st is a sunday
+    assert not calendar.contains(np.datetime64("2021-02-26"))
+    assert not calendar.contains(np.datetime64("2021-02-28"))
+    assert calendar.contains(np.datetime64("2021-03-01"))  # Feb 28th is a sunday
+    assert calendar.contains(np.datetime64("2021-03-31"))
+    assert calendar.contains(np.datetime64("2041-02-28"))
+
+    dates = calendar.between(np.datetime64("2021-01-01"), np.datetime64("2022-01-01"))
+    assert len(dates) == 12
+    assert (np.diff(dates) > np.timedelta64(0, "D")).all()
+
+    with pytest.raises(ValueError):
+        DividendCalendar.get("daily", pd.to_datetime("2021-01-31").date())
@@ -0,0 +1,40 @@
+import pandas as pd
+from calculators.smith_calculator.ledger import TaxLedger
+
+
+def make_row(date, interest=0.0, capitalized=0.0, dividends=0.0):
+    return {
+        "date": pd.to_datetime(date),
+        "mort_interest_paid": interest,
+        "interest_capitalized": capitalized,
+        "dividends": dividends,
+    }
+
+
+def test_record():
+    ledger = TaxLedger()
+    ledger.record(make_row("2021-08-31", capitalized=344.17))
+    ledger.record(make_row("2021-09-10", interest=1105.43))
+    ledger.record(make_row("2021-09-15", dividends=527.68))
+    ledger.record(make_row("2022-01-31", capitalized=350.0))
+    ledger.record_tax_refund(2021, 284.6)
+
+    totals = ledger.year(2021)
+    assert totals["interest_capitalized"] == 344.17
+    assert totals["mort_interest_paid"] == 1105.43
+    assert totals["dividends"] == 527.68
+    assert totals["tax_refund"] == 284.6
+
+    assert ledger.year(2022)["interest_capitalized"] == 350.0
+    assert ledger.year(2030) == dict.fromkeys(TaxLedger.columns, 0.0)
+
+
+def test_to_frame():
+    ledger = TaxLedger()
+    ledger.record(make_row("2022-01-31", capitalized=350.0))
+    ledger.record(make_row("2021-08-31", capitalized=344.17))
+
+    df = ledger.to_frame()
+    assert list(df.index) == [2021, 2022]
+    assert list(df.columns) == list(TaxLedger.columns)
+    assert df.loc[2022, "interest_capitalized"] == 350.0
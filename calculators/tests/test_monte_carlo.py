@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from calculators.smith_calculator.monte_carlo import Constant, MeanReverting, MonteCarlo
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import SUMMARY_COLUMNS, simulate_scenario
+
+
+def test_constant_paths_match_simulate():
+    params = dict(payment_frequency="monthly", dividend_yield=6.0, n_steps=365 * 6)
+    summaries = MonteCarlo(make_smith_calculator(**params), n_paths=3).run()
+    summary, _ = simulate_scenario(params)
+
+    assert list(summaries.columns) == SUMMARY_COLUMNS + ["error"]
+    assert len(summaries) == 3
+    for column in SUMMARY_COLUMNS + ["error"]:
+        for value in summaries[column]:
+            assert (
+                value == summary[column] or pd.isna(value) and pd.isna(summary[column])
+            )
+
+
+def test_failed_paths():
+    smith = make_smith_calculator(
+        principle=50000,
+        equity_available=250000,
+        dividend_yield=0.0,
+        marginal_tax_rate=90.0,
+        n_steps=365 * 2,
+    )
+    heloc_rates = MeanReverting(
+        3.0, 3.0, 0.0, 0.0, shock_probability=0.5, shock_size=30.0
+    )
+    summaries = MonteCarlo(
+        smith, heloc_interest_rate=heloc_rates, n_paths=20, seed=0
+    ).run()
+
+    failed = summaries["error"].notna()
+    assert failed.any()
+    assert summaries.loc[failed, "net_worth"].isna().all()
+    assert summaries.loc[~failed, "net_worth"].notna().all()
+
+
+def test_seeded_paths():
+    smith = make_smith_calculator(n_steps=365 * 10)
+    models = dict(
+        interest_rate=MeanReverting(2.74, 5.0, 0.05, 0.2),
+        dividend_yield=MeanReverting(4.45, 4.0, 0.1, 0.1, 0.02, -1.5),
+    )
+    first = MonteCarlo(smith, n_paths=50, seed=42, chunk_size=20, **models).run()
+    second = MonteCarlo(smith, n_paths=50, seed=42, chunk_size=20, **models).run()
+    other = MonteCarlo(smith, n_paths=50, seed=43, chunk_size=20, **models).run()
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first["net_worth"].equals(other["net_worth"])
+    assert first["net_worth"].nunique() > 1
+
+
+def test_mean_reverting_paths():
+    model = MeanReverting(2.0, 5.0, 0.5, 0.0, floor=1.0)
+    paths = model.paths(np.random.default_rng(0), 2, 4)
+    np.testing.assert_allclose(paths, [[2.0, 3.5, 4.25, 4.625]] * 2)
+    assert (
+        MeanReverting(2.0, 0.0, 0.0, 5.0, floor=1.0).paths(
+            np.random.default_rng(0), 10, 12
+        )
+        >= 1.0
+    ).all()
+    assert (Constant(3.0).paths(None, 2, 3) == 3.0).all()
+
+
+def test_distribution():
+    summaries = pd.DataFrame(
+        {
+            "payoff_date": pd.to_datetime(
+                ["2030-01-01", "2031-01-01", None, "2032-01-01", None]
+            ),
+            "net_worth": [1.0, 2.0, 3.0, 4.0, np.nan],
+            "error": [None, None, None, None, "failed"],
+        }
+    )
+    distribution = MonteCarlo.distribution(summaries, quantiles=[0.0, 0.5, 1.0])
+
+    assert list(distribution["payoff_date"]) == [
+        pd.Timestamp("2030-01-01"),
+        pd.Timestamp("2032-01-01"),
+        pd.NaT,
+    ]
+    assert list(distribution["net_worth"]) == [1.0, 2.5, 4.0]
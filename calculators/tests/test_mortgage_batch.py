@@ -0,0 +1,75 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from calculators.mortgage_calculator.mortgage_batch import MortgageBatch
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+
+
+@pytest.fixture
+def grid():
+    rows = list(
+        itertools.product(
+            [125000.37, 486888.03, 1999999.99],
+            [300, 329],
+            [0.99, 2.74, 4.5, 7.25],
+            list(MortgageCalculator.payment_periods),
+        )
+    )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "principle",
+            "amortization_months",
+            "interest_rate",
+            "payment_frequency",
+        ],
+    ).assign(equity_available=795000.0, heloc_interest_rate=2.95)
+
+
+def make_calculator(row):
+    return MortgageCalculator(
+        principle=row.principle,
+        equity_available=row.equity_available,
+        amortization_months=row.amortization_months,
+        interest_rate=row.interest_rate,
+        heloc_interest_rate=row.heloc_interest_rate,
+        payment_freqency=row.payment_frequency,
+        last_payment_date="2021-08-10",
+    )
+
+
+def test_matches_calculator(grid):
+    batch = MortgageBatch.from_frame(grid.assign(last_payment_date="2021-08-10"))
+    quote = batch.quote()
+    assert len(quote) == len(grid)
+    for row, calculator in zip(quote.itertuples(), batch.calculators()):
+        expected = make_calculator(row)
+        assert row.payment_amount == expected.payment_amount
+        assert row.periodic_factor == expected.periodic_interest_factor()
+        assert row.credit_limit == expected.credit_limit
+        assert calculator.state() == expected.state()
+
+    monthly = batch.calculate_payment_amount("monthly")
+    for row, amount in zip(grid.itertuples(), monthly):
+        assert amount == make_calculator(row).calculate_payment_amount("monthly")
+
+
+def test_broadcast():
+    batch = MortgageBatch(
+        principle=[400000, 500000],
+        equity_available=800000,
+        amortization_months=300,
+        interest_rate=np.array([2.5, 3.5]),
+        payment_frequency="bi-weekly",
+    )
+    assert len(batch) == 2
+    assert len(batch[1:]) == 1
+    assert batch[1:].interest_rate[0] == 3.5
+    np.testing.assert_array_equal(
+        batch.calculate_heloc_credit_limit(), [240000.0, 140000.0]
+    )
+    with pytest.raises(ValueError, match="last_payment_date"):
+        batch.calculator(0)
+    with pytest.raises(ValueError, match="Unknown payment frequencies"):
+        MortgageBatch(400000, 800000, 300, 2.5, payment_frequency="daily")
@@ -1,6 +1,14 @@
 import pytest
+import numpy as np
 import pandas as pd
-from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.days import to_day
+from calculators.mortgage_calculator.mortgage_calculator import (
+    MortgageCalculator,
+    RateSchedule,
+    amortize,
+    periodic_interest_factor,
+    round_cents,
+)
 
 
 @pytest.fixture
@@ -263,3 +271,211 @@ def test_capitalize_heloc_interest(this_mortgage):
     mortgage.draw_from_heloc(129900)
     with pytest.raises(ValueError):
         mortgage.capitalize_heloc_interest()
+
+
+def test_mortgage_payment_date_long_horizon():
+    mortgage = MortgageCalculator(
+        principle=500000,
+        equity_available=500000 / 0.8,
+        amortization_months=25 * 12,
+        interest_rate=2.5,
+        heloc_interest_rate=3.0,
+        payment_freqency="monthly",
+        last_payment_date="2021-01-31",
+    )
+
+    # Day of the month is clamped to the end of shorter months
+    due_date = mortgage.mortgage_payment_date("2021-02-01")
+    actual = pd.to_datetime("2021-02-28")
+    assert due_date == actual
+
+    due_date = mortgage.mortgage_payment_date("2046-03-01")
+    actual = pd.to_datetime("2046-03-31")
+    assert due_date == actual
+
+    mortgage = MortgageCalculator(
+        principle=500000,
+        equity_available=500000 / 0.8,
+        amortization_months=25 * 12,
+        interest_rate=2.5,
+        heloc_interest_rate=3.0,
+        payment_freqency="bi-weekly",
+        last_payment_date="2021-08-10",
+    )
+
+    due_date = mortgage.mortgage_payment_date("2046-08-10")
+    actual = pd.to_datetime("2021-08-10") + pd.Timedelta(days=14 * 653)
+    assert due_date == actual
+
+
+def test_is_mortgage_payment_date(this_mortgage):
+    mortgage = this_mortgage
+
+    assert mortgage.is_mortgage_payment_date("2021-08-10")
+    assert not mortgage.is_mortgage_payment_date("2021-08-11")
+    assert mortgage.is_mortgage_payment_date("2021-08-24")
+    assert mortgage.is_mortgage_payment_date("2031-08-12")
+    assert not mortgage.is_mortgage_payment_date("2031-08-13")
+
+
+@pytest.mark.parametrize("payment_frequency", ["monthly", "weekly"])
+def test_payment_days(payment_frequency):
+    mortgage = MortgageCalculator(
+        principle=500000,
+        equity_available=800000,
+        amortization_months=25 * 12,
+        interest_rate=2.5,
+        heloc_interest_rate=3.0,
+        payment_freqency=payment_frequency,
+        last_payment_date="2021-01-31",
+    )
+
+    for date in pd.date_range("2020-12-01", "2023-12-31"):
+        day = to_day(date)
+        assert mortgage.is_payment_day(day) == mortgage.is_mortgage_payment_date(date)
+        assert mortgage.is_heloc_payment_day(day) == (
+            date == mortgage.heloc_payment_date(date)
+        )
+
+    mortgage.last_payment_date = "2021-02-01"
+    assert mortgage.is_payment_day(to_day("2021-02-01"))
+    assert not mortgage.is_payment_day(to_day("2021-01-31"))
+
+
+def test_payment_schedule(this_mortgage):
+    mortgage = this_mortgage
+
+    dates = mortgage.payment_schedule(until="2022-08-10")
+    assert dates[0] == np.datetime64("2021-08-10")
+    assert dates[-1] >= np.datetime64("2022-08-10")
+    assert (np.diff(dates) == np.timedelta64(14, "D")).all()
+
+    dates = mortgage.payment_schedule("monthly", until="2022-08-10")
+    assert dates[1] == np.datetime64("2021-09-10")
+
+
+def test_round_cents():
+    values = np.array([2.675, 1.005, 0.125, -1.235, 1033.77, 12345678.905])
+    predicted = round_cents(values)
+    actual = [round(value, 2) for value in values]
+    assert list(predicted) == actual
+
+
+def test_amortization_schedule():
+    for freq in MortgageCalculator.payment_periods:
+        mortgage = MortgageCalculator(
+            principle=500000,
+            equity_available=500000 / 0.8,
+            amortization_months=25 * 12,
+            interest_rate=2.5,
+            heloc_interest_rate=3.0,
+            payment_freqency=freq,
+            last_payment_date="2021-08-10",
+        )
+        schedule = mortgage.amortization_schedule()
+
+        # Step through the same payments one at a time
+        for row in schedule.head(30).itertuples():
+            interest, principle = mortgage.calculate_interest_and_principle()
+            mortgage.make_regular_payment()
+            assert row.interest == interest and row.principle == principle
+            assert row.balance == mortgage.principle
+            assert row.payment == mortgage.payment_amount
+
+        assert schedule["balance"].iloc[-1] == 0
+        assert schedule["principle"].sum() == pytest.approx(500000)
+        assert schedule["cumulative_interest"].iloc[-1] == pytest.approx(
+            schedule["interest"].sum()
+        )
+        assert schedule["date"].iloc[0] == mortgage.mortgage_payment_date("2021-08-11")
+
+    mortgage = MortgageCalculator(
+        principle=500000,
+        equity_available=500000 / 0.8,
+        amortization_months=25 * 12,
+        interest_rate=2.5,
+        heloc_interest_rate=3.0,
+        payment_freqency="monthly",
+        last_payment_date="2021-08-10",
+    )
+    schedule = mortgage.amortization_schedule()
+    # The payment is rounded down, leaving a small final payment
+    assert len(schedule) == 301
+    assert schedule["date"].iloc[-1] == pd.to_datetime("2046-09-10")
+    assert schedule["payment"].iloc[-1] == 0.56
+
+    schedule = mortgage.amortization_schedule("weekly")
+    assert schedule["payment"].iloc[0] == 516.88
+
+
+def test_amortize():
+    interest, principle, balance, n_payments = amortize(
+        [0.0, 100.0, 200.0], [50.0, 50.0, 50.0], 0.01
+    )
+    assert list(n_payments) == [0, 3, 5]
+    assert interest.shape == (5, 3)
+    assert (balance[-1] == 0).all()
+    assert list(principle[:3, 1]) == pytest.approx([49.0, 49.49, 1.51])
+
+    with pytest.raises(ValueError):
+        amortize([100000.0], [50.0], 0.01)
+
+
+def test_rate_schedule():
+    schedule = RateSchedule([("2024-01-01", 4.0), ("2021-01-01", 2.5)])
+    assert schedule.days == [to_day("2021-01-01"), to_day("2024-01-01")]
+    assert schedule.rate(to_day("2019-06-01")) == 2.5
+    assert schedule.rate(to_day("2023-12-31")) == 2.5
+    assert schedule.rate(to_day("2024-01-01")) == 4.0
+    assert schedule.next_change(to_day("2021-01-01")) == to_day("2024-01-01")
+    assert schedule.next_change(to_day("2024-01-01")) is None
+    assert schedule.periodic_factor(
+        to_day("2030-01-01"), "monthly"
+    ) == periodic_interest_factor(4.0, "monthly")
+    assert RateSchedule.from_state(schedule.state()).rates == schedule.rates
+
+    with pytest.raises(ValueError):
+        RateSchedule({})
+
+
+def test_renew(this_mortgage):
+    for _ in range(100):
+        this_mortgage.make_regular_payment()
+    months = this_mortgage.remaining_amortization_months()
+    assert 25 * 12 - 100 * 12 / 26 - 1 < months < 25 * 12 - 100 * 12 / 26
+
+    this_mortgage.renew(5.0)
+    assert this_mortgage.interest_rate == 5.0
+    assert this_mortgage.payment_amount > 1000
+    assert this_mortgage.remaining_amortization_months() == pytest.approx(months, 0.01)
+
+
+def test_mortgage_rate_schedule():
+    mortgage = MortgageCalculator(
+        principle=500000,
+        equity_available=800000,
+        amortization_months=25 * 12,
+        interest_rate=2.5,
+        heloc_interest_rate=3.0,
+        payment_freqency="monthly",
+        last_payment_date="2021-08-10",
+        rate_schedule={"2021-01-01": 2.0, "2022-01-01": 3.0},
+        heloc_rate_schedule={"2021-01-01": 3.5},
+    )
+    # The rates in effect on the last payment date
+    assert mortgage.interest_rate == 2.0
+    assert mortgage.heloc_interest_rate == 3.5
+    assert mortgage.payment_amount == mortgage.calculate_payment_amount()
+    payment_amount = mortgage.payment_amount
+
+    mortgage.update_rates(to_day("2021-12-31"))
+    assert mortgage.payment_amount == payment_amount
+    mortgage.update_rates(to_day("2022-01-05"))
+    assert mortgage.interest_rate == 3.0
+    assert mortgage.payment_amount > payment_amount
+    assert mortgage.periodic_interest_factor() == periodic_interest_factor(
+        3.0, "monthly"
+    )
+
+    restored = MortgageCalculator.from_state(mortgage.state())
+    assert restored.state() == mortgage.state()
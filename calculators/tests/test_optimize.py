@@ -0,0 +1,149 @@
+import math
+import pytest
+from calculators.smith_calculator.optimize import (
+    Optimizer,
+    net_worth,
+    optimize,
+    payoff,
+)
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import sweep
+
+
+def test_grid_search():
+    best, score = optimize(
+        "net_worth",
+        {"top_up": (0, 4000)},
+        rounds=1,
+        stages=(1.0,),
+        workers=1,
+        n_steps=365 * 5,
+    )
+    summaries = sweep(
+        {"top_up": [0, 1000, 2000, 3000, 4000]}, workers=1, n_steps=365 * 5
+    )
+    expected = summaries.loc[summaries["net_worth"].idxmax()]
+    assert best == {"top_up": expected["top_up"]}
+    assert score == expected["net_worth"]
+
+
+def test_stages():
+    candidates = [{"draw_threshold": value} for value in [0, 5000, 20000, 80000]]
+    full = Optimizer("net_worth", {}, stages=(1.0,), workers=1, n_steps=365 * 4)
+    expected = full.evaluate(candidates)
+
+    # Resuming between stages gives the same scores; the candidates are
+    # close after 30% of the horizon so none is dropped
+    staged = Optimizer("net_worth", {}, stages=(0.3, 1.0), workers=1, n_steps=365 * 4)
+    assert staged.evaluate(candidates) == expected
+    assert staged.simulations == 8
+
+    # Without tolerance only the two tied best reach the horizon
+    strict = Optimizer(
+        "net_worth", {}, stages=(0.3, 1.0), tolerance=0, workers=1, n_steps=365 * 4
+    )
+    scores = strict.evaluate(candidates)
+    assert strict.simulations == 6
+    assert sum(math.isfinite(score) for score in scores) == 2
+    assert max(scores) == max(expected)
+
+
+def test_pruning():
+    # Smaller payments leave far more principle after a quarter of the horizon
+    candidates = [{"payment_amount": value} for value in [1000.0, 1500.0, 2000.0]]
+    optimizer = Optimizer("payoff", {}, workers=1, n_steps=365 * 25)
+    scores = optimizer.evaluate(candidates)
+    assert optimizer.simulations == 5
+    assert scores[:2] == [-math.inf, -math.inf]
+    smith = make_smith_calculator(payment_amount=2000.0, n_steps=365 * 25)
+    smith.run(engine="event")
+    assert scores[2] == payoff(smith)
+
+
+def test_payoff_score():
+    smith = make_smith_calculator(payment_amount=2000.0, n_steps=365 * 25)
+    smith.run(engine="event")
+    assert payoff(smith) == -(smith.payoff_date - smith.start_date).days
+
+    # Not paid off yet: days so far plus the bi-weekly payments left
+    smith = make_smith_calculator(payment_amount=2000.0, n_steps=365)
+    smith.run(engine="event")
+    payments = smith.mortgage.principle / 2000.0
+    assert payoff(smith) == pytest.approx(-(365 + payments * 365.25 / 26))
+
+    # Scores are days, so the tolerance is a share of the days to payoff:
+    # 1950 is about 100 days (3%) behind 2000 after a quarter of the horizon
+    # and 1900 about 210 days (6%)
+    candidates = [{"payment_amount": value} for value in [1900.0, 1950.0, 2000.0]]
+    for tolerance, survivors in [(0.01, 1), (0.05, 2), (0.1, 3)]:
+        optimizer = Optimizer(
+            "payoff",
+            {},
+            stages=(0.25, 1.0),
+            tolerance=tolerance,
+            workers=1,
+            n_steps=365 * 25,
+        )
+        scores = optimizer.evaluate(candidates)
+        assert optimizer.simulations == 3 + survivors
+        assert sum(math.isfinite(score) for score in scores) == survivors
+
+
+def _late_winner(smith):
+    # A penalty on top_up showing only at the horizon: no top up scores
+    # worst until then, and best at the end
+    score = net_worth(smith)
+    if smith.n_steps == 365 * 4:
+        score -= smith.top_up * 10
+    return score
+
+
+def test_late_winner():
+    candidates = [{"top_up": value} for value in [0, 1000, 2000, 3000, 4000]]
+    optimizer = Optimizer(_late_winner, {}, workers=1, n_steps=365 * 4)
+    scores = optimizer.evaluate(candidates)
+    assert optimizer.simulations == 15
+    assert max(range(5), key=scores.__getitem__) == 0
+
+
+def test_refinement():
+    optimizer = Optimizer(
+        "payoff",
+        {"payment_amount": (1000.0, 2000.0)},
+        points=3,
+        rounds=3,
+        workers=2,
+        n_steps=365 * 25,
+    )
+    best, score = optimizer.run()
+    # Larger payments pay off sooner
+    assert best == {"payment_amount": 2000.0}
+    smith = make_smith_calculator(payment_amount=2000.0, n_steps=365 * 25)
+    smith.run(engine="event")
+    assert score == payoff(smith)
+
+    history = optimizer.history_frame()
+    assert list(history["round"].unique()) == [0, 1, 2]
+    # Candidates of earlier rounds are not simulated again
+    assert not history["payment_amount"].duplicated().any()
+
+
+def test_failing_candidates():
+    # A 0% rate has no payment amount; the other rates carry on
+    optimizer = Optimizer(
+        "net_worth",
+        {"interest_rate": (0.0, 4.0)},
+        points=3,
+        rounds=1,
+        workers=2,
+        n_steps=365 * 2,
+    )
+    best, score = optimizer.run()
+    history = optimizer.history_frame()
+    assert history["score"].tolist()[0] == -math.inf
+    assert math.isfinite(score) and best["interest_rate"] in (2.0, 4.0)
+
+
+def test_unknown_parameter():
+    with pytest.raises(ValueError, match="Unknown scenario parameters"):
+        Optimizer("net_worth", {"draw": (0, 1)})
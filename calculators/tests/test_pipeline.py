@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+from calculators.smith_calculator.pipeline import main, run_pipeline
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import SUMMARY_COLUMNS
+
+CLIENTS = pd.DataFrame(
+    {
+        "client": ["A", "B", "C", "D", "E"],
+        "principle": [300000.0, 450000.0, None, 200000.0, 350000.0],
+        "interest_rate": [2.5, 4.0, 3.0, 5.0, 3.5],
+        "payment_frequency": ["monthly", "bi-weekly", "weekly", "yearly", "monthly"],
+        "n_steps": [730, 730, None, 730, 730],
+        "advisor": ["x", "y", "x", "y", "x"],
+    }
+)
+
+
+def test_run_pipeline(tmp_path):
+    path = tmp_path / "clients.csv"
+    CLIENTS.to_csv(path, index=False)
+    progress = []
+    totals = run_pipeline(
+        path,
+        tmp_path / "summaries.csv",
+        chunksize=2,
+        workers=1,
+        id_column="client",
+        progress=lambda *args: progress.append(args),
+        n_steps=365,
+    )
+    assert totals["rows"] == 5
+    assert totals["failed"] == 1
+    assert [rows for rows, _, _ in progress] == [2, 4, 5]
+
+    summaries = pd.read_csv(tmp_path / "summaries.csv", index_col="row")
+    assert list(summaries.columns) == ["client"] + SUMMARY_COLUMNS + ["error"]
+    assert summaries["client"].tolist() == CLIENTS["client"].tolist()
+    assert "yearly" in summaries.loc[3, "error"]
+    assert summaries.drop(index=3)["error"].isna().all()
+
+    # Empty cells take the base parameters
+    smith = make_smith_calculator(
+        interest_rate=3.0, payment_frequency="weekly", n_steps=365
+    )
+    smith.run(engine="event")
+    assert summaries.loc[2, "net_worth"] == pytest.approx(smith.summary()["net_worth"])
+
+
+def test_pipeline_workers(tmp_path):
+    path = tmp_path / "clients.csv"
+    CLIENTS.to_csv(path, index=False)
+    run_pipeline(path, tmp_path / "serial.csv", chunksize=3, workers=1)
+    run_pipeline(path, tmp_path / "parallel.csv", chunksize=3, workers=2)
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "serial.csv"), pd.read_csv(tmp_path / "parallel.csv")
+    )
+
+
+def test_bad_cell(tmp_path):
+    path = tmp_path / "clients.csv"
+    CLIENTS.assign(interest_rate=["2.5", "abc", "3.0", "5.0", "3.5"]).to_csv(
+        path, index=False
+    )
+    summaries = []
+    for chunksize in (1, 2, 5):
+        output = tmp_path / f"summaries_{chunksize}.csv"
+        run_pipeline(path, output, chunksize=chunksize, workers=1, n_steps=365)
+        summaries.append(pd.read_csv(output, index_col="row"))
+        pd.testing.assert_frame_equal(summaries[-1], summaries[0])
+
+    # Only the bad row fails, whatever shares its chunk
+    errors = summaries[0]["error"]
+    assert errors[1] == "ValueError: interest_rate is not a number: 'abc'"
+    assert errors.notna().tolist() == [False, True, False, True, False]
+
+
+def test_failing_rows(tmp_path):
+    path = tmp_path / "clients.csv"
+    CLIENTS.assign(
+        interest_rate=[2.5, 0.0, 3.0, 5.0, 3.5],
+        amortization_months=[300, 300, 300, 300, 0],
+    ).to_csv(path, index=False)
+    for workers in (1, 2):
+        output = tmp_path / f"summaries_{workers}.csv"
+        totals = run_pipeline(path, output, chunksize=5, workers=workers, n_steps=365)
+        assert totals["failed"] == 3
+        errors = pd.read_csv(output, index_col="row")["error"]
+        assert "0% interest rate" in errors[1]
+        assert "Amortization months" in errors[4]
+        assert errors.notna().tolist() == [False, True, False, True, True]
+
+
+def test_pipeline_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    from calculators.smith_calculator.export import read_parquet
+
+    path = tmp_path / "clients.parquet"
+    CLIENTS.to_parquet(path)
+    run_pipeline(path, tmp_path / "summaries.parquet", chunksize=2, workers=1)
+    summaries = read_parquet(tmp_path / "summaries.parquet")
+    assert summaries.index.tolist() == list(range(5))
+    assert summaries["error"].notna().tolist() == [False, False, False, True, False]
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / "clients.csv"
+    CLIENTS.to_csv(path, index=False)
+    output = tmp_path / "summaries.csv"
+    assert main([str(path), str(output), "--workers", "1", "--chunksize", "2"]) == 0
+    assert "done: 5 rows, 1 failed" in capsys.readouterr().err
+    assert len(pd.read_csv(output)) == 5
+
+    with pytest.raises(SystemExit):
+        main([str(path), str(output), "--id-column", "missing"])
+    config = tmp_path / "base.json"
+    config.write_text('{"interest_rate": "high"}')
+    for config in (tmp_path / "missing.json", config):
+        with pytest.raises(SystemExit) as exit:
+            main([str(path), str(output), "--config", str(config)])
+        assert exit.value.code == 2
+        assert capsys.readouterr().err.startswith("smith-batch: error: ")
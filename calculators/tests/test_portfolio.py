@@ -0,0 +1,134 @@
+import datetime
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from calculators.investment_calculator.investment_calculator import (
+    InvestmentCalculator,
+)
+from calculators.investment_calculator.portfolio import Portfolio
+from calculators.smith_calculator.batch import SmithBatch
+from calculators.smith_calculator.fork import Fork
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.smith_calculator import SmithCalculator
+
+HOLDINGS = pd.DataFrame(
+    {
+        "name": ["XEI", "ZDV", "VDY", "XIU"],
+        "dividend_yield": [5.5, 4.2, 4.6, 2.9],
+        "frequency": ["monthly", "monthly", "monthly", "quarterly"],
+        "dividend_issue_date": pd.to_datetime(
+            ["2021-01-25", "2021-01-29", "2021-01-08", "2021-03-31"]
+        ),
+        "weight": [0.4, 0.3, 0.2, 0.1],
+    }
+)
+
+
+def make_smith(investment, n_steps=365 * 5):
+    smith = make_smith_calculator(initial_draw=0, n_steps=n_steps)
+    smith.investment = investment
+    smith.mortgage.draw_from_heloc(140000)
+    investment.buy(140000)
+    return smith
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+def test_single_holding_matches_investment(engine):
+    portfolio = Portfolio(["XEI"], 4.45, "monthly", "2021-08-15")
+    tracker = make_smith(portfolio, n_steps=365 * 25).simulate(engine=engine)
+    expected = make_smith_calculator().simulate(engine=engine)
+    pd.testing.assert_frame_equal(tracker, expected, check_exact=True)
+
+
+def test_merged_dividends():
+    portfolio = Portfolio.from_frame(HOLDINGS, balance=10000.0)
+    investments = [
+        InvestmentCalculator(10000.0, *row)
+        for row in HOLDINGS[
+            ["dividend_yield", "frequency", "dividend_issue_date"]
+        ].itertuples(index=False)
+    ]
+    dates = portfolio.dividend_dates("2021-01-01", "2023-12-31")
+    expected = np.unique(
+        np.concatenate(
+            [
+                investment.dividend_dates("2021-01-01", "2023-12-31")
+                for investment in investments
+            ]
+        )
+    )
+    assert np.array_equal(dates, expected)
+
+    for date in pd.date_range("2021-01-01", "2023-12-31"):
+        portfolio.issue_dividend(date)
+        for investment in investments:
+            investment.issue_dividend(date)
+    total = sum(investment.dividend_balance for investment in investments)
+    assert portfolio.dividend_balance == pytest.approx(total, abs=1e-6)
+    assert portfolio.next_dividend_date("2021-01-26") == datetime.date(2021, 1, 29)
+
+
+def test_allocation():
+    portfolio = Portfolio.from_frame(HOLDINGS)
+    portfolio.buy(1000)
+    assert portfolio.balances.tolist() == pytest.approx([400, 300, 200, 100])
+    assert portfolio.balance == pytest.approx(1000)
+    portfolio.sell(500)
+    assert portfolio.balances.tolist() == pytest.approx([200, 150, 100, 50])
+
+    portfolio = Portfolio.from_frame(
+        HOLDINGS.assign(balance=[0.0, 300.0, 200.0, 100.0]), allocation="rebalance"
+    )
+    portfolio.buy(400)
+    assert portfolio.balances.tolist() == pytest.approx([400, 300, 200, 100])
+    assert portfolio.dividend_yield == pytest.approx(
+        np.average(HOLDINGS["dividend_yield"], weights=HOLDINGS["weight"])
+    )
+
+    with pytest.raises(ValueError):
+        portfolio.sell(2000)
+    with pytest.raises(ValueError):
+        portfolio.buy(-1)
+    with pytest.raises(ValueError):
+        Portfolio.from_frame(HOLDINGS, allocation="momentum")
+
+
+def test_simulate_portfolio():
+    daily = make_smith(Portfolio.from_frame(HOLDINGS)).simulate(engine="daily")
+    smith = make_smith(Portfolio.from_frame(HOLDINGS))
+    event = smith.simulate(engine="event")
+    pd.testing.assert_frame_equal(daily, event, check_exact=True)
+    assert smith.investment.balances.argmax() == 0
+
+    # Resume from a state passed through JSON, as checkpoints do
+    half = make_smith(Portfolio.from_frame(HOLDINGS))
+    half.n_steps = 365 * 2
+    prefix = half.simulate(engine="event")
+    resumed = SmithCalculator.from_state(json.loads(json.dumps(half.state())))
+    assert isinstance(resumed.investment, Portfolio)
+    portfolio = Portfolio.from_frame(HOLDINGS)
+    assert portfolio.load_state(half.investment.state()).state() == (
+        half.investment.state()
+    )
+    resumed.n_steps = 365 * 5
+    tracker = resumed.resume(engine="event", tracker=prefix)
+    pd.testing.assert_frame_equal(tracker, event, check_exact=True)
+
+    with pytest.raises(ValueError):
+        SmithBatch([smith])
+
+
+def test_fork_portfolio():
+    fork = Fork(
+        make_smith(Portfolio.from_frame(HOLDINGS), n_steps=365 * 3), "2022-06-01"
+    )
+    with pytest.raises(ValueError, match="Portfolio"):
+        fork.branch("yield up", dividend_yield=6.0)
+
+    def raise_yields(smith):
+        smith.investment.dividend_yields += 1.0
+
+    base = fork.branch("base", heloc_interest_rate=3.0)
+    higher = fork.branch("yield up", raise_yields, heloc_interest_rate=3.0)
+    assert higher.summary()["net_worth"] > base.summary()["net_worth"]
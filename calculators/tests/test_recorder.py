@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from calculators.smith_calculator.recorder import Recorder
+
+
+def make_row(i):
+    row = {column: float(i) for column in Recorder.columns}
+    row["date"] = pd.to_datetime("2021-08-17") + pd.Timedelta(days=i)
+    row["event"] = True
+    return row
+
+
+def test_append_grows():
+    recorder = Recorder(capacity=2)
+    for i in range(5):
+        recorder.append(make_row(i))
+
+    assert len(recorder) == 5
+    assert recorder.capacity == 8
+    assert (recorder.column("credit_balance") == np.arange(5.0)).all()
+
+
+def test_to_frame():
+    recorder = Recorder()
+    for i in range(3):
+        recorder.append(make_row(i))
+
+    df = recorder.to_frame()
+    assert list(df.columns) == list(Recorder.columns)
+    assert [str(dtype) for dtype in df.dtypes] == list(Recorder.columns.values())
+    assert df["date"].iloc[-1] == pd.to_datetime("2021-08-19")
+
+    # The frame does not share memory with the recorder
+    recorder.append(make_row(3))
+    recorder.column("dividends")[0] = 100.0
+    assert df["dividends"].iloc[0] == 0.0
+    assert len(df) == 3
@@ -0,0 +1,35 @@
+import pytest
+from calculators.smith_calculator.scenario import (
+    DEFAULT_SCENARIO,
+    expand_grid,
+    make_smith_calculator,
+    scenario_params,
+)
+
+
+def test_scenario_params():
+    params = scenario_params(interest_rate=3.0)
+    assert params["interest_rate"] == 3.0
+    assert params["principle"] == DEFAULT_SCENARIO["principle"]
+
+    with pytest.raises(ValueError):
+        scenario_params(interest=3.0)
+
+
+def test_make_smith_calculator():
+    smith = make_smith_calculator(payment_frequency="monthly", n_steps=365)
+    assert smith.mortgage.payment_frequency == "monthly"
+    assert smith.mortgage.credit_balance == DEFAULT_SCENARIO["initial_draw"]
+    assert smith.investment.balance == DEFAULT_SCENARIO["initial_draw"]
+    assert smith.n_steps == 365
+
+
+def test_expand_grid():
+    grid = expand_grid(
+        {"interest_rate": [2.0, 3.0], "dividend_yield": [4.0, 5.0, 6.0]},
+        n_steps=365,
+    )
+    assert len(grid) == 6
+    assert grid[0]["interest_rate"] == 2.0 and grid[0]["dividend_yield"] == 4.0
+    assert grid[-1]["interest_rate"] == 3.0 and grid[-1]["dividend_yield"] == 6.0
+    assert all(params["n_steps"] == 365 for params in grid)
@@ -1,2 +1,155 @@
 import pytest
+import pandas as pd
 from calculators.smith_calculator.smith_calculator import SmithCalculator
+from calculators.mortgage_calculator.mortgage_calculator import MortgageCalculator
+from calculators.investment_calculator.investment_calculator import InvestmentCalculator
+
+
+def make_smith(
+    payment_frequency="bi-weekly",
+    n_steps=365 * 3,
+    rate_schedule=None,
+    heloc_rate_schedule=None,
+    **kwargs,
+):
+    mortgage = MortgageCalculator(
+        principle=486888.03,
+        equity_available=795000,
+        amortization_months=329,
+        interest_rate=2.74,
+        heloc_interest_rate=2.95,
+        payment_freqency=payment_frequency,
+        last_payment_date="2021-08-10",
+        rate_schedule=rate_schedule,
+        heloc_rate_schedule=heloc_rate_schedule,
+    )
+    investment = InvestmentCalculator(0, 4.45, "monthly", "2021-08-15")
+    mortgage.draw_from_heloc(140000)
+    investment.buy(140000)
+
+    return SmithCalculator(
+        mortgage=mortgage,
+        investment=investment,
+        start_date="2021-08-17",
+        n_steps=n_steps,
+        marginal_tax_rate=40.5,
+        dividend_tax_rate=(40.5 - 15.0198 - 11),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    "payment_frequency", list(MortgageCalculator.payment_periods.keys())
+)
+def test_event_engine_matches_daily(payment_frequency):
+    daily = make_smith(payment_frequency).simulate(engine="daily")
+    event = make_smith(payment_frequency).simulate(engine="event")
+
+    pd.testing.assert_frame_equal(daily, event)
+
+
+def test_event_dates():
+    smith = make_smith("monthly", n_steps=60)
+    dates = list(smith.event_dates())
+
+    assert dates[0] == pd.to_datetime("2021-08-17")
+    assert pd.to_datetime("2021-08-31") in dates  # HELOC interest
+    assert pd.to_datetime("2021-09-10") in dates  # Mortgage payment
+    assert pd.to_datetime("2021-09-15") in dates  # Dividend
+    assert dates == sorted(set(dates))
+    assert dates[-1] <= pd.to_datetime("2021-10-15")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        make_smith().simulate(engine="weekly")
+
+
+def test_ledger_matches_tracker():
+    smith = make_smith()
+    tracker = smith.simulate(engine="event")
+
+    ledger = smith.ledger.to_frame()
+    by_year = tracker.groupby(tracker["date"].dt.year)[
+        ["mort_interest_paid", "interest_capitalized", "dividends"]
+    ].sum()
+    pd.testing.assert_frame_equal(
+        ledger[by_year.columns],
+        by_year,
+        check_names=False,
+        check_index_type=False,
+        rtol=0,
+        atol=1e-6,
+    )
+    assert ledger.loc[2021, "tax_refund"] > 0
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+def test_simulate_iter(engine):
+    tracker = make_smith().simulate(engine=engine)
+
+    rows = pd.DataFrame(list(make_smith().simulate_iter(engine=engine)))
+    pd.testing.assert_frame_equal(rows, tracker, check_dtype=False)
+
+    chunks = list(make_smith().simulate_iter(engine=engine, chunk_size=50))
+    assert [len(chunk) for chunk in chunks[:-1]] == [50] * (len(chunks) - 1)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), tracker)
+
+
+def test_simulate_iter_stops_early():
+    smith = make_smith(n_steps=365 * 25)
+    rows = smith.simulate_iter(engine="event")
+    for row in rows:
+        if row["investment_balance"] > 200000:
+            break
+    rows.close()
+
+    assert row["date"] < pd.to_datetime("2030-01-01")
+    assert smith.ledger.year(row["date"].year + 1)["dividends"] == 0
+
+
+def test_profile():
+    tracker = make_smith().simulate(engine="event")
+
+    smith = make_smith()
+    profiled, stats = smith.simulate(engine="event", profile=True)
+    pd.testing.assert_frame_equal(profiled, tracker)
+    assert smith.stats is None
+
+    assert stats.calls["mortgage"] == stats.steps
+    assert stats.events["mortgage"] == (tracker["mort_principle_paid"] > 0).sum()
+    assert stats.events["dividends"] == (tracker["dividends"] > 0).sum()
+    assert stats.events["tax_refund"] == 3
+    assert stats.calls["record"] == len(tracker)
+    assert stats.peak_tracker_bytes >= tracker.memory_usage(index=False).sum()
+    assert 0 < sum(stats.seconds.values()) <= stats.total_seconds
+    assert list(stats.to_frame().index) == list(stats.phases)
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+def test_rate_schedules(engine):
+    constant = make_smith(
+        rate_schedule={"2021-01-01": 2.74}, heloc_rate_schedule={"2021-01-01": 2.95}
+    )
+    pd.testing.assert_frame_equal(
+        constant.simulate(engine=engine), make_smith().simulate(engine=engine)
+    )
+
+    rate_schedule = {"2021-08-10": 2.74, "2023-03-20": 5.1}
+    heloc_rate_schedule = {"2020-01-01": 2.95, "2022-04-14": 4.2, "2023-01-01": 6.45}
+    smith = make_smith(
+        rate_schedule=rate_schedule, heloc_rate_schedule=heloc_rate_schedule
+    )
+    tracker = smith.simulate(engine=engine).set_index("date")
+    daily = make_smith(
+        rate_schedule=rate_schedule, heloc_rate_schedule=heloc_rate_schedule
+    ).simulate(engine="daily")
+    pd.testing.assert_frame_equal(tracker.reset_index(), daily)
+
+    assert smith.mortgage.interest_rate == 5.1
+    assert smith.mortgage.heloc_interest_rate == 6.45
+    # Renewal: a higher payment for the same remaining amortization
+    payments = tracker["mort_interest_paid"] + tracker["mort_principle_paid"]
+    payments = payments[payments > 0]
+    assert payments[:"2023-03-19"].max() < payments["2023-03-20":].min()
+    assert payments["2023-03-20":].iloc[:-1].nunique() == 1
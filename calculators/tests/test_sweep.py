@@ -0,0 +1,69 @@
+import pandas as pd
+from calculators.smith_calculator.scenario import make_smith_calculator
+from calculators.smith_calculator.sweep import SUMMARY_COLUMNS, sweep
+
+
+def test_sweep():
+    grid = {"interest_rate": [2.0, 4.0], "heloc_interest_rate": [3.0, 30.0]}
+    base = dict(
+        principle=50000,
+        equity_available=250000,
+        marginal_tax_rate=90.0,
+        n_steps=365 * 2,
+    )
+    summaries = sweep(grid, workers=1, dividend_yield=0.0, **base)
+
+    assert list(summaries.columns) == list(grid) + SUMMARY_COLUMNS + ["error"]
+    assert len(summaries) == 4
+
+    # The large tax refunds break the 10% lump sum allowance
+    failed = summaries[summaries["heloc_interest_rate"] == 30.0]
+    assert all("10% of equity" in error for error in failed["error"])
+    assert failed["payoff_date"].isna().all()
+
+    smith = make_smith_calculator(
+        interest_rate=2.0, heloc_interest_rate=3.0, dividend_yield=0.0, **base
+    )
+    tracker = smith.simulate(engine="event")
+    summary = summaries.iloc[0]
+    assert summary["error"] is None
+    assert summary["final_investment_balance"] == smith.investment.balance
+    assert summary["peak_credit_balance"] == tracker["credit_balance"].max()
+    assert summary["total_tax_refund"] == smith.ledger.to_frame()["tax_refund"].sum()
+
+
+def test_sweep_workers():
+    grid = {"interest_rate": [2.0, 3.0, 4.0], "dividend_yield": [3.0, 6.0]}
+    serial = sweep(grid, workers=1, n_steps=365 * 3)
+    parallel, trackers = sweep(
+        grid, workers=2, chunksize=2, trackers=True, n_steps=365 * 3
+    )
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(trackers) == 6
+    assert trackers[0]["credit_balance"].max() == serial["peak_credit_balance"][0]
+
+
+def test_sweep_bad_scenarios():
+    grid = {
+        "payment_frequency": ["monthly", "yearly"],
+        "dividend_frequency": ["monthly", "daily"],
+    }
+    for workers in (1, 2):
+        summaries = sweep(grid, workers=workers, n_steps=365)
+        assert summaries["error"].tolist() == [
+            None,
+            "ValueError: Unknown dividend frequency: daily",
+            "ValueError: Unknown payment frequency: yearly",
+            "ValueError: Unknown payment frequency: yearly",
+        ]
+
+    grid = {"interest_rate": [0.0, 2.0], "amortization_months": [0, 300]}
+    for workers in (1, 2):
+        summaries = sweep(grid, workers=workers, n_steps=365)
+        errors = summaries["error"].tolist()
+        assert errors[0].startswith("ValueError: Amortization months")
+        assert errors[1].startswith("ValueError: No payment amount at a 0%")
+        assert errors[2].startswith("ValueError: Amortization months")
+        assert errors[3] is None
+        assert summaries["net_worth"].notna().tolist() == [False, False, False, True]
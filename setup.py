@@ -17,4 +17,10 @@ setup(
     ),
     tests_requires=["pytest"],
     install_requires=["pandas>=1.2.4", "streamlit>=0.86.0"],
+    entry_points={
+        "console_scripts": [
+            "smith-calc=calculators.smith_calculator.cli:main",
+            "smith-batch=calculators.smith_calculator.pipeline:main",
+        ],
+    },
 )